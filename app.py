@@ -1,114 +1,31 @@
 # --- IMPORTING DEPENDENCIES ---
 
+import os
 import json
+from functools import partial
 import pandas as pd
 import streamlit as st
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-from mplsoccer import PyPizza, FontManager
 import streamlit.components.v1 as components
-from src.plotUtils import getFeaturePercentiles, getMoodPlaylist
+from src.components.chart_cache import ChartRenderCache
+from src.components.search_index import TypeaheadIndex
+from src.components.hit_quality import HitQualityIndex
+from src.components.filter_index import SongFilters
+from src.components.feature_cube import FeatureCube
+from src.plotUtils import getFeaturePercentiles, getMoodPlaylists, loadPercentileProfiles, moodFeatures
 from src.plotUtils import format_song_name, format_artist_name
+from src.pipeline.recommender_engine import RecommenderEngine, RecommenderEngineConfig
+
+# Fast-start mode (FAST_START=1) defers reading the features artifact until it's first needed
+FAST_START = os.environ.get('FAST_START', '0') == '1'
 
 # ---------------------------------------------------------------------------------------------- #
-# --- DEFINING PLOTTING FUNCTIONS ---
-
-spotifyGreen = '#1dda63'
-bg_color_cas = "#000000"
-grey = "#979797"
-lightgrey = "#bdbdbd"
-
-robotoBold = FontManager('https://tushar-mahalya.github.io/images-repo/Fonts/GothamBold.ttf')
-robotoMed = FontManager('https://tushar-mahalya.github.io/images-repo/Fonts/GothamMedium.ttf')
-
-
-def plotPizza(values):
-    featColumns = ['Popularity', 'Acousticness', 'Danceability', 'Energy', 'Instrumentalness', 'Loudness',
-                   'Speechiness', 'Tempo', 'Valence']
-    slice_colors = [spotifyGreen] * 9
-    text_colors = ["w"] * 9
-
-    # Instantiate PyPizza class
-    baker = PyPizza(
-        params=featColumns,
-        background_color='#000000',
-        straight_line_color=grey,
-        straight_line_lw=2,
-        straight_line_ls='-',
-        last_circle_color=grey,
-        last_circle_lw=7,
-        last_circle_ls='-',
-        other_circle_lw=2,
-        other_circle_color=lightgrey,
-        other_circle_ls='--',
-        inner_circle_size=20
-    )
-
-    # Plot pizza
-    fig, ax = baker.make_pizza(
-        values,
-        figsize=(8, 8),
-        color_blank_space=["k"] * 9,
-        slice_colors=slice_colors,
-        value_bck_colors=slice_colors,
-        param_location=115,
-        blank_alpha=1,
-        kwargs_slices=dict(edgecolor="w", zorder=2, linewidth=2, alpha=.8, linestyle='-'),
-        kwargs_params=dict(color="w", fontsize=22, fontweight='bold',
-                           va="center", fontproperties=robotoMed.prop),
-        kwargs_values=dict(color="k", fontsize=18, va='center',
-                           zorder=3, fontproperties=robotoMed.prop,
-                           bbox=dict(edgecolor="k", boxstyle="round,pad=0.2", lw=1.5))
-    )
-
-    ax.patch.set_facecolor('None')
-    fig.set_alpha = 0.0
-    fig.patch.set_visible(False)
-
-    return fig
-
-
-def plotHitProfile(feat_dict):
-    mpl.rc('axes', edgecolor=grey)
-    mpl.rc('axes', linewidth='2')
-
-    fig, ax = plt.subplots(figsize=(8, 6))
-
-    # Adding bg color and setting the grid
-    fig.set_facecolor(bg_color_cas)
-    ax.set_facecolor('k')
-    ax.set_axisbelow(True)
-    ax.grid(color=lightgrey, which='major', linestyle='--', alpha=1)
-
-    years = list(map(int, list(feat_dict.keys())))
-    hit_quality = list(map(float, list(feat_dict.values())))
-
-    # Plotting
-    ax.plot(years, hit_quality, '-', color=spotifyGreen, lw=4)
-
-    # Setting the limits for x and y axes
-    minYear = int(list(year for year in feat_dict if feat_dict[year] > 0)[0])
-    maxYear = max(years) + 1  # Add a buffer of 1 to the maximum year
-    ax.set_xlim([minYear, maxYear])
-
-    # Setting the x-axis ticks
-    num_ticks = 10  # Number of ticks on the x-axis
-    tick_step = (maxYear - minYear) / (num_ticks - 1)  # Calculate the tick step
-    x_ticks = [int(minYear + i * tick_step) for i in range(num_ticks)]  # Generate the ticks
-    ax.set_xticks(x_ticks)
-
-    ax.set_xlabel('Year', fontsize=16, labelpad=10, fontproperties=robotoMed.prop, color='w')
-    ax.set_ylabel('Hit Quality', fontsize=16, labelpad=10, fontproperties=robotoMed.prop, color='w')
-    # Customizing the x and y ticklabels
-    for ticklabel in ax.get_yticklabels():
-        ticklabel.set_fontproperties(robotoMed.prop)
-        ticklabel.set_fontsize(14)
-    for ticklabel in ax.get_xticklabels():
-        ticklabel.set_fontproperties(robotoMed.prop)
-        ticklabel.set_fontsize(14)
-    ax.tick_params(axis='both', which='major', labelcolor='w', length=0, color='#2b2b2b')
-
-    return fig
+# --- CHART RENDER CACHE ---
+
+# Rendered charts are shared by every session of the server process, misses are rendered in parallel
+@st.cache_resource
+def load_chart_cache():
+    return ChartRenderCache(charts_dir='artifacts/charts')
+
 
 # ---------------------------------------------------------------------------------------------- #
 # --- PAGE CONFIGURATION ---
@@ -134,22 +51,60 @@ def upload_data(df, name):
     df.to_csv(f'artifacts/{name}.csv', index=False)
 
 
-main_data_path = "artifacts/[Songs]_Preprocessed_Data.csv"
-ohe_data_path = 'artifacts/[OHE]_Artist_Genre.csv'
-hit_profile_path = 'artifacts/Artists_&_Genres_Hit_Profile.json'
+def rank_moods(rows):
+    # Mood playlists of the recommended songs, ranked on their features gathered by row from the record store
+    store = rec_sys.recordStore()
+    return getMoodPlaylists({feature: store.values(feature, rows) for feature, _ in moodFeatures.values()})
 
-df = load_csv(main_data_path)
-artist_genre_ohe_df = load_csv(ohe_data_path)
-hit_profile = load_json(hit_profile_path)
-artists = hit_profile['Artist'].keys()
-genres = hit_profile['Genre'].keys()
 
-# ---------------------------------------------------------------------------------------------- #
-# --- Initializing Recommender System ---
+# The engine owns the songs catalog and is shared by every session & rerun of the server process
+@st.cache_resource
+def load_engine():
+    return RecommenderEngine(RecommenderEngineConfig(lazy_load=FAST_START))
+
+
+# Typeahead indexes behind the song, artist & genre pickers, built once per server process
+@st.cache_resource
+def load_search_indexes(_songs_df, hit_profile_path):
+    with open(hit_profile_path, "r") as file:
+        profiles = json.load(file)
+    return (TypeaheadIndex(_songs_df['Song-Artist'], _songs_df['Popularity']),
+            TypeaheadIndex.fromDict(profiles['Artist']), TypeaheadIndex.fromDict(profiles['Genre']))
+
+
+# Mean percentile ranks of every artist & genre, precomputed by the preprocessing pipeline
+@st.cache_resource
+def load_percentile_profiles(percentile_profiles_path):
+    return loadPercentileProfiles(percentile_profiles_path)
+
+
+# Cumulative-over-years hit quality of every artist & genre, for the year range rankings
+@st.cache_resource
+def load_hit_quality_index(hit_quality_index_path):
+    return HitQualityIndex.load(hit_quality_index_path)
+
+
+# Year x genre x audio feature aggregates, for the genre trend charts
+@st.cache_resource
+def load_feature_cube(feature_cube_path):
+    return FeatureCube.load(feature_cube_path)
 
-from src.pipeline.recommender_engine import RecommenderEngine
 
-rec_sys = RecommenderEngine()
+percentile_profiles_path = 'artifacts/Artists_&_Genres_Percentile_Profiles.npz'
+hit_quality_index_path = 'artifacts/Artists_&_Genres_Hit_Quality_Cumsum.npz'
+hit_profile_path = 'artifacts/Artists_&_Genres_Hit_Profile.json'
+feature_cube_path = 'artifacts/[Cube]_Year_Genre_Features.npz'
+
+rec_sys = load_engine()
+chart_cache = load_chart_cache()
+df = rec_sys.songs_data
+percentile_profiles = load_percentile_profiles(percentile_profiles_path)
+hit_quality_index = load_hit_quality_index(hit_quality_index_path)
+feature_cube = load_feature_cube(feature_cube_path)
+hit_profile = load_json(hit_profile_path)
+song_index, artist_index, genre_index = load_search_indexes(df, hit_profile_path)
+decades = sorted({year // 10 * 10 for year in df['Hot100 Ranking Year']})
+n_suggestions = 50
 
 # ---------------------------------------------------------------------------------------------- #
 # --- LINKS FOR REQUIRED ANIMATION AND IMAGES ---
@@ -241,62 +196,66 @@ with st.container():
 # ---------------------------------------------------------------------------------------------- #
 # --- RECCOMMENDER SYSTEM ---
 
-user_df = None
-
 with st.container():
     st.title("Pick your favourite songs  :musical_note:")
     st.subheader("Search for the song's title")
-    user_songs = st.multiselect(label="Search", options=df["Song-Artist"],
+    song_query = st.text_input(label="Search", placeholder="Type a title or an artist",
+                               label_visibility='collapsed', key='song_query')
+    # Already picked songs stay in the options so that a new query doesn't drop them
+    picked_songs = st.session_state.get('user_songs', [])
+    song_options = list(dict.fromkeys(picked_songs + song_index.search(song_query, n_suggestions)))
+    user_songs = st.multiselect(label="Songs", options=song_options, key='user_songs',
                                 label_visibility='collapsed')
+    with st.expander("Filter the recommendations"):
+        cols = st.columns([1, 1.6, 1, 1])
+        with cols[0]:
+            filter_decades = st.multiselect(label="Decades", options=decades)
+        with cols[1]:
+            filter_genres = st.multiselect(label="Genres", options=sorted(hit_profile['Genre']))
+        with cols[2]:
+            filter_popularity = st.slider(label="Min. popularity", min_value=0, max_value=100, value=0)
+        with cols[3]:
+            st.write("")
+            exclude_artists = st.checkbox("Exclude the artists of my songs")
+    song_filters = None
+    if filter_decades or filter_genres or filter_popularity > 0 or exclude_artists:
+        song_filters = SongFilters(decades=tuple(filter_decades), genres=tuple(filter_genres),
+                                   min_popularity=filter_popularity, exclude_playlist_artists=exclude_artists)
+
     if st.button("Confirm Selection"):
+        recs = None
+        if 5 <= len(user_songs) <= 10:
+            recs = rec_sys.Recommend_Records(user_songs, filters=song_filters)
 
-        if len(user_songs) < 5 or len(user_songs) > 10:
+        if recs is None:
             st.error("Please select only 5-10 songs", icon="⚠️")
 
+        elif len(recs) < 20:
+            st.error(f"Only {len(recs)} songs match the filters, please relax them", icon="⚠️")
+
         else:
-            user_df = df[df["Song-Artist"].isin(user_songs)]
-            recs_df = rec_sys.Recommend_Songs(user_songs)
-            upload_data(recs_df, 'recommendations')
-            user_df_len = user_df.shape[0]
-            extra = user_df_len - 5
+            # Cards & mood playlists work off the record store arrays gathered by row, the DataFrame is only
+            # built when the recommendations are saved
+            user_recs = rec_sys.recordStore().lookup(user_songs)
+            # Kept per session, the shared file is only written on request
+            st.session_state['recommendation_rows'] = recs.rows
+            st.session_state['mood_rankings'] = rank_moods(recs.rows)
+
+            song_charts = chart_cache.render([(f'song:{song}', 'pizza', partial(getFeaturePercentiles, df, song, 'song'))
+                                              for song in user_recs.song_artist])
 
             st.subheader("Below are the profiles of your chosen songs, using which we'll analyse your preferences..")
-			
-            if user_df_len > 5:
-                with st.container():
-                    cols = st.columns(5)
-                    for i in range(0, 5):
-                        with cols[i]:
-                            st.pyplot(plotPizza(getFeaturePercentiles(df, user_df['Song-Artist'].values[i], 'song')))
-                            st.markdown(f"""<p align = 'center'> <b> Song: </b> {format_song_name(user_df['Song'].values[i])} <br>
-                            			<b> Album: </b> {format_song_name(user_df['Album'].values[i])} <br>
-                                        <b> Artist: </b> {format_artist_name(user_df['Artist Names'].values[i])} <br>
-                                        <a href = {user_df['Spotify Link'].values[i]}>
-                                        <img alt="Spotify" src = {spotify_logo} width=15 height=15 hspace=5px><b>Listen on Spotify</b></a>
-                                        </p>""",
-                                        unsafe_allow_html=True)
-                with st.container():
-                    cols = st.columns(5)
-                    for i in range(0, extra):
-                        with cols[i]:
-                            st.pyplot(plotPizza(getFeaturePercentiles(df, user_df['Song-Artist'].values[i+extra], 'song')))
-                            st.markdown(f"""<p align = 'center'> <b> Song: </b> {format_song_name(user_df['Song'].values[i+extra])} <br>
-                            			<b> Album: </b> {format_song_name(user_df['Album'].values[i])} <br>
-                                        <b> Artist: </b> {format_artist_name(user_df['Artist Names'].values[i+extra])} <br>
-                                        <a href = {user_df['Spotify Link'].values[i+extra]}>
-                                        <img alt="Spotify" src = {spotify_logo} width=15 height=15 hspace=5px><b>Listen on Spotify</b></a>
-                                        </p>""",
-                                        unsafe_allow_html=True)
-            else:
+
+            for row_start in range(0, len(user_recs), 5):
                 with st.container():
                     cols = st.columns(5)
-                    for i in range(0, 5):
-                        with cols[i]:
-                            st.pyplot(plotPizza(getFeaturePercentiles(df, user_df['Song-Artist'].values[i], 'song')))
-                            st.markdown(f"""<p align = 'center'> <b> Song: </b> {format_song_name(user_df['Song'].values[i])} <br>
-                            			<b> Album: </b> {format_song_name(user_df['Album'].values[i])} <br>
-                                        <b> Artist: </b> {format_artist_name(user_df['Artist Names'].values[i])} <br>
-                                        <a href = {user_df['Spotify Link'].values[i]}>
+                    for i in range(row_start, min(row_start + 5, len(user_recs))):
+                        with cols[i - row_start]:
+                            st.image(song_charts[i], use_column_width=True)
+                            st.markdown(f"""<p align = 'center'> <b> Song: </b> {format_song_name(user_recs.title[i])} <br>
+                            			<b> Album: </b> {format_song_name(user_recs.album[i])} <br>
+                                        <b> Artist: </b> {format_artist_name(user_recs.artists[i])} <br>
+                                        <a href = {user_recs.link[i]}>
                                         <img alt="Spotify" src = {spotify_logo} width=15 height=15 hspace=5px><b>Listen on Spotify</b></a>
                                         </p>""",
                                         unsafe_allow_html=True)
@@ -305,58 +264,20 @@ with st.container():
 
             st.subheader("Based on your music taste, you might also like:")
 
-            with st.container():
-                cols = st.columns(5)
-                for i in range(0, 5):
-                    with cols[i]:
-                        st.image(recs_df['Song Image'].values[i], use_column_width=True)
-                        st.markdown(
-                            f"""<p align = 'center'> <b> Song: </b> {format_song_name(recs_df['Song'].values[i])} <br>
-                            		<b> Album: </b> {format_song_name(user_df['Album'].values[i])} <br>
-                                    <b> Artist: </b> {format_artist_name(recs_df['Artist Names'].values[i])} <br>
-                                    <a href = {recs_df['Spotify Link'].values[i]}>
+            for row_start in range(0, 20, 5):
+                with st.container():
+                    cols = st.columns(5)
+                    for i in range(row_start, row_start + 5):
+                        with cols[i - row_start]:
+                            st.image(recs.image[i], use_column_width=True)
+                            st.markdown(
+                                f"""<p align = 'center'> <b> Song: </b> {format_song_name(recs.title[i])} <br>
+                                	<b> Album: </b> {format_song_name(recs.album[i])} <br>
+                                    <b> Artist: </b> {format_artist_name(recs.artists[i])} <br>
+                                    <a href = {recs.link[i]}>
                                     <img alt="Spotify" src = {spotify_logo} width=15 height=15 hspace=5px><b>Listen on Spotify</b></a>
                                     </p>""",
-                            unsafe_allow_html=True)
-            with st.container():
-                cols = st.columns(5)
-                for i in range(0, 5):
-                    with cols[i]:
-                        st.image(recs_df['Song Image'].values[5 + i], use_column_width=True)
-                        st.markdown(
-                            f"""<p align = 'center'> <b> Song: </b> {format_song_name(recs_df['Song'].values[5 + i])} <br>
-                            	<b> Album: </b> {format_song_name(user_df['Album'].values[i])} <br>
-                                <b> Artist: </b> {format_artist_name(recs_df['Artist Names'].values[5 + i])} <br>
-                                <a href = {recs_df['Spotify Link'].values[5 + i]}>
-                                <img alt="Spotify" src = {spotify_logo} width=15 height=15 hspace=5px><b>Listen on Spotify</b></a>
-                                </p>""",
-                            unsafe_allow_html=True)
-            with st.container():
-                cols = st.columns(5)
-                for i in range(0, 5):
-                    with cols[i]:
-                        st.image(recs_df['Song Image'].values[10 + i], use_column_width=True)
-                        st.markdown(
-                            f"""<p align = 'center'> <b> Song: </b> {format_song_name(recs_df['Song'].values[10 + i])} <br>
-                            	<b> Album: </b> {format_song_name(user_df['Album'].values[i])} <br>
-                                <b> Artist: </b> {format_artist_name(recs_df['Artist Names'].values[10 + i])} <br>
-                                <a href = {recs_df['Spotify Link'].values[10 + i]}>
-                                <img alt="Spotify" src = {spotify_logo} width=15 height=15 hspace=5px><b>Listen on Spotify</b></a>
-                                </p>""",
-                            unsafe_allow_html=True)
-            with st.container():
-                cols = st.columns(5)
-                for i in range(0, 5):
-                    with cols[i]:
-                        st.image(recs_df['Song Image'].values[15 + i], use_column_width=True)
-                        st.markdown(
-                            f"""<p align = 'center'> <b> Song: </b> {format_song_name(recs_df['Song'].values[15 + i])} <br>
-                            	<b> Album: </b> {format_song_name(user_df['Album'].values[i])} <br>
-                                <b> Artist: </b> {format_artist_name(recs_df['Artist Names'].values[15 + i])} <br>
-                                <a href = {recs_df['Spotify Link'].values[15 + i]}>
-                                <img alt="Spotify" src = {spotify_logo} width=15 height=15 hspace=5px><b>Listen on Spotify</b></a>
-                                </p>""",
-                            unsafe_allow_html=True)
+                                unsafe_allow_html=True)
             with st.container():
                 left_col, right_col = st.columns([1, 7])
                 with left_col:
@@ -366,6 +287,11 @@ with st.container():
                         "<p style = 'font-size: 36px; font-weight: bold;'> <br> Sit back and stream or ..</p>""",
                         unsafe_allow_html=True)
 
+    if 'recommendation_rows' in st.session_state:
+        if st.button("Save Recommendations", key='save_recommendations'):
+            upload_data(df.iloc[st.session_state['recommendation_rows']], 'recommendations')
+            st.success("Recommendations saved to artifacts/recommendations.csv")
+
 # ---------------------------------------------------------------------------------------------- #
 # --- ARTIST PROFILE, GENRE PROFILES & MOOD PLAYLIST ---
 
@@ -373,13 +299,13 @@ st.markdown("""---""")
 
 st.title("Explore more")
 line1 = """<p style = "font-size: 22px;"> 
-Explore the profiles of your favourite artists and their genres by opting for an artist or an artist's genre. The resultant visualisations will show the trajectory of its popularity as well as how dominant various audio features are for the selected choice. Moreover, you can also listen to some of our mood playlists in the Playlists tab.
+Explore the profiles of your favourite artists and their genres by opting for an artist or an artist's genre. The resultant visualisations will show the trajectory of its popularity as well as how dominant various audio features are for the selected choice. Moreover, you can also listen to some of our mood playlists in the Playlists tab, and rank artists and genres by their hit quality over any period in the Hit Charts tab.
 </p> """
 st.markdown(line1, unsafe_allow_html=True)
 
 # --- TAB CONFIG ---
 
-listTabs = ["Artist", "Genre", "Playlists"]
+listTabs = ["Artist", "Genre", "Playlists", "Hit Charts"]
 tabs_font_css = st.markdown("""
 <style> button[data-baseweb="tab"] {font-size: 26px; font-weight: 520; background-color: #ffffff; color: #000000;}
 button[data-baseweb="tab"]:hover {font-size: 26px; font-weight: 520; background-color: #1DDA63; color:#FFFFFF;}
@@ -401,7 +327,10 @@ with st.container():
         st.subheader("Choose an Artist")
         col1, col2 = st.columns([1.6, 1])
         with col1:
-            user_artist = st.selectbox(label="Search", options=artists, label_visibility='collapsed')
+            artist_query = st.text_input(label="Search", placeholder="Type an artist", key='artist_query',
+                                         label_visibility='collapsed')
+            user_artist = st.selectbox(label="Artists", options=artist_index.search(artist_query, n_suggestions),
+                                       label_visibility='collapsed')
         with col2:
             if st.button("Confirm Selection", key=1):
                 chosen_artist = user_artist
@@ -409,6 +338,9 @@ with st.container():
         # Profile
         if chosen_artist != None:
             st.subheader(f"Artist Profile for {chosen_artist},")
+            vals = percentile_profiles['artist'][chosen_artist]
+            hit_chart, pizza_chart = chart_cache.render([('artist:' + chosen_artist, 'hit_profile', hit_profile['Artist'][chosen_artist]),
+                                                         ('artist:' + chosen_artist, 'pizza', vals)])
 
             cols = st.columns([2.5, 1, 2.2])
 
@@ -417,7 +349,7 @@ with st.container():
                 st.markdown(
                     '<p align = "center" style = "font-size: 24px; font-weight: bold"> Popularity w.r.t. Time </p>',
                     unsafe_allow_html=True)
-                st.pyplot(plotHitProfile(hit_profile['Artist'][chosen_artist]))
+                st.image(hit_chart, use_column_width=True)
                 st.markdown(
                     "<p align = 'center' style = 'font-size: 20px;'> The Hit Quality is a metric that measures the quality of the ranks.<br>To elaborate, instead of determining the popularity of an artist by counting the no. of times they've appeared in the Billboard Hot 100, the hit quality metric will try to emphasize the correction of ranking by giving more weightage to the higher ranks and less importance to the lower ones. This will result in a more robust judgement of an artist's popularity. </p>",
                     unsafe_allow_html=True)
@@ -429,12 +361,18 @@ with st.container():
                 st.markdown(
                     '<p align = "center" style = "font-size: 24px; font-weight: bold"> Mean Percentile Ranks <br> </p>',
                     unsafe_allow_html=True)
-                vals = getFeaturePercentiles(artist_genre_ohe_df, chosen_artist, 'artist')
-                st.pyplot(plotPizza(vals))
+                st.image(pizza_chart, use_column_width=True)
                 st.markdown(
                     f"<p align = 'center' style = 'font-size: 20px;'> A percentile rank indicates the percentage of scores in the frequency distribution that are less than that score. <br> In simple terms, a mean percentile rank of {vals[1]} for Acousticness for the artist {chosen_artist} indicates that {vals[1]}% of the songs in our database fall below the mean acousticness of the songs by the artist {chosen_artist}.</p>",
                     unsafe_allow_html=True)
 
+            st.markdown(f'<p style = "font-size: 24px; font-weight: bold"> Artists like {chosen_artist} </p>',
+                        unsafe_allow_html=True)
+            similar_artists = rec_sys.Recommend_Artists(chosen_artist, 10)
+            similar_artists['Top Songs'] = similar_artists['Top Songs'].apply(', '.join)
+            st.dataframe(similar_artists.rename(columns={'similarity': 'Similarity'}).set_index('Artist'),
+                         use_container_width=True)
+
     # ------------------------------------------------------------------------------------------ #
     # TAB-2 GENRE PROFILE
 
@@ -444,7 +382,10 @@ with st.container():
         st.subheader("Choose a Genre")
         col1, col2 = st.columns([1.6, 1])
         with col1:
-            user_genre = st.selectbox(label="Search", options=genres, label_visibility='collapsed')
+            genre_query = st.text_input(label="Search", placeholder="Type a genre", key='genre_query',
+                                        label_visibility='collapsed')
+            user_genre = st.selectbox(label="Genres", options=genre_index.search(genre_query, n_suggestions),
+                                      label_visibility='collapsed')
         with col2:
             if st.button("Confirm Selection", key=2):
                 chosen_genre = user_genre
@@ -452,6 +393,9 @@ with st.container():
                 # Profile
         if chosen_genre != None:
             st.subheader(f"Genre Profile for {chosen_genre},")
+            vals = percentile_profiles['genre'][chosen_genre]
+            hit_chart, pizza_chart = chart_cache.render([('genre:' + chosen_genre, 'hit_profile', hit_profile['Genre'][chosen_genre]),
+                                                         ('genre:' + chosen_genre, 'pizza', vals)])
 
             cols = st.columns([2.5, 1, 2.2])
 
@@ -460,7 +404,7 @@ with st.container():
                 st.markdown(
                     '<p align = "center" style = "font-size: 24px; font-weight: bold"> Popularity w.r.t. Time </p>',
                     unsafe_allow_html=True)
-                st.pyplot(plotHitProfile(hit_profile['Genre'][chosen_genre]))
+                st.image(hit_chart, use_column_width=True)
                 st.markdown(
                     "<p align = 'center' style = 'font-size: 20px;'> The Hit Quality is a metric that measures the quality of the ranks.<br>To elaborate, instead of determining the popularity of an artist's genre by counting the no. of times it has appeared in the Billboard Hot 100, the hit quality metric will try to emphasize the correction of ranking by giving more weightage to the higher ranks and less importance to the lower ones. This will result in a more robust judgement of a genre's popularity. </p>",
                     unsafe_allow_html=True)
@@ -469,8 +413,7 @@ with st.container():
                 st.markdown(
                     '<p align = "center" style = "font-size: 24px; font-weight: bold"> Mean Percentile Ranks <br> </p>',
                     unsafe_allow_html=True)
-                vals = getFeaturePercentiles(artist_genre_ohe_df, chosen_genre, 'genre')
-                st.pyplot(plotPizza(vals))
+                st.image(pizza_chart, use_column_width=True)
                 st.markdown(
                     f"<p align = 'center' style = 'font-size: 20px;'> A percentile rank indicates the percentage of scores in the frequency distribution that are less than that score. <br> In simple terms, a mean percentile rank of {vals[1]} for Acousticness for the {chosen_genre} genre indicates that {vals[1]}% of the songs in our database fall below the mean acousticness of the songs belonging to the {chosen_genre} genre.</p>",
                     unsafe_allow_html=True)
@@ -492,9 +435,15 @@ with st.container():
 
                     # Playlist display
             if chosen_mood != None:
-                recs_df = pd.read_csv('artifacts/recommendations.csv')
+                if 'recommendation_rows' in st.session_state:
+                    rec_rows = st.session_state['recommendation_rows']
+                    mood_rankings = st.session_state['mood_rankings']
+                else:
+                    saved_recs = load_csv('artifacts/recommendations.csv')
+                    rec_rows = rec_sys.recordStore().lookup(saved_recs['Song-Artist']).rows
+                    mood_rankings = rank_moods(rec_rows)
 
-                mood_df = getMoodPlaylist(recs_df, chosen_mood)
+                mood_recs = rec_sys.recordStore().gather(rec_rows[mood_rankings[chosen_mood]])
 
                 st.subheader(f"Here's a {chosen_mood} playlist for you,")
 
@@ -502,11 +451,11 @@ with st.container():
                     cols = st.columns(5)
                     for i in range(0, 5):
                         with cols[i]:
-                            st.image(mood_df['Song Image'].values[i], use_column_width=True)
-                            st.markdown(f"""<p align = 'center'> <b> Song: </b> {mood_df['Song'].values[i]} <br>
-                            			<b> Album: </b> {format_song_name(mood_df['Album'].values[i])} <br>
-                                        <b> Artist: </b> {format_artist_name(mood_df['Artist Names'].values[i])} <br>
-                                        <a href = {mood_df['Spotify Link'].values[i]}>
+                            st.image(mood_recs.image[i], use_column_width=True)
+                            st.markdown(f"""<p align = 'center'> <b> Song: </b> {mood_recs.title[i]} <br>
+                            			<b> Album: </b> {format_song_name(mood_recs.album[i])} <br>
+                                        <b> Artist: </b> {format_artist_name(mood_recs.artists[i])} <br>
+                                        <a href = {mood_recs.link[i]}>
                                         <img alt="Spotify" src = {spotify_logo} width=15 height=15 hspace=5px><b>Listen on Spotify</b></a>
                                         </p>""",
                                         unsafe_allow_html=True)
@@ -514,16 +463,58 @@ with st.container():
                     cols = st.columns(5)
                     for i in range(0, 5):
                         with cols[i]:
-                            st.image(mood_df['Song Image'].values[5 + i], use_column_width=True)
-                            st.markdown(f"""<p align = 'center'> <b> Song: </b> {mood_df['Song'].values[5 + i]} <br>
-                            			<b> Album: </b> {format_song_name(mood_df['Album'].values[i])} <br>
-                                        <b> Artist: </b> {format_artist_name(mood_df['Artist Names'].values[5 + i])} <br>
-                                        <a href = {mood_df['Spotify Link'].values[5 + i]}>
+                            st.image(mood_recs.image[5 + i], use_column_width=True)
+                            st.markdown(f"""<p align = 'center'> <b> Song: </b> {mood_recs.title[5 + i]} <br>
+                            			<b> Album: </b> {format_song_name(mood_recs.album[5 + i])} <br>
+                                        <b> Artist: </b> {format_artist_name(mood_recs.artists[5 + i])} <br>
+                                        <a href = {mood_recs.link[5 + i]}>
                                         <img alt="Spotify" src = {spotify_logo} width=15 height=15 hspace=5px><b>Listen on Spotify</b></a>
                                         </p>""",
                                         unsafe_allow_html=True)
 
 
+    # ------------------------------------------------------------------------------------------ #
+    # TAB-4 HIT CHARTS
+
+    with tabs[3]:
+        st.subheader("Rank Artists & Genres by Hit Quality")
+        col1, col2 = st.columns([1, 1.6])
+        with col1:
+            chart_type = st.radio(label="Rank", options=["Artist", "Genre"], horizontal=True,
+                                  label_visibility='collapsed')
+        with col2:
+            chart_years = hit_quality_index['artist'].years
+            start_year, end_year = st.slider(label="Years", min_value=int(chart_years.min()),
+                                             max_value=int(chart_years.max()), value=(1980, 1995),
+                                             label_visibility='collapsed')
+
+        chart_index = hit_quality_index[chart_type.lower()]
+        cols = st.columns(2)
+        with cols[0]:
+            st.markdown(f'<p style = "font-size: 24px; font-weight: bold"> Top {chart_type}s of {start_year}-{end_year} </p>',
+                        unsafe_allow_html=True)
+            st.dataframe(chart_index.topRange(start_year, end_year, 20).set_index('Name'), use_container_width=True)
+        with cols[1]:
+            st.markdown(f'<p style = "font-size: 24px; font-weight: bold"> Fastest Rising {chart_type}s of {start_year}-{end_year} </p>',
+                        unsafe_allow_html=True)
+            st.dataframe(chart_index.fastestRising(start_year, end_year, 20).set_index('Name'),
+                         use_container_width=True)
+
+        st.subheader("Audio Features of Genres over the Years")
+        col1, col2 = st.columns([1, 1.6])
+        with col1:
+            trend_feature = st.selectbox(label="Feature", options=feature_cube.features,
+                                         index=feature_cube.features.index('Danceability'), key='trend_feature')
+        with col2:
+            trend_genres = st.multiselect(label="Genres", options=feature_cube.genres, default=['dance pop', 'rock'],
+                                          max_selections=5, key='trend_genres')
+        trends = {'All songs': feature_cube.yearly(trend_feature, None, start_year, end_year).set_index('Year')['Mean']}
+        for genre in trend_genres:
+            trends[genre] = feature_cube.yearly(trend_feature, genre, start_year, end_year).set_index('Year')['Mean']
+        st.markdown(f'<p style = "font-size: 20px;"> Mean {trend_feature} of the hits of every year of '
+                    f'{start_year}-{end_year} </p>', unsafe_allow_html=True)
+        st.line_chart(pd.DataFrame(trends))
+
 # ---------------------------------------------------------------------------------------------- #
 # --- CONTACT FORM & SOCIAL LINKS ---
 
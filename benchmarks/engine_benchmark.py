@@ -0,0 +1,166 @@
+"""
+Scoring benchmark of the RecommenderEngine: exact scoring on the preprocessed features against scoring on SVD
+embeddings of several ranks, on the precomputed neighbour graph and on 8-bit quantized features.
+
+For every mode, reports the build time of its artifact (the graph being built on one thread and on all CPUs), the
+size of the scored matrix, the FLOPs and latency of a single & a batched query (end to
+end and of the scoring & top-k selection alone), and the quality of the recommendations against exact scoring:
+recall of the exact top-k and the mean exact similarity of the recommended songs relative to the one of the exact
+top-k.
+
+    python -m benchmarks.engine_benchmark --ranks 32,64,128,256 --playlists 200
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.service_load_test import samplePlaylists
+from src.components.neighbour_graph import Neighbour_Graph
+from src.components.preprocessing import Quantize_Features, SVD_Embedding
+from src.pipeline.recommender_engine import RecommenderEngine, RecommenderEngineConfig
+
+
+def timeQueries(engine: RecommenderEngine, playlists: list, k: int, batch_size: int, repeat: int = 3) -> float:
+    """
+    Best mean latency per playlist in ms, scoring the playlists in batches of `batch_size`.
+    """
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for first in range(0, len(playlists), batch_size):
+            engine.Recommend_Songs_Batch(playlists[first:first + batch_size], k)
+        best = min(best, (time.perf_counter() - start) / len(playlists))
+    return best * 1000
+
+
+def timeScoring(engine: RecommenderEngine, playlists_idx: list, k: int, batch_size: int, repeat: int = 3) -> float:
+    """
+    Best mean time per playlist in ms of the scoring & top-k selection alone, in batches of `batch_size`.
+    """
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for first in range(0, len(playlists_idx), batch_size):
+            if engine.config.scoring == 'graph':
+                for playlist_idx in playlists_idx[first:first + batch_size]:
+                    engine.graphRecommend(playlist_idx, k)
+                continue
+            batch_idx = playlists_idx[first:first + batch_size]
+            for scores, playlist_idx in zip(engine.scorePlaylists(batch_idx), batch_idx):
+                if engine.config.scoring == 'quantized':
+                    engine.rerank(scores, engine._features[playlist_idx].sum(axis=0),
+                                  max(engine.config.rerank_pool_size, k))
+                engine.topIndices(scores, k)
+        best = min(best, (time.perf_counter() - start) / len(playlists_idx))
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ranks', default='32,64,128,256', help='comma separated embedding ranks')
+    parser.add_argument('--playlists', type=int, default=200)
+    parser.add_argument('--k', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--neighbours', type=int, default=50, help='neighbours per song of the graph')
+    parser.add_argument('--rerank-pool', type=int, default=500, help='candidates re-ranked in quantized mode')
+    args = parser.parse_args()
+
+    exact = RecommenderEngine()
+    playlists = samplePlaylists(exact.songs_data, args.playlists, seed=1)
+    playlists_idx = [exact.getIndex(playlist, exact.songs_data).to_numpy() for playlist in playlists]
+    exact_scores = exact.scorePlaylists(playlists_idx)
+    exact_top = [exact.topIndices(scores, args.k) for scores in exact_scores]
+    exact_quality = np.mean([scores[top].mean() for scores, top in zip(exact_scores, exact_top)])
+
+    n_songs, n_features = exact._features.shape
+    rows = [{'mode': 'exact', 'dims': n_features, 'matrix_mb': exact._features.nbytes / 1024 ** 2,
+             'build_s': 0.0, 'mflops_per_query': 2 * n_songs * n_features / 1e6,
+             'single_ms': timeQueries(exact, playlists, args.k, 1),
+             'batched_ms': timeQueries(exact, playlists, args.k, args.batch_size),
+             'scoring_ms': timeScoring(exact, playlists_idx, args.k, args.batch_size),
+             f'recall@{args.k}': 1.0, 'relative_similarity': 1.0, 'explained_variance': 1.0}]
+
+    def quality(engine: RecommenderEngine) -> tuple[float, float]:
+        top = [recommendations.index.to_numpy() for recommendations in engine.Recommend_Songs_Batch(playlists, args.k)]
+        recall = np.mean([len(np.intersect1d(a, b)) / args.k for a, b in zip(top, exact_top)])
+        similarity = np.mean([row[idx].mean() for row, idx in zip(exact_scores, top)])
+        return recall, similarity / exact_quality
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rank in [int(rank) for rank in args.ranks.split(',')]:
+            embedding_path = os.path.join(tmp_dir, f'embedding_{rank}.npz')
+            start = time.perf_counter()
+            embedding = SVD_Embedding(exact._features, rank)
+            build_time = time.perf_counter() - start
+            np.savez(embedding_path, **embedding)
+            engine = RecommenderEngine(RecommenderEngineConfig(scoring='embedding', embedding_path=embedding_path))
+
+            recall, relative_similarity = quality(engine)
+            rows.append({'mode': f'embedding (rank {rank})', 'dims': rank,
+                         'matrix_mb': engine._features.nbytes / 1024 ** 2, 'build_s': build_time,
+                         'mflops_per_query': 2 * n_songs * rank / 1e6,
+                         'single_ms': timeQueries(engine, playlists, args.k, 1),
+                         'batched_ms': timeQueries(engine, playlists, args.k, args.batch_size),
+                         'scoring_ms': timeScoring(engine, playlists_idx, args.k, args.batch_size),
+                         f'recall@{args.k}': recall, 'relative_similarity': relative_similarity,
+                         'explained_variance': float(embedding['explained_variance_ratio'].sum())})
+
+        build_times = {}
+        for n_jobs in (1, None):
+            start = time.perf_counter()
+            graph = Neighbour_Graph(exact._features, args.neighbours, n_jobs=n_jobs)
+            build_times[n_jobs] = time.perf_counter() - start
+        print(f'graph build time: {build_times[1]:.2f} s on 1 thread, {build_times[None]:.2f} s on '
+              f'{os.cpu_count()} threads')
+        graph_path = os.path.join(tmp_dir, 'graph.npz')
+        np.savez(graph_path, **graph)
+        engine = RecommenderEngine(RecommenderEngineConfig(scoring='graph', graph_path=graph_path))
+
+        recall, relative_similarity = quality(engine)
+        mean_playlist = np.mean([len(idx) for idx in playlists_idx])
+        rows.append({'mode': f'graph ({args.neighbours} neighbours)', 'dims': args.neighbours,
+                     'matrix_mb': sum(graph[name].nbytes for name in ('indptr', 'indices', 'scores')) / 1024 ** 2,
+                     'build_s': build_times[None], 'mflops_per_query': 2 * mean_playlist * args.neighbours / 1e6,
+                     'single_ms': timeQueries(engine, playlists, args.k, 1),
+                     'batched_ms': timeQueries(engine, playlists, args.k, args.batch_size),
+                     'scoring_ms': timeScoring(engine, playlists_idx, args.k, args.batch_size),
+                     f'recall@{args.k}': recall, 'relative_similarity': relative_similarity,
+                     'explained_variance': np.nan})
+
+        start = time.perf_counter()
+        quantized = Quantize_Features(exact._features)
+        build_time = time.perf_counter() - start
+        quantized_path = os.path.join(tmp_dir, 'quantized.npz')
+        rerank_features_path = os.path.join(tmp_dir, 'features.npy')
+        np.savez(quantized_path, **quantized)
+        np.save(rerank_features_path, exact._features.astype(np.float32))
+        engine = RecommenderEngine(RecommenderEngineConfig(scoring='quantized', quantized_path=quantized_path,
+                                                           rerank_features_path=rerank_features_path,
+                                                           rerank_pool_size=args.rerank_pool))
+
+        recall, relative_similarity = quality(engine)
+        rows.append({'mode': f'quantized (uint8, re-rank {args.rerank_pool})', 'dims': n_features,
+                     'matrix_mb': quantized['codes'].nbytes / 1024 ** 2, 'build_s': build_time,
+                     'mflops_per_query': 2 * (n_songs + args.rerank_pool) * n_features / 1e6,
+                     'single_ms': timeQueries(engine, playlists, args.k, 1),
+                     'batched_ms': timeQueries(engine, playlists, args.k, args.batch_size),
+                     'scoring_ms': timeScoring(engine, playlists_idx, args.k, args.batch_size),
+                     f'recall@{args.k}': recall, 'relative_similarity': relative_similarity,
+                     'explained_variance': np.nan})
+        # accuracy of the 8-bit scores alone, before the re-ranking
+        approximate = engine.scorePlaylists(playlists_idx)
+        approximate_top = [engine.topIndices(scores, args.k) for scores in approximate]
+        error = np.abs(approximate - exact_scores)[np.isfinite(exact_scores)].max()
+        recall = np.mean([len(np.intersect1d(a, b)) / args.k for a, b in zip(approximate_top, exact_top)])
+        print(f'quantized scores before re-ranking: max. abs. error {error:.2e}, recall@{args.k} {recall:.4f}')
+
+    print(f'{args.playlists} playlists, top {args.k}, batches of {args.batch_size}')
+    print(pd.DataFrame(rows).round(4).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Ingestion throughput benchmark against the local Spotify & Wikipedia stand-ins.
+
+Runs the data ingestion pipeline in each ingestion mode without credentials or network access and reports API calls
+per song, songs/sec and total wall time.
+
+    python -m benchmarks.ingestion_benchmark --start-year 2015 --end-year 2022 --latency-ms 2
+"""
+import argparse
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+from src.components.standin_services import StandinConfig, StandinSpotify, StandinWikipedia
+from src.pipeline.data_ingestion import DataIngestion, DataIngestionConfig
+
+
+@dataclass
+class IngestionBenchmarkConfig:
+    spotify_data_path: str = 'data/[Spotify]_Billboard_Hot100_Songs_1946-2022.csv'
+    wikipedia_data_path: str = 'data/[Wikipedia]_Billboard_Hot100_Songs_1946-2022.csv'
+
+
+# (name, URI matching mode, delta ingestion)
+MODES = [
+    ('full / cascade', 'cascade', False),
+    ('full / scored', 'scored', False),
+    ('delta / cascade', 'cascade', True),
+    ('delta / scored', 'scored', True),
+]
+
+
+def runMode(name: str, matching_mode: str, delta: bool, start_year: int, end_year: int, spotify_df: pd.DataFrame,
+            wikipedia_df: pd.DataFrame, standin_config: StandinConfig, workdir: str) -> dict:
+    config = DataIngestionConfig(spotify_data_path=os.path.join(workdir, 'spotify.csv'),
+                                 wikipedia_data_path=os.path.join(workdir, 'wikipedia.csv'),
+                                 review_data_path=os.path.join(workdir, 'review.csv'),
+                                 matching_mode=matching_mode, start_year=start_year, end_year=end_year)
+    for path in (config.spotify_data_path, config.wikipedia_data_path, config.review_data_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    # Delta runs start from the data ingested up to the year before the last requested one
+    charted_df = wikipedia_df[wikipedia_df['Year'].between(start_year, end_year)]
+    if delta:
+        wikipedia_df[wikipedia_df['Year'] < end_year].to_csv(config.wikipedia_data_path, index=False)
+        spotify_df[spotify_df['Hot100 Ranking Year'] < end_year].to_csv(config.spotify_data_path, index=False)
+        charted_df = charted_df[charted_df['Year'] == end_year]
+
+    sp = StandinSpotify(spotify_df, standin_config)
+    with StandinWikipedia(wikipedia_df, standin_config) as wiki:
+        config.wikipedia_base_url = wiki.base_url
+        ingestion = DataIngestion(config, sp=sp)
+
+        start = time.perf_counter()
+        final_data = ingestion.getData(delta=delta)
+        wall_time = time.perf_counter() - start
+
+    songs = len(charted_df)
+    api_calls = sp.policy.total_calls + wiki.policy.total_calls
+    enriched = int(final_data['Hot100 Ranking Year'].isin(charted_df['Year'].unique()).sum())
+    return {'mode': name, 'songs': songs, 'enriched': enriched, 'api_calls': api_calls,
+            'calls_per_song': api_calls / max(songs, 1), 'songs_per_sec': songs / wall_time,
+            'wall_time_s': wall_time, 'rate_limited': sum(sp.policy.rate_limited.values()),
+            'errors': sum(sp.policy.errors.values()) + sum(wiki.policy.errors.values()),
+            **{f'{endpoint}_calls': count for endpoint, count in sorted(sp.policy.calls.items())}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--start-year', type=int, default=2015)
+    parser.add_argument('--end-year', type=int, default=2022)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=float, default=0.0, help='calls per second, 0 disables it')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--modes', nargs='*', default=[name for name, _, _ in MODES])
+    args = parser.parse_args()
+
+    config = IngestionBenchmarkConfig()
+    spotify_df = pd.read_csv(config.spotify_data_path)
+    wikipedia_df = pd.read_csv(config.wikipedia_data_path)
+    standin_config = StandinConfig(latency_ms=args.latency_ms, rate_limit=args.rate_limit,
+                                   error_rate=args.error_rate)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, matching_mode, delta in MODES:
+            if name in args.modes:
+                results.append(runMode(name, matching_mode, delta, args.start_year, args.end_year, spotify_df,
+                                       wikipedia_df, standin_config, workdir))
+
+    with pd.option_context('display.width', 200, 'display.max_columns', None, 'display.precision', 2):
+        print(pd.DataFrame(results).set_index('mode').fillna(0))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Load-test harness for the data paths of the Streamlit app.
+
+Simulates concurrent app sessions in one process, sharing the resources app.py caches per server process (engine,
+percentile profiles, hit profiles, chart render cache). Every session picks 5-10 songs proportionally to their
+popularity, gets its recommendations, song percentiles & charts, opens the profile of an artist and a genre (picked
+proportionally to their hit quality) and a mood playlist. Reports per-operation latency percentiles, throughput and
+the RSS of the process over time, for every concurrency level.
+
+    python -m benchmarks.load_test --sessions 1,8,32 --iterations 20
+"""
+import argparse
+import json
+import resource
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.service_load_test import samplePlaylists
+from src.components.chart_cache import ChartRenderCache
+from src.plotUtils import getFeaturePercentiles, getMoodPlaylist, getMoodPlaylists, loadPercentileProfiles
+from src.pipeline.recommender_engine import RecommenderEngine
+
+HIT_PROFILE_PATH = 'artifacts/Artists_&_Genres_Hit_Profile.json'
+MOODS = ["Trending songs", "Dance party", "Monday Blues", "Energizing", "Positive vibes"]
+
+
+def currentRSS() -> float:
+    """
+    Resident set size of the process in MB, the peak RSS where /proc isn't available.
+    """
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * resource.getpagesize() / 1024 ** 2
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def weightedSampler(profiles: dict, rng: np.random.Generator):
+    names = np.array(list(profiles), dtype=object)
+    weights = np.array([sum(profile.values()) for profile in profiles.values()], dtype=np.float64) + 1
+    weights /= weights.sum()
+    return lambda: names[rng.choice(len(names), p=weights)]
+
+
+class AppResources:
+    """
+    What app.py keeps in st.cache_resource, shared by every simulated session.
+    """
+
+    def __init__(self, charts: bool):
+        self.engine = RecommenderEngine()
+        self.songs_data = self.engine.songs_data
+        self.percentile_profiles = loadPercentileProfiles()
+        with open(HIT_PROFILE_PATH, 'r') as file:
+            self.hit_profile = json.load(file)
+        self.chart_cache = ChartRenderCache() if charts else None
+
+
+class Recorder:
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def time(self, operation: str, action, *args):
+        start = time.perf_counter()
+        result = action(*args)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies[operation].append(elapsed)
+        return result
+
+    @property
+    def operations(self) -> int:
+        with self._lock:
+            return sum(len(latencies) for latencies in self.latencies.values())
+
+
+def runSession(resources: AppResources, recorder: Recorder, playlists: list, seed: int, think_time: float):
+    rng = np.random.default_rng(seed)
+    artist_sampler = weightedSampler(resources.hit_profile['Artist'], rng)
+    genre_sampler = weightedSampler(resources.hit_profile['Genre'], rng)
+    chart_cache = resources.chart_cache
+
+    for playlist in playlists:
+        recs_df = recorder.time('recommend', resources.engine.Recommend_Songs, playlist)
+        mood_rankings = recorder.time('mood_rankings', getMoodPlaylists, recs_df)
+        song_percentiles = recorder.time('song_percentiles', lambda: [
+            getFeaturePercentiles(resources.songs_data, song, 'song') for song in playlist])
+        if chart_cache is not None:
+            recorder.time('song_charts', chart_cache.render, [(f'song:{song}', 'pizza', values)
+                                                              for song, values in zip(playlist, song_percentiles)])
+        time.sleep(think_time)
+
+        for feat_type, sampler in (('Artist', artist_sampler), ('Genre', genre_sampler)):
+            entity = sampler()
+            values = recorder.time('profile_percentiles', lambda: resources.percentile_profiles[feat_type.lower()][entity])
+            hit_profile = recorder.time('hit_profile', lambda: resources.hit_profile[feat_type][entity])
+            if chart_cache is not None:
+                entity_key = f'{feat_type.lower()}:{entity}'
+                recorder.time('profile_charts', chart_cache.render, [(entity_key, 'hit_profile', hit_profile),
+                                                                     (entity_key, 'pizza', values)])
+            time.sleep(think_time)
+
+        recorder.time('mood_playlist', getMoodPlaylist, recs_df, MOODS[rng.integers(len(MOODS))], mood_rankings)
+        time.sleep(think_time)
+
+
+def runLevel(resources: AppResources, sessions: int, iterations: int, think_time: float,
+             sample_interval: float) -> tuple[pd.DataFrame, pd.DataFrame, float]:
+    recorder = Recorder()
+    playlists = samplePlaylists(resources.songs_data, sessions * iterations, seed=sessions)
+    threads = [threading.Thread(target=runSession,
+                                args=(resources, recorder, playlists[idx::sessions], idx, think_time))
+               for idx in range(sessions)]
+
+    rss_samples = []
+    done = threading.Event()
+    start = time.perf_counter()
+
+    def sampler():
+        while not done.wait(sample_interval):
+            rss_samples.append((time.perf_counter() - start, currentRSS(), recorder.operations))
+
+    sampler_thread = threading.Thread(target=sampler, daemon=True)
+    sampler_thread.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_time = time.perf_counter() - start
+    done.set()
+    sampler_thread.join()
+    rss_samples.append((wall_time, currentRSS(), recorder.operations))
+
+    rows = []
+    for operation, latencies in recorder.latencies.items():
+        latencies_ms = np.array(latencies) * 1000
+        rows.append({'operation': operation, 'count': len(latencies_ms),
+                     'p50_ms': np.percentile(latencies_ms, 50), 'p95_ms': np.percentile(latencies_ms, 95),
+                     'p99_ms': np.percentile(latencies_ms, 99), 'max_ms': latencies_ms.max(),
+                     'ops_per_s': len(latencies_ms) / wall_time})
+    return pd.DataFrame(rows), pd.DataFrame(rss_samples, columns=['t_s', 'rss_mb', 'operations']), wall_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', default='1,8,32', help='comma separated concurrency levels')
+    parser.add_argument('--iterations', type=int, default=10, help='playlists per session')
+    parser.add_argument('--think-ms', type=float, default=0.0, help='pause between the steps of a session')
+    parser.add_argument('--sample-interval', type=float, default=0.5, help='seconds between RSS samples')
+    parser.add_argument('--charts', action='store_true', help='also render the charts through the chart cache')
+    args = parser.parse_args()
+
+    rss_start = currentRSS()
+    resources = AppResources(args.charts)
+    print(f'RSS: {rss_start:.1f} MB at start, {currentRSS():.1f} MB with the shared resources loaded')
+
+    summary = []
+    for sessions in [int(level) for level in args.sessions.split(',')]:
+        operations_df, rss_df, wall_time = runLevel(resources, sessions, args.iterations, args.think_ms / 1000,
+                                                    args.sample_interval)
+        print(f'\n--- {sessions} concurrent sessions, {sessions * args.iterations} playlists, '
+              f'{wall_time:.2f} s ---')
+        print(operations_df.round(2).to_string(index=False))
+        print(rss_df.round(2).to_string(index=False))
+        recommend = operations_df.set_index('operation').loc['recommend']
+        summary.append({'sessions': sessions, 'playlists_per_s': sessions * args.iterations / wall_time,
+                        'recommend_p50_ms': recommend['p50_ms'], 'recommend_p99_ms': recommend['p99_ms'],
+                        'peak_rss_mb': rss_df['rss_mb'].max()})
+
+    print('\n--- summary ---')
+    print(pd.DataFrame(summary).round(2).to_string(index=False))
+
+    if resources.chart_cache is not None:
+        resources.chart_cache.close()
+
+
+if __name__ == '__main__':
+    main()
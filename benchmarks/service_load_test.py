@@ -0,0 +1,115 @@
+"""
+Load-test client for the recommendation HTTP service.
+
+Sends random playlists of 5-10 catalog songs (picked proportionally to their popularity) from concurrent clients
+and reports latency percentiles, throughput, rejected requests and how well the service coalesced them. Without
+--url an in-process service is started on a free port.
+
+    python -m benchmarks.service_load_test --clients 32 --requests 2000
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+from src.pipeline.recommendation_service import RecommendationService, RecommendationServiceConfig
+from src.pipeline.recommender_engine import RecommenderEngineConfig
+
+
+def samplePlaylists(songs_df: pd.DataFrame, n: int, seed: int = 0) -> list[list[str]]:
+    rng = np.random.default_rng(seed)
+    weights = songs_df['Popularity'].to_numpy(dtype=np.float64) + 1
+    weights /= weights.sum()
+    songs = songs_df['Song-Artist'].to_numpy()
+    return [list(rng.choice(songs, size=rng.integers(5, 11), replace=False, p=weights)) for _ in range(n)]
+
+
+def post(url: str, body: dict, timeout: float = 30.0) -> int:
+    request = urllib.request.Request(url, data=json.dumps(body).encode(), method='POST',
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except (urllib.error.URLError, ConnectionError):
+        return 0
+
+
+def runLoad(url: str, playlists: list, clients: int, k: int) -> dict:
+    latencies = []
+    statuses = []
+    lock = threading.Lock()
+    cursor = iter(range(len(playlists)))
+
+    def client():
+        while True:
+            with lock:
+                idx = next(cursor, None)
+            if idx is None:
+                return
+            start = time.perf_counter()
+            status = post(f'{url}/recommend', {'songs': playlists[idx], 'k': k})
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses.append(status)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_time = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    statuses = np.array(statuses)
+    return {'requests': len(statuses), 'ok': int((statuses == 200).sum()), 'rejected': int((statuses == 503).sum()),
+            'failed': int((statuses == 0).sum()),
+            'throughput_rps': len(statuses) / wall_time, 'p50_ms': np.percentile(latencies_ms, 50),
+            'p95_ms': np.percentile(latencies_ms, 95), 'p99_ms': np.percentile(latencies_ms, 99),
+            'max_ms': latencies_ms.max(), 'wall_time_s': wall_time}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=None, help='URL of a running service, e.g. http://127.0.0.1:8080')
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--k', type=int, default=20)
+    parser.add_argument('--batch-window-ms', type=float, default=RecommendationServiceConfig.batch_window_ms)
+    parser.add_argument('--max-queue-size', type=int, default=RecommendationServiceConfig.max_queue_size)
+    args = parser.parse_args()
+
+    songs_df = pd.read_csv(RecommenderEngineConfig.prep_songs_data_path)
+    playlists = samplePlaylists(songs_df, args.requests)
+
+    service = None
+    url = args.url
+    if url is None:
+        config = RecommendationServiceConfig(port=0, batch_window_ms=args.batch_window_ms,
+                                             max_queue_size=args.max_queue_size)
+        service = RecommendationService(config).start()
+        url = service.url
+
+    results = runLoad(url, playlists, args.clients, args.k)
+
+    if service is not None:
+        health = service.health()
+        results['batches'] = health['batches']
+        results['mean_batch_size'] = health['requests'] / max(health['batches'], 1)
+        service.stop()
+
+    for name, value in results.items():
+        print(f'{name:>16}: {value:.2f}' if isinstance(value, float) else f'{name:>16}: {value}')
+
+
+if __name__ == '__main__':
+    main()
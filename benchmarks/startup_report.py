@@ -0,0 +1,85 @@
+"""
+Startup-time report of the Streamlit app.
+
+Replays the imports and artifact loads app.py does before its first paint in fresh interpreters, once in the
+default (eager) mode and once in fast-start mode, and breaks the time down per step. The modules the app defers
+(plotting & training-only dependencies) and the font loading are timed afterwards, as they're paid on first use.
+
+    python -m benchmarks.startup_report
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+import pandas as pd
+
+STARTUP_SCRIPT = '''
+import json, sys, time
+steps = []
+fast_start = sys.argv[1] == 'fast'
+
+def step(name, kind, action):
+    start = time.perf_counter()
+    action()
+    steps.append((name, kind, time.perf_counter() - start))
+
+step('import numpy & pandas', 'import', lambda: __import__('pandas'))
+step('import streamlit', 'import', lambda: __import__('streamlit'))
+step('import src.plotUtils', 'import', lambda: __import__('src.plotUtils'))
+step('import src.components.chart_cache', 'import', lambda: __import__('src.components.chart_cache'))
+step('import src.pipeline.recommender_engine', 'import', lambda: __import__('src.pipeline.recommender_engine'))
+
+from src.pipeline.recommender_engine import RecommenderEngine, RecommenderEngineConfig
+from src.plotUtils import loadPercentileProfiles
+
+engine = []
+step('RecommenderEngine()', 'artifact', lambda: engine.append(RecommenderEngine(RecommenderEngineConfig(lazy_load=fast_start))))
+step('Artists_&_Genres_Percentile_Profiles.npz', 'artifact', loadPercentileProfiles)
+step('Artists_&_Genres_Hit_Profile.json', 'artifact',
+     lambda: json.load(open('artifacts/Artists_&_Genres_Hit_Profile.json')))
+first_paint = sum(seconds for _, _, seconds in steps)
+
+step('import matplotlib.pyplot', 'deferred', lambda: __import__('matplotlib.pyplot'))
+# scipy & sklearn first, mplsoccer imports scipy.stats itself
+step('import scipy.stats', 'deferred', lambda: __import__('scipy.stats'))
+step('import sklearn', 'deferred', lambda: __import__('sklearn.feature_extraction.text'))
+step('import mplsoccer', 'deferred', lambda: __import__('mplsoccer'))
+from src.plotUtils import getFont
+step('fonts', 'deferred', lambda: getFont('GothamMedium'))
+if fast_start:
+    step('features (lazy)', 'deferred', engine[0].loadFeatures)
+
+print(json.dumps({'steps': steps, 'first_paint': first_paint}))
+'''
+
+
+def runStartup(mode: str) -> dict:
+    output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, mode], capture_output=True, text=True,
+                            check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='runs per mode, the fastest one is reported')
+    args = parser.parse_args()
+
+    reports = {}
+    for mode in ('eager', 'fast'):
+        runs = [runStartup(mode) for _ in range(args.repeat)]
+        best = min(runs, key=lambda run: run['first_paint'])
+        reports[mode] = best
+        steps_df = pd.DataFrame(best['steps'], columns=['step', 'kind', 'seconds'])
+        steps_df['ms'] = (steps_df.pop('seconds') * 1000).round(1)
+
+        print(f'\n--- {mode} start ---')
+        print(steps_df.to_string(index=False))
+        print(f"time to first paint: {best['first_paint'] * 1000:.1f} ms")
+
+    print(f"\nfast start saves {(reports['eager']['first_paint'] - reports['fast']['first_paint']) * 1000:.1f} ms "
+          f"before the first paint")
+
+
+if __name__ == '__main__':
+    main()
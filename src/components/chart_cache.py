@@ -0,0 +1,138 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+# Bump whenever the look of the charts in src/plotUtils.py changes, so stale renders are never served
+STYLE_VERSION = 1
+
+
+def renderChart(chart_type: str, payload, style: str = 'dark') -> bytes:
+    """
+    Renders a chart of src/plotUtils.py to PNG bytes. Module level, so that it can run in a worker process.
+
+    Args:
+        chart_type (str): 'pizza' (payload: percentile values) or 'hit_profile' (payload: year -> hit quality dict).
+        payload: Data plotted by the chart.
+        style (str, optional): Chart style ('light' or 'dark'). Defaults to 'dark'.
+
+    Returns:
+        bytes: The rendered chart as PNG.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from src.plotUtils import plotPizza, plotHitProfile
+
+    if chart_type == 'pizza':
+        fig = plotPizza(list(payload), style)
+    elif chart_type == 'hit_profile':
+        fig = plotHitProfile(payload, style)
+    else:
+        raise ValueError(f'Unknown chart type: {chart_type}')
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=200, bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+class ChartRenderCache:
+    """
+    Size bounded LRU cache of rendered charts as PNG bytes, keyed by (entity, chart type, style version). Misses are
+    looked up in the pre-rendered charts directory first and rendered in parallel in a process pool otherwise.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 ** 2, charts_dir: str = None, max_workers: int = None):
+        self.max_bytes = max_bytes
+        self.charts_dir = charts_dir
+        self.max_workers = max_workers if max_workers is not None else min(4, os.cpu_count() or 1)
+        self._charts = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._pool = None
+
+    @staticmethod
+    def key(entity: str, chart_type: str, style: str = 'dark') -> tuple:
+        return entity, chart_type, f'{style}-v{STYLE_VERSION}'
+
+    def fileName(self, key: tuple) -> str:
+        return os.path.join(self.charts_dir, hashlib.sha1('|'.join(key).encode()).hexdigest() + '.png')
+
+    def get(self, key: tuple):
+        with self._lock:
+            png = self._charts.get(key)
+            if png is not None:
+                self._charts.move_to_end(key)
+                return png
+
+        if self.charts_dir is not None and os.path.exists(self.fileName(key)):
+            with open(self.fileName(key), 'rb') as file:
+                png = file.read()
+            self.put(key, png)
+        return png
+
+    def put(self, key: tuple, png: bytes):
+        if len(png) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._charts:
+                self._size -= len(self._charts.pop(key))
+            self._charts[key] = png
+            self._size += len(png)
+            while self._size > self.max_bytes:
+                _, evicted = self._charts.popitem(last=False)
+                self._size -= len(evicted)
+
+    def render(self, charts: list[tuple], style: str = 'dark', persist: bool = False) -> list[bytes]:
+        """
+        Returns the PNG of every requested chart, rendering the cache misses in parallel.
+
+        Args:
+            charts (list[tuple]): (entity, chart type, payload) of every chart, e.g. ('song:<Song-Artist>', 'pizza',
+                                  percentiles). The payload is only used on a cache miss, and may be given as a
+                                  callable returning it so that it's only computed then.
+            style (str, optional): Chart style ('light' or 'dark'). Defaults to 'dark'.
+            persist (bool, optional): Also write rendered misses to the charts directory. Defaults to False.
+
+        Returns:
+            list[bytes]: PNG bytes of the charts, in the requested order.
+        """
+        keys = [self.key(entity, chart_type, style) for entity, chart_type, _ in charts]
+        pngs = [self.get(key) for key in keys]
+        misses = [idx for idx, png in enumerate(pngs) if png is None]
+        payloads = [charts[idx][2]() if callable(charts[idx][2]) else charts[idx][2] for idx in misses]
+
+        if len(misses) == 1 or (misses and self.max_workers <= 1):
+            rendered = [renderChart(charts[idx][1], payload, style) for idx, payload in zip(misses, payloads)]
+        elif misses:
+            rendered = list(self.executor().map(renderChart, [charts[idx][1] for idx in misses], payloads,
+                                                [style] * len(misses)))
+        else:
+            rendered = []
+
+        for idx, png in zip(misses, rendered):
+            pngs[idx] = png
+            self.put(keys[idx], png)
+            if persist and self.charts_dir is not None:
+                os.makedirs(self.charts_dir, exist_ok=True)
+                with open(self.fileName(keys[idx]), 'wb') as file:
+                    file.write(png)
+        return pngs
+
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    @property
+    def size(self) -> int:
+        return self._size
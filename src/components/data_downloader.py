@@ -1,18 +1,54 @@
+import os
 import re
+import time
+from ast import literal_eval
+
 import requests
 import pandas as pd
 import numpy as np
 from bs4 import BeautifulSoup
 from spotipy import Spotify
 
+from src.components.song_matching import bestCandidate, primaryArtist
+
+
+WIKIPEDIA_URL = 'https://en.wikipedia.org/wiki'
 
-def Billboards_Hot100_Chart(start_year: int, end_year: int) -> pd.DataFrame:
+
+def fetchPage(url: str, retries: int = 3, backoff: float = 0.5) -> str:
+    """
+    Fetches a web page, retrying on connection errors and 429/5xx responses with exponential backoff.
+
+    Args:
+        url (str): URL of the page.
+        retries (int, optional): Number of retries before giving up. Defaults to 3.
+        backoff (float, optional): Initial backoff in seconds. Defaults to 0.5.
+
+    Returns:
+        str: Text of the page.
+    """
+    for attempt in range(retries + 1):
+        try:
+            req = requests.get(url)
+            if req.status_code != 429 and req.status_code < 500:
+                req.raise_for_status()
+                return req.text
+            if attempt == retries:
+                req.raise_for_status()
+        except requests.ConnectionError:
+            if attempt == retries:
+                raise
+        time.sleep(backoff * 2 ** attempt)
+
+
+def Billboards_Hot100_Chart(start_year: int, end_year: int, base_url: str = WIKIPEDIA_URL) -> pd.DataFrame:
     """
     Fetches Billboard Hot 100 chart data from Wikipedia for a given range of years.
 
     Args:
         start_year (int): Starting year of the Billboard charts.
         end_year (int): Ending year of the Billboard charts.
+        base_url (str, optional): Base URL of the wiki serving the year-end chart pages. Defaults to Wikipedia.
 
     Returns:
         pd.DataFrame: DataFrame containing the Billboard Hot 100 chart data for the specified years.
@@ -21,9 +57,8 @@ def Billboards_Hot100_Chart(start_year: int, end_year: int) -> pd.DataFrame:
     dfs = []
 
     for year in range(start_year, end_year + 1):
-        mainURL = f'https://en.wikipedia.org/wiki/Billboard_Year-End_Hot_100_singles_of_{year}'
-        req = requests.get(mainURL)
-        soup = BeautifulSoup(req.text, 'html.parser')
+        mainURL = f'{base_url}/Billboard_Year-End_Hot_100_singles_of_{year}'
+        soup = BeautifulSoup(fetchPage(mainURL), 'html.parser')
 
         rank = []
         song = []
@@ -54,18 +89,28 @@ def Billboards_Hot100_Chart(start_year: int, end_year: int) -> pd.DataFrame:
 
 
 # noinspection PyBroadException
-def addURIColumn(df: pd.DataFrame, sp: Spotify) -> pd.DataFrame:
+def addURIColumn(df: pd.DataFrame, sp: Spotify, mode: str = 'cascade', search_limit: int = 10,
+                 min_confidence: float = 0.6, review_path: str = None) -> pd.DataFrame:
     """
     Adds a URI column to the given DataFrame by searching for song URIs using the Spotify API.
 
     Args:
         df (pd.DataFrame): The DataFrame containing song information.
         sp (spotipy.Spotify): An instance of the Spotipy client for making Spotify API calls.
+        mode (str, optional): 'cascade' tries up to five reordered queries and takes the first hit, 'scored' issues
+                              a single broader search and picks the best scoring candidate. Defaults to 'cascade'.
+        search_limit (int, optional): Number of candidates fetched per song in 'scored' mode. Defaults to 10.
+        min_confidence (float, optional): Matches scoring below it are left 'Unavailable' and written to
+                                          `review_path` in 'scored' mode, until approved there. Defaults to 0.6.
+        review_path (str, optional): CSV file collecting low confidence matches for manual review.
 
     Returns:
-        pd.DataFrame: The DataFrame with an additional URI column.
+        pd.DataFrame: The DataFrame with an additional URI column ('scored' mode also adds 'URI Confidence').
 
     """
+    if mode == 'scored':
+        return addScoredURIColumn(df, sp, search_limit, min_confidence, review_path)
+
     songURIList = []
 
     for _, row in df.iterrows():
@@ -104,19 +149,98 @@ def addURIColumn(df: pd.DataFrame, sp: Spotify) -> pd.DataFrame:
 
 
 # noinspection PyBroadException
-def Spotify_Features(df: pd.DataFrame, sp: Spotify) -> pd.DataFrame:
+def addScoredURIColumn(df: pd.DataFrame, sp: Spotify, search_limit: int = 10, min_confidence: float = 0.6,
+                       review_path: str = None) -> pd.DataFrame:
+    """
+    Adds URI & URI Confidence columns to the given DataFrame, issuing a single search per song and scoring the
+    returned candidates locally on title/artist similarity and year proximity.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing song information.
+        sp (spotipy.Spotify): An instance of the Spotipy client for making Spotify API calls.
+        search_limit (int, optional): Number of candidates fetched per song. Defaults to 10.
+        min_confidence (float, optional): Matches scoring below it are left 'Unavailable' (not ingested) and written
+                                          to `review_path`, until approved there. Defaults to 0.6.
+        review_path (str, optional): CSV file collecting low confidence matches for manual review, one row per
+                                     chart entry (Year, Rank, Song). Earlier rows are kept; setting their 'Approved'
+                                     column to True accepts their URI on the next run.
+
+    Returns:
+        pd.DataFrame: The DataFrame with additional URI and URI Confidence columns.
+    """
+    songURIList = []
+    confidenceList = []
+    reviewRows = []
+
+    review_df = pd.read_csv(review_path) if review_path is not None and os.path.exists(review_path) else None
+    approved = {}
+    if review_df is not None and 'Approved' in review_df.columns:
+        is_approved = review_df['Approved'].astype(str).str.lower().isin(['true', '1', 'yes'])
+        approved = {(year, rank, song): uri for year, rank, song, uri in
+                    review_df.loc[is_approved, ['Year', 'Rank', 'Song', 'URI']].itertuples(index=False)}
+
+    for _, row in df.iterrows():
+        track = row['Song']
+        year = row['Year']
+        artist = row['Artist']
+
+        try:
+            searchResults = sp.search(q=f"{track} {primaryArtist(artist)}", type='track', limit=search_limit)
+            candidates = searchResults['tracks']['items']
+        except:
+            candidates = []
+
+        candidate, confidence = bestCandidate(track, artist, year, candidates)
+        songURI = candidate['uri'] if candidate is not None else 'Unavailable'
+        confidenceList.append(round(confidence, 4))
+
+        if confidence < min_confidence:
+            if (year, row['Rank'], track) in approved:
+                songURI = approved[(year, row['Rank'], track)]
+            else:
+                reviewRows.append({'Rank': row['Rank'], 'Song': track, 'Artist': artist, 'Year': year,
+                                   'URI': songURI, 'URI Confidence': round(confidence, 4),
+                                   'Matched Song': candidate['name'] if candidate is not None else None,
+                                   'Matched Artist': ', '.join(a['name'] for a in candidate['artists'])
+                                   if candidate is not None else None, 'Approved': False})
+                songURI = 'Unavailable'
+        songURIList.append(songURI)
+
+    df['URI'] = songURIList
+    df['URI Confidence'] = confidenceList
+
+    if review_path is not None and reviewRows:
+        # earlier rows first, keeping the reviewed ones when an entry is matched again
+        review_df = pd.concat([review_df, pd.DataFrame(reviewRows)], ignore_index=True)
+        review_df = review_df.drop_duplicates(subset=['Year', 'Rank', 'Song'], keep='first')
+        review_df.to_csv(review_path, index=False)
+
+    return df
+
+
+# noinspection PyBroadException
+def Spotify_Features(df: pd.DataFrame, sp: Spotify, artist_genres: dict = None,
+                     album_dates: dict = None) -> pd.DataFrame:
     """
     Fetch Data from Spotify API and give out fresh dataframe with other additional information and audio features
     of the songs.
 
     Args:
-        df (pd.DataFrame): The DataFrame containing the Billboard data ('URI', 'Year' and 'Rank' cols are must).
+        df (pd.DataFrame): The DataFrame containing the Billboard data ('URI', 'Year' and 'Rank' cols are must,
+                           'URI Confidence' is carried to the output when present).
         sp (spotipy.Spotify): An initialized Spotipy instance.
+        artist_genres (dict, optional): Artist name -> genres lookup of already ingested artists. Filled in place
+                                        with every artist fetched from the API.
+        album_dates (dict, optional): (Album, first artist) -> release date lookup of already ingested albums.
+                                      Filled in place with every album fetched from the API.
 
     Returns:
         pd.DataFrame: The new DataFrame with added Spotify features.
 
     """
+    artist_genres = {} if artist_genres is None else artist_genres
+    album_dates = {} if album_dates is None else album_dates
+
     new_df = pd.DataFrame(columns=['Song', 'Album', 'Album Release Date', 'Artist Names', 'Artist(s) Genres',
                                    'Hot100 Ranking Year', 'Hot100 Rank', 'Song Length(ms)', 'Spotify Link',
                                    'Song Image', 'Spotify URI', 'Popularity', 'Acousticness',
@@ -126,12 +250,20 @@ def Spotify_Features(df: pd.DataFrame, sp: Spotify) -> pd.DataFrame:
     # Looping over URI of all the Billboard songs
     for idx, (songURI, rankYear, BBrank) in enumerate(zip(df['URI'], df['Year'], df['Rank'])):
         song = sp.track(songURI)
-        album = sp.album(song["album"]["external_urls"]["spotify"])
-        genres = [sp.artist(artist['external_urls']['spotify'])['genres'] for artist in song['artists']]
+
+        album_key = (song['album']['name'], song['artists'][0]['name'])
+        if album_key not in album_dates:
+            album_dates[album_key] = sp.album(song["album"]["external_urls"]["spotify"])['release_date']
+
+        genres = []
+        for artist in song['artists']:
+            if artist['name'] not in artist_genres:
+                artist_genres[artist['name']] = sp.artist(artist['external_urls']['spotify'])['genres']
+            genres.append(artist_genres[artist['name']])
 
         new_df.at[idx, 'Song'] = song['name']
         new_df.at[idx, 'Album'] = song['album']['name']
-        new_df.at[idx, 'Album Release Date'] = album['release_date']
+        new_df.at[idx, 'Album Release Date'] = album_dates[album_key]
         new_df.at[idx, 'Artist Names'] = list(artist['name'] for artist in song['artists'])
         new_df.at[idx, 'Artist(s) Genres'] = list(set(np.concatenate(genres)))
         new_df.at[idx, 'Hot100 Ranking Year'] = rankYear
@@ -172,6 +304,8 @@ def Spotify_Features(df: pd.DataFrame, sp: Spotify) -> pd.DataFrame:
             new_df.at[idx, 'Mode'] = 'Unavailable'
             new_df.at[idx, 'Time Signature'] = 'Unavailable'
 
+    if 'URI Confidence' in df.columns:
+        new_df['URI Confidence'] = df['URI Confidence'].to_numpy(dtype=np.float64)
     new_df = new_df[new_df['Danceability'] != 'Unavailable']
     new_df[['Song', 'Album', 'Spotify URI',
             'Spotify Link', 'Song Image']] = new_df[['Song', 'Album', 'Spotify URI',
@@ -192,3 +326,59 @@ def Spotify_Features(df: pd.DataFrame, sp: Spotify) -> pd.DataFrame:
     new_df.reset_index(inplace=True, drop=True)
 
     return new_df
+
+
+def ingestedLookups(spotify_df: pd.DataFrame) -> tuple[dict, dict]:
+    """
+    Builds the artist-genre and album-release lookups out of already ingested Spotify data, so that they can be
+    reused by `Spotify_Features` instead of being fetched again.
+
+    Args:
+        spotify_df (pd.DataFrame): Previously ingested Spotify data, as stored in the /data directory.
+
+    Returns:
+        tuple[dict, dict]: Artist name -> genres lookup (built from single artist songs only, as the genres of
+        multi-artist songs are merged) and (Album, first artist) -> release date lookup.
+    """
+    artist_genres = {}
+    album_dates = {}
+
+    for album, release_date, artists, genres in zip(spotify_df['Album'], spotify_df['Album Release Date'],
+                                                     spotify_df['Artist Names'], spotify_df['Artist(s) Genres']):
+        artists = literal_eval(artists) if isinstance(artists, str) else artists
+        genres = literal_eval(genres) if isinstance(genres, str) else genres
+        if len(artists) == 0:
+            continue
+        album_dates.setdefault((album, artists[0]), release_date)
+        if len(artists) == 1:
+            artist_genres.setdefault(artists[0], list(genres))
+
+    return artist_genres, album_dates
+
+
+def splitIngested(df: pd.DataFrame, spotify_df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Splits songs with a resolved URI into the ones whose metadata & audio features were already ingested and the
+    ones which still have to be fetched from the Spotify API.
+
+    Args:
+        df (pd.DataFrame): The DataFrame containing the Billboard data ('URI', 'Year' and 'Rank' cols are must).
+        spotify_df (pd.DataFrame): Previously ingested Spotify data, as stored in the /data directory.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: Already ingested songs re-labelled with their new chart year & rank (in
+        the Spotify data format) and the remaining Billboard rows to be fetched.
+    """
+    ingested = spotify_df.drop_duplicates(subset=['Spotify URI']).set_index('Spotify URI')
+    is_ingested = df['URI'].isin(ingested.index)
+
+    reused_df = ingested.loc[df.loc[is_ingested, 'URI']].reset_index()
+    reused_df['Hot100 Ranking Year'] = df.loc[is_ingested, 'Year'].values
+    reused_df['Hot100 Rank'] = df.loc[is_ingested, 'Rank'].values
+    columns = list(spotify_df.columns)
+    if 'URI Confidence' in df.columns:
+        reused_df['URI Confidence'] = df.loc[is_ingested, 'URI Confidence'].values
+        columns += [] if 'URI Confidence' in columns else ['URI Confidence']
+    reused_df = reused_df[columns]
+
+    return reused_df, df[~is_ingested].reset_index(drop=True)
@@ -0,0 +1,43 @@
+import numpy as np
+
+# Blocks of the preprocessed features, identified by the prefix of their column names ('Genre | pop', ...). The
+# audio block holds the scaled numerical features, whose columns have no prefix.
+FEATURE_BLOCKS = {
+    'genre': ('Genre',),
+    'sentiment': ('Subjectivity', 'Polarity'),
+    'key': ('Key',),
+    'mode': ('Mode',),
+    'time_sig': ('Time Signature',),
+    'audio': (),
+}
+
+# Weights the preprocessing pipeline multiplies every block with
+FEATURE_BLOCK_WEIGHTS = {'genre': 1.0, 'sentiment': 0.5, 'key': 0.5, 'mode': 0.5, 'time_sig': 0.5, 'audio': 1.0}
+
+
+def featureBlockIds(columns: list) -> np.ndarray:
+    """
+    Position in FEATURE_BLOCKS of the block of every feature column.
+
+    Args:
+        columns (list): Column names of the preprocessed features.
+
+    Returns:
+        np.ndarray: Block index of every column.
+    """
+    prefix_blocks = {prefix: idx for idx, prefixes in enumerate(FEATURE_BLOCKS.values()) for prefix in prefixes}
+    audio_block = list(FEATURE_BLOCKS).index('audio')
+    return np.array([prefix_blocks.get(column.split(' | ')[0], audio_block) if ' | ' in column else audio_block
+                     for column in columns], dtype=np.int64)
+
+
+def blockWeights(weights: dict = None) -> np.ndarray:
+    """
+    Weight of every block in the order of FEATURE_BLOCKS, the pipeline's weight for the blocks missing in `weights`.
+    """
+    weights = {} if weights is None else weights
+    unknown = set(weights) - set(FEATURE_BLOCKS)
+    if unknown:
+        raise ValueError(f'Unknown feature blocks {sorted(unknown)}, expected some of {list(FEATURE_BLOCKS)}.')
+    return np.array([weights.get(block, FEATURE_BLOCK_WEIGHTS[block]) for block in FEATURE_BLOCKS],
+                    dtype=np.float64)
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+CUBE_FEATURES = ['Popularity', 'Acousticness', 'Danceability', 'Energy', 'Instrumentalness', 'Liveness', 'Loudness',
+                 'Speechiness', 'Tempo', 'Valence']
+
+
+def Feature_Cube(df: pd.DataFrame, features: list = None) -> dict[str, np.ndarray]:
+    """
+    Aggregates the audio features of the songs by ranking year & genre into count, sum and sum of squares cubes, a
+    song counting once in every genre of its artists, along with the same aggregates of all the songs of every year.
+
+    Args:
+        df (pd.DataFrame): Songs data, genres formatted as lists.
+        features (list, optional): Audio features aggregated. Defaults to CUBE_FEATURES.
+
+    Returns:
+        dict[str, np.ndarray]: 'years', 'genres' & 'features' labels, (years x genres) 'count', (years x genres x
+        features) 'sum' & 'sumsq', and (years) 'year_count', (years x features) 'year_sum' & 'year_sumsq'.
+    """
+    features = CUBE_FEATURES if features is None else features
+    years, year_idx = np.unique(df['Hot100 Ranking Year'].to_numpy(dtype=np.int64), return_inverse=True)
+    genres = np.array(sorted({genre for song_genres in df['Artist(s) Genres'] for genre in song_genres}))
+    genre_pos = {genre: pos for pos, genre in enumerate(genres)}
+    values = df[features].to_numpy(dtype=np.float64)
+
+    # one (song, genre) pair per genre of every song, binned by year x genre
+    rows = np.repeat(np.arange(len(df)), [len(song_genres) for song_genres in df['Artist(s) Genres']])
+    cells = year_idx[rows] * len(genres) + np.array([genre_pos[genre] for song_genres in df['Artist(s) Genres']
+                                                      for genre in song_genres], dtype=np.int64)
+    n_cells = len(years) * len(genres)
+    cube = {'count': np.bincount(cells, minlength=n_cells).reshape(len(years), len(genres))}
+    for name, weights in (('sum', values), ('sumsq', np.square(values))):
+        cube[name] = np.stack([np.bincount(cells, weights=weights[rows, feature], minlength=n_cells)
+                               for feature in range(len(features))], axis=-1).reshape(len(years), len(genres), -1)
+    cube['year_count'] = np.bincount(year_idx, minlength=len(years))
+    cube['year_sum'] = np.stack([np.bincount(year_idx, weights=values[:, feature], minlength=len(years))
+                                 for feature in range(len(features))], axis=-1)
+    cube['year_sumsq'] = np.stack([np.bincount(year_idx, weights=np.square(values[:, feature]),
+                                               minlength=len(years)) for feature in range(len(features))], axis=-1)
+    return {'years': years, 'genres': genres, 'features': np.array(features), **cube}
+
+
+class FeatureCube:
+    """
+    Year x genre x audio feature aggregates (count, sum & sum of squares), from which the mean & standard deviation of
+    a feature over any slice of years & genres are derived without the songs data.
+    """
+
+    def __init__(self, arrays: dict):
+        self.years = np.asarray(arrays['years'])
+        self.genres = np.asarray(arrays['genres']).astype(str)
+        self.features = np.asarray(arrays['features']).astype(str).tolist()
+        self.count, self.sum, self.sumsq = arrays['count'], arrays['sum'], arrays['sumsq']
+        self.year_count, self.year_sum, self.year_sumsq = arrays['year_count'], arrays['year_sum'], arrays['year_sumsq']
+        self._genre_pos = {genre: pos for pos, genre in enumerate(self.genres)}
+
+    @classmethod
+    def load(cls, path: str) -> 'FeatureCube':
+        with np.load(path) as arrays:
+            return cls({name: arrays[name] for name in arrays.files})
+
+    def _rows(self, start_year: int = None, end_year: int = None) -> slice:
+        start = 0 if start_year is None else int(np.searchsorted(self.years, start_year, side='left'))
+        end = len(self.years) if end_year is None else int(np.searchsorted(self.years, end_year, side='right'))
+        return slice(start, end)
+
+    def _feature(self, feature: str) -> int:
+        if feature not in self.features:
+            raise ValueError(f"Unknown feature '{feature}', expected one of {self.features}.")
+        return self.features.index(feature)
+
+    @staticmethod
+    def _stats(count: np.ndarray, total: np.ndarray, total_sq: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = total / count
+            std = np.sqrt(np.maximum(total_sq / count - np.square(mean), 0.0))
+        return mean, std
+
+    def yearly(self, feature: str, genre: str = None, start_year: int = None, end_year: int = None) -> pd.DataFrame:
+        """
+        Yearly count, mean & standard deviation of a feature over the songs of a genre (or all the songs).
+
+        Args:
+            feature (str): Audio feature, one of `features`.
+            genre (str, optional): Genre. Defaults to all the songs.
+            start_year (int, optional): First year. Defaults to the first year of the cube.
+            end_year (int, optional): Last year (inclusive). Defaults to the last year of the cube.
+
+        Returns:
+            pd.DataFrame: 'Year', 'Count', 'Mean' and 'Std' of every year of the range, NaN for years without songs.
+        """
+        rows, feature_idx = self._rows(start_year, end_year), self._feature(feature)
+        if genre is None:
+            count = self.year_count[rows]
+            total, total_sq = self.year_sum[rows, feature_idx], self.year_sumsq[rows, feature_idx]
+        elif genre in self._genre_pos:
+            column = self._genre_pos[genre]
+            count = self.count[rows, column]
+            total, total_sq = self.sum[rows, column, feature_idx], self.sumsq[rows, column, feature_idx]
+        else:
+            raise ValueError(f"Unknown genre '{genre}'.")
+        mean, std = self._stats(count, total, total_sq)
+        return pd.DataFrame({'Year': self.years[rows], 'Count': count, 'Mean': mean, 'Std': std})
+
+    def byGenre(self, feature: str, start_year: int = None, end_year: int = None, min_count: int = 1) -> pd.DataFrame:
+        """
+        Count, mean & standard deviation of a feature for every genre over a year range, highest mean first.
+
+        Args:
+            feature (str): Audio feature, one of `features`.
+            start_year (int, optional): First year. Defaults to the first year of the cube.
+            end_year (int, optional): Last year (inclusive). Defaults to the last year of the cube.
+            min_count (int, optional): Min. songs of a genre in the range. Defaults to 1.
+
+        Returns:
+            pd.DataFrame: 'Genre', 'Count', 'Mean' and 'Std' of the genres having at least min_count songs.
+        """
+        rows, feature_idx = self._rows(start_year, end_year), self._feature(feature)
+        count = self.count[rows].sum(axis=0)
+        mean, std = self._stats(count, self.sum[rows, :, feature_idx].sum(axis=0),
+                                self.sumsq[rows, :, feature_idx].sum(axis=0))
+        keep = count >= max(min_count, 1)
+        stats = pd.DataFrame({'Genre': self.genres[keep], 'Count': count[keep], 'Mean': mean[keep], 'Std': std[keep]})
+        return stats.sort_values('Mean', ascending=False, kind='stable').reset_index(drop=True)
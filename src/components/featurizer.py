@@ -0,0 +1,161 @@
+from ast import literal_eval
+
+import numpy as np
+import pandas as pd
+
+from src.components.feature_blocks import FEATURE_BLOCKS, blockWeights
+from src.components.sentiment import Sentiment_Features
+
+# Categorical columns one-hot encoded by data_preprocessing: (column, feature name prefix, block)
+CATEGORICAL_FEATURES = [('subjectivity', 'Subjectivity', 'sentiment'), ('polarity', 'Polarity', 'sentiment'),
+                        ('Key', 'Key', 'key'), ('Mode', 'Mode', 'mode'),
+                        ('Time Signature', 'Time Signature', 'time_sig')]
+SCALED_FEATURES = ['Popularity', 'Acousticness', 'Danceability', 'Energy', 'Instrumentalness', 'Liveness',
+                   'Loudness', 'Speechiness', 'Tempo', 'Valence']
+# Spotify API track & audio features fields -> songs data columns
+SPOTIFY_TRACK_FIELDS = {'name': 'Song', 'genres': 'Artist(s) Genres', 'popularity': 'Popularity',
+                        'acousticness': 'Acousticness', 'danceability': 'Danceability', 'energy': 'Energy',
+                        'instrumentalness': 'Instrumentalness', 'liveness': 'Liveness', 'loudness': 'Loudness',
+                        'speechiness': 'Speechiness', 'tempo': 'Tempo', 'valence': 'Valence', 'key': 'Key',
+                        'mode': 'Mode', 'time_signature': 'Time Signature'}
+
+
+def tracksFrame(tracks) -> pd.DataFrame:
+    """
+    Raw tracks to featurize as a DataFrame with the columns of the songs data. Tracks may be given as a DataFrame
+    with these columns or as records using either these columns or the fields of the Spotify API (a track merged with
+    its audio features, genres given as 'genres' or as the 'genres' of its 'artists').
+
+    Args:
+        tracks (pd.DataFrame | list[dict] | dict): One or several raw tracks.
+
+    Returns:
+        pd.DataFrame: 'Song', 'Artist(s) Genres' (lists) and the audio feature columns of every track.
+    """
+    if isinstance(tracks, dict):
+        tracks = [tracks]
+    if not isinstance(tracks, pd.DataFrame):
+        records = []
+        for track in tracks:
+            record = {SPOTIFY_TRACK_FIELDS.get(field, field): value for field, value in track.items()}
+            if 'Artist(s) Genres' not in record and isinstance(track.get('artists'), list):
+                record['Artist(s) Genres'] = sorted({genre for artist in track['artists']
+                                                     for genre in artist.get('genres', [])})
+            records.append(record)
+        tracks = pd.DataFrame.from_records(records)
+    missing = [column for column in ['Song', 'Artist(s) Genres', 'Key', 'Mode', 'Time Signature'] + SCALED_FEATURES
+               if column not in tracks.columns]
+    if missing:
+        raise ValueError(f'The tracks are missing the fields {missing}.')
+    tracks = tracks.reset_index(drop=True)
+    tracks['Artist(s) Genres'] = [literal_eval(genres) if isinstance(genres, str) else list(genres)
+                                  for genres in tracks['Artist(s) Genres']]
+    return tracks
+
+
+class SongFeaturizer:
+    """
+    Transformers fitted by data_preprocessing (TF-IDF of the genres, one-hot categories, min-max scaling and block
+    weights), applied to new tracks to get their feature vectors in the layout of the features artifact without
+    rerunning the pipeline.
+    """
+
+    def __init__(self, genre_terms: np.ndarray, genre_idf: np.ndarray, categories: dict, scale: np.ndarray,
+                 offset: np.ndarray, block_weights: np.ndarray):
+        self.genre_terms = np.asarray(genre_terms, dtype=object)
+        self.genre_idf = np.asarray(genre_idf, dtype=np.float64)
+        self.categories = {column: np.asarray(values) for column, values in categories.items()}
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.offset = np.asarray(offset, dtype=np.float64)
+        self.block_weights = dict(zip(FEATURE_BLOCKS, np.asarray(block_weights, dtype=np.float64)))
+        self._term_positions = {term: pos for pos, term in enumerate(self.genre_terms)}
+
+    @classmethod
+    def fit(cls, prep_df: pd.DataFrame, block_weights: dict = None) -> 'SongFeaturizer':
+        """
+        Fits the transformers on the preprocessed songs data as data_preprocessing does.
+
+        Args:
+            prep_df (pd.DataFrame): Preprocessed songs data, genres formatted as lists.
+            block_weights (dict, optional): Weights of the feature blocks. Defaults to the pipeline's.
+
+        Returns:
+            SongFeaturizer: The fitted featurizer.
+        """
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.preprocessing import MinMaxScaler
+
+        tfidf = TfidfVectorizer(tokenizer=lambda text: text.split(', '))
+        tfidf.fit(prep_df['Artist(s) Genres'].apply(lambda x: ", ".join(x)))
+        subject_df, polar_df = Sentiment_Features(prep_df, 'Song')
+        columns = pd.concat([subject_df, polar_df, prep_df[['Key', 'Mode', 'Time Signature']]], axis=1)
+        categories = {column: np.sort(columns[column].unique()) for column, _, _ in CATEGORICAL_FEATURES}
+        scaler = MinMaxScaler().fit(prep_df[SCALED_FEATURES])
+        return cls(tfidf.get_feature_names_out(), tfidf.idf_, categories, scaler.scale_, scaler.min_,
+                   blockWeights(block_weights))
+
+    @property
+    def columns(self) -> list:
+        genre_columns = ['Genre | ' + term for term in self.genre_terms if term != '']
+        categorical_columns = [f'{prefix} | {value}' for column, prefix, _ in CATEGORICAL_FEATURES
+                               for value in self.categories[column]]
+        return genre_columns + categorical_columns + SCALED_FEATURES
+
+    def genreFeatures(self, genres: pd.Series) -> np.ndarray:
+        """
+        L2-normalized TF-IDF of the genres of the tracks over the fitted vocabulary, unknown genres being ignored.
+        """
+        rows, positions = [], []
+        for row, track_genres in enumerate(genres):
+            for term in ", ".join(track_genres).lower().split(', '):
+                if term in self._term_positions:
+                    rows.append(row)
+                    positions.append(self._term_positions[term])
+        tfidf = np.zeros((len(genres), len(self.genre_terms)))
+        np.add.at(tfidf, (rows, positions), 1.0)
+        tfidf *= self.genre_idf
+        norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+        np.divide(tfidf, norms, out=tfidf, where=norms > 0)
+        return tfidf[:, self.genre_terms != '']
+
+    def transform(self, tracks) -> pd.DataFrame:
+        """
+        Feature vectors of new tracks, as data_preprocessing computes them for the catalog songs. Categories unseen
+        by the pipeline are left all zeros.
+
+        Args:
+            tracks (pd.DataFrame | list[dict] | dict): Raw tracks, see tracksFrame.
+
+        Returns:
+            pd.DataFrame: (tracks x features) feature vectors, with the columns of the features artifact.
+        """
+        tracks = tracksFrame(tracks)
+        subject_df, polar_df = Sentiment_Features(tracks, 'Song')
+        values = pd.concat([subject_df, polar_df, tracks[['Key', 'Mode', 'Time Signature']]], axis=1)
+        blocks = [self.genreFeatures(tracks['Artist(s) Genres']) * self.block_weights['genre']]
+        for column, _, block in CATEGORICAL_FEATURES:
+            codes = pd.Index(self.categories[column]).get_indexer(values[column])
+            one_hot = np.zeros((len(tracks), len(self.categories[column])))
+            one_hot[np.flatnonzero(codes >= 0), codes[codes >= 0]] = 1.0
+            blocks.append(one_hot * self.block_weights[block])
+        numeric = tracks[SCALED_FEATURES].to_numpy(dtype=np.float64)
+        blocks.append((numeric * self.scale + self.offset) * self.block_weights['audio'])
+        return pd.DataFrame(np.hstack(blocks), columns=self.columns)
+
+    def arrays(self) -> dict:
+        """
+        Arrays of the featurizer keyed for np.savez.
+        """
+        arrays = {'genre_terms': self.genre_terms.astype(str), 'genre_idf': self.genre_idf, 'scale': self.scale,
+                  'offset': self.offset, 'block_weights': np.array([self.block_weights[b] for b in FEATURE_BLOCKS])}
+        for column, _, _ in CATEGORICAL_FEATURES:
+            categories = self.categories[column]
+            arrays[f'categories | {column}'] = categories.astype(str) if categories.dtype == object else categories
+        return arrays
+
+    @classmethod
+    def load(cls, path: str) -> 'SongFeaturizer':
+        with np.load(path) as arrays:
+            categories = {column: arrays[f'categories | {column}'] for column, _, _ in CATEGORICAL_FEATURES}
+            return cls(arrays['genre_terms'].tolist(), arrays['genre_idf'], categories, arrays['scale'],
+                       arrays['offset'], arrays['block_weights'])
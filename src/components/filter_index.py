@@ -0,0 +1,82 @@
+from ast import literal_eval
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class SongFilters:
+    decades: tuple = None                   # e.g. (1980, 1990), songs charting in these decades
+    genres: tuple = None                    # songs of artists of any of these genres
+    min_popularity: int = None              # songs with a Spotify popularity of at least this value
+    exclude_playlist_artists: bool = False  # drop songs of the artists of the playlist
+
+
+def parseList(value) -> list:
+    return literal_eval(value) if isinstance(value, str) and value.startswith('[') else []
+
+
+class FilterIndex:
+    """
+    Precomputed boolean indexes of the catalog songs by decade, genre, artist and popularity, combined into the mask
+    of the songs a filtered query may recommend.
+    """
+
+    def __init__(self, songs_df: pd.DataFrame):
+        self.n_songs = len(songs_df)
+        decades = (songs_df['Hot100 Ranking Year'].to_numpy() // 10) * 10
+        self.decades = {int(decade): decades == decade for decade in np.unique(decades)}
+
+        # 0-100, compared to the threshold of a query at 1 byte per song
+        self.popularity = songs_df['Popularity'].clip(0, 100).to_numpy(dtype=np.int8)
+
+        self.genres = self.postings(songs_df['Artist(s) Genres'])
+        self.artists = self.postings(songs_df['Artist Names'])
+        self.song_artists = [parseList(value) for value in songs_df['Artist Names']]
+
+    @staticmethod
+    def postings(column: pd.Series) -> dict[str, np.ndarray]:
+        """
+        Catalog rows of every value of a list column, e.g. genre -> rows of the songs of that genre.
+        """
+        rows = {}
+        for row, values in enumerate(column):
+            for value in parseList(values):
+                rows.setdefault(value, []).append(row)
+        return {value: np.array(value_rows, dtype=np.int64) for value, value_rows in rows.items()}
+
+    def anyOf(self, postings: dict[str, np.ndarray], values) -> np.ndarray:
+        mask = np.zeros(self.n_songs, dtype=bool)
+        for value in values:
+            if value in postings:
+                mask[postings[value]] = True
+        return mask
+
+    def mask(self, filters: SongFilters, playlist_idx: np.ndarray = None) -> np.ndarray:
+        """
+        Songs satisfying every filter.
+
+        Args:
+            filters (SongFilters): Filters of the query.
+            playlist_idx (np.ndarray, optional): Catalog rows of the playlist songs, whose artists are excluded with
+                                                 `exclude_playlist_artists`.
+
+        Returns:
+            np.ndarray: Boolean mask over the catalog songs.
+        """
+        mask = np.ones(self.n_songs, dtype=bool)
+        if filters.decades:
+            decades = np.zeros(self.n_songs, dtype=bool)
+            for decade in filters.decades:
+                decades |= self.decades.get((int(decade) // 10) * 10, False)
+            mask &= decades
+        if filters.genres:
+            mask &= self.anyOf(self.genres, filters.genres)
+        if filters.min_popularity is not None:
+            threshold = int(np.ceil(filters.min_popularity))
+            mask &= self.popularity >= min(max(threshold, 0), 101)
+        if filters.exclude_playlist_artists and playlist_idx is not None:
+            playlist_artists = {artist for row in playlist_idx for artist in self.song_artists[row]}
+            mask &= ~self.anyOf(self.artists, playlist_artists)
+        return mask
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+
+def Genre_PMI(df: pd.DataFrame, min_cooccurrence: int = 3, n_neighbours: int = 20) -> tuple[list, object]:
+    """
+    Positive normalized pointwise mutual information of the genres co-occurring in the 'Artist(s) Genres' of the
+    songs, log(P(a, b) / (P(a) P(b))) / -log(P(a, b)) over songs, computed from the sparse (genres x genres)
+    co-occurrence counts. The normalization, in [-1, 1], keeps pairs of rare genres seen together once or twice
+    from outranking pairs like ("dance pop", "pop"). Pairs co-occurring in less than `min_cooccurrence` songs are
+    dropped and every genre keeps its `n_neighbours` strongest pairs, bounding the matrix to genres x n_neighbours
+    values.
+
+    Args:
+        df (pd.DataFrame): Songs DataFrame with list values in the 'Artist(s) Genres' column.
+        min_cooccurrence (int, optional): Min. songs a pair of genres co-occurs in. Defaults to 3.
+        n_neighbours (int, optional): Pairs kept per genre. Defaults to 20.
+
+    Returns:
+        tuple[list, scipy.sparse.csr_matrix]: Genre names (lower-cased, as in the TF-IDF vocabulary) and their
+        (genres x genres) truncated PMI matrix, without diagonal.
+    """
+    from scipy import sparse
+    from sklearn.preprocessing import MultiLabelBinarizer
+
+    mlb = MultiLabelBinarizer(sparse_output=True)
+    membership = mlb.fit_transform(df['Artist(s) Genres'].apply(lambda genres: sorted({g.lower() for g in genres})))
+    membership = membership.tocsc().astype(np.float64)
+    counts = np.asarray(membership.sum(axis=0)).ravel()
+    cooccurrence = (membership.T @ membership).tocoo()
+
+    keep = (cooccurrence.row != cooccurrence.col) & (cooccurrence.data >= min_cooccurrence)
+    rows, cols, joint = cooccurrence.row[keep], cooccurrence.col[keep], cooccurrence.data[keep]
+    n_songs = membership.shape[0]
+    pmi = np.log(joint * n_songs / (counts[rows] * counts[cols])) / -np.log(joint / n_songs)
+    positive = pmi > 0
+    rows, cols, pmi = rows[positive], cols[positive], pmi[positive]
+
+    # strongest n_neighbours pairs of every genre: sort by genre then decreasing PMI, keep the first of every genre
+    order = np.lexsort((-pmi, rows))
+    rows, cols, pmi = rows[order], cols[order], pmi[order]
+    starts = np.searchsorted(rows, rows, side='left')
+    keep = np.arange(len(rows)) - starts < n_neighbours
+    matrix = sparse.csr_matrix((pmi[keep], (rows[keep], cols[keep])), shape=(len(counts), len(counts)))
+    return list(mlb.classes_), matrix
+
+
+def Smooth_Genre_Block(genre_block: np.ndarray, block_genres: list, pmi_genres: list, pmi,
+                       alpha: float = 0.3) -> np.ndarray:
+    """
+    Propagates the genre TF-IDF weights of the songs one step along the PMI graph:
+    (1 - alpha) x G + alpha x G P, P being the row-normalized PMI matrix, so that songs of related genres ("dance
+    pop", "pop") get a non-zero similarity. Rows are rescaled to their original norm, keeping the block's weight.
+
+    Args:
+        genre_block (np.ndarray): (songs x genres) genre block of the features.
+        block_genres (list): Genre of every column of the block.
+        pmi_genres (list): Genres of the PMI matrix, as returned by Genre_PMI.
+        pmi (scipy.sparse.csr_matrix): Truncated PMI matrix, as returned by Genre_PMI.
+        alpha (float, optional): Weight of the propagated genres. Defaults to 0.3.
+
+    Returns:
+        np.ndarray: Smoothed (songs x genres) genre block.
+    """
+    from scipy import sparse
+
+    # PMI matrix restricted & reordered to the block's columns
+    positions = {genre: pos for pos, genre in enumerate(pmi_genres)}
+    columns = np.array([positions.get(genre, -1) for genre in block_genres])
+    present = np.flatnonzero(columns >= 0)
+    selection = sparse.csr_matrix((np.ones(len(present)), (columns[present], present)),
+                                  shape=(len(pmi_genres), len(block_genres)))
+    propagation = selection.T @ pmi @ selection
+    row_sums = np.asarray(propagation.sum(axis=1)).ravel()
+    inverse_sums = np.divide(1.0, row_sums, out=np.zeros_like(row_sums), where=row_sums > 0)
+    propagation = sparse.diags(inverse_sums) @ propagation
+
+    smoothed = (1 - alpha) * genre_block + alpha * np.asarray((propagation.T @ genre_block.T).T)
+    norms, smoothed_norms = np.linalg.norm(genre_block, axis=1), np.linalg.norm(smoothed, axis=1)
+    scale = np.divide(norms, smoothed_norms, out=np.zeros_like(norms), where=smoothed_norms > 0)
+    return smoothed * scale[:, None]
+
+
+def smoothGenreColumns(features: pd.DataFrame, pmi_genres: list, pmi, alpha: float = 0.3) -> pd.DataFrame:
+    """
+    Features with their 'Genre | ...' block smoothed by Smooth_Genre_Block, the other blocks unchanged.
+    """
+    genre_columns = [column for column in features.columns if column.startswith('Genre | ')]
+    smoothed = features.copy()
+    smoothed[genre_columns] = Smooth_Genre_Block(features[genre_columns].to_numpy(dtype=np.float64),
+                                                 [column[len('Genre | '):] for column in genre_columns],
+                                                 pmi_genres, pmi, alpha)
+    return smoothed
+
+
+def loadGenrePMI(path: str) -> tuple[list, object]:
+    """
+    Reads the genres & PMI matrix stored by the preprocessing pipeline.
+    """
+    from scipy import sparse
+
+    with np.load(path) as arrays:
+        pmi = sparse.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=tuple(arrays['shape']))
+        return arrays['genres'].tolist(), pmi
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+
+
+def Hit_Quality_Cumsum(profiles: dict) -> tuple[list, np.ndarray, np.ndarray]:
+    """
+    Cumulative-over-years hit quality of every entity of an annual hit quality profile (as returned by
+    getAnnualHitQualityProfile), so that the hit quality of any year range is the difference of two columns.
+
+    Args:
+        profiles (dict): Entity -> {year: hit quality} dictionary.
+
+    Returns:
+        tuple[list, np.ndarray, np.ndarray]: Entity names, the sorted years and the (entities x years + 1)
+        cumulative hit quality, column 0 being all zeros.
+    """
+    names = list(profiles)
+    years = np.array(sorted({int(year) for profile in profiles.values() for year in profile}), dtype=np.int64)
+    year_pos = {year: pos for pos, year in enumerate(years)}
+    quality = np.zeros((len(names), len(years)), dtype=np.float64)
+    for row, profile in enumerate(profiles.values()):
+        for year, value in profile.items():
+            quality[row, year_pos[int(year)]] = value
+    cumsum = np.zeros((len(names), len(years) + 1), dtype=np.float64)
+    np.cumsum(quality, axis=1, out=cumsum[:, 1:])
+    return names, years, cumsum
+
+
+class HitQualityIndex:
+    """
+    Year-range rankings of artists or genres by hit quality, answered in O(entities) from cumulative year matrices.
+    """
+
+    def __init__(self, names: list, years: np.ndarray, cumsum: np.ndarray):
+        self.names = np.asarray(names, dtype=object)
+        self.years = np.asarray(years)
+        self.cumsum = cumsum
+
+    @classmethod
+    def fromProfiles(cls, profiles: dict) -> 'HitQualityIndex':
+        return cls(*Hit_Quality_Cumsum(profiles))
+
+    def _columns(self, start_year: int, end_year: int) -> tuple[int, int]:
+        if start_year > end_year:
+            raise ValueError(f'Start year {start_year} is after end year {end_year}.')
+        return (int(np.searchsorted(self.years, start_year, side='left')),
+                int(np.searchsorted(self.years, end_year, side='right')))
+
+    def rangeQuality(self, start_year: int, end_year: int) -> np.ndarray:
+        """
+        Hit quality of every entity over the years start_year to end_year (inclusive).
+        """
+        start, end = self._columns(start_year, end_year)
+        return self.cumsum[:, end] - self.cumsum[:, start]
+
+    def _top(self, scores: np.ndarray, k: int, min_score: float = 0.0) -> np.ndarray:
+        candidates = np.flatnonzero(scores > min_score)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+    def topRange(self, start_year: int, end_year: int, k: int = 20) -> pd.DataFrame:
+        """
+        The k entities with the highest hit quality over a year range.
+
+        Args:
+            start_year (int): First year of the range.
+            end_year (int): Last year of the range (inclusive).
+            k (int, optional): Number of entities. Defaults to 20.
+
+        Returns:
+            pd.DataFrame: 'Name' and 'Hit Quality' of the top entities, best first.
+        """
+        quality = self.rangeQuality(start_year, end_year)
+        top = self._top(quality, k)
+        return pd.DataFrame({'Name': self.names[top], 'Hit Quality': quality[top]})
+
+    def fastestRising(self, start_year: int, end_year: int, k: int = 20) -> pd.DataFrame:
+        """
+        The k entities whose hit quality grew the most from the preceding period of the same length to the year
+        range, e.g. 2010-2019 against 2000-2009.
+
+        Args:
+            start_year (int): First year of the range.
+            end_year (int): Last year of the range (inclusive).
+            k (int, optional): Number of entities. Defaults to 20.
+
+        Returns:
+            pd.DataFrame: 'Name', 'Hit Quality', 'Previous Hit Quality' and 'Rise' of the top entities, fastest
+            rising first.
+        """
+        length = end_year - start_year + 1
+        quality = self.rangeQuality(start_year, end_year)
+        previous = self.rangeQuality(start_year - length, start_year - 1)
+        rise = quality - previous
+        top = self._top(rise, k)
+        return pd.DataFrame({'Name': self.names[top], 'Hit Quality': quality[top],
+                             'Previous Hit Quality': previous[top], 'Rise': rise[top]})
+
+    def arrays(self, prefix: str) -> dict:
+        """
+        Arrays of the index keyed for np.savez, e.g. {'artist_names': ..., 'artist_years': ..., ...}.
+        """
+        return {f'{prefix}_names': self.names.astype(str), f'{prefix}_years': self.years,
+                f'{prefix}_cumsum': self.cumsum.astype(np.float32)}
+
+    @classmethod
+    def load(cls, path: str) -> dict[str, 'HitQualityIndex']:
+        """
+        Reads the artist & genre indexes stored by the preprocessing pipeline into {'artist': ..., 'genre': ...}.
+        """
+        with np.load(path) as arrays:
+            return {prefix: cls(arrays[f'{prefix}_names'].tolist(), arrays[f'{prefix}_years'],
+                                arrays[f'{prefix}_cumsum'].astype(np.float64))
+                    for prefix in ('artist', 'genre')}
@@ -0,0 +1,130 @@
+import glob
+import json
+import os
+from ast import literal_eval
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from src.components.song_matching import normalizeText, normalizeTitle, splitArtists
+
+LYRICS_NUMERIC_FEATURES = ['num_syllables', 'num_words', 'num_lines', 'num_dupes', 'difficult_words', 'fog_index',
+                           'flesch_index', 'f_k_grade']
+LYRICS_SENTIMENT_FEATURES = ['neg', 'neu', 'pos', 'compound']
+
+
+def artistKey(artist: str) -> str:
+    """
+    Normalized artist name without a leading article, as "Platters" and "The Platters" are credited alike.
+    """
+    return artist[4:] if artist.startswith('the ') else artist
+
+
+def catalogIndex(songs_df: pd.DataFrame) -> dict[tuple, int]:
+    """
+    Hash index of the catalog songs on (normalized title, normalized artist), every credited artist of a song
+    getting its own key.
+
+    Args:
+        songs_df (pd.DataFrame): Songs catalog with 'Song' and 'Artist Names' columns.
+
+    Returns:
+        dict[tuple, int]: (title, artist) keys mapped to catalog row positions.
+    """
+    index = {}
+    for row, (song, artists) in enumerate(zip(songs_df['Song'], songs_df['Artist Names'])):
+        title = normalizeTitle(song)
+        artists = literal_eval(artists) if isinstance(artists, str) and artists.startswith('[') else [artists]
+        for artist in artists:
+            index.setdefault((title, artistKey(normalizeText(artist))), row)
+    return index
+
+
+def streamLyrics(lyrics_dir: str, batch_size: int = 1000) -> Iterator[list[dict]]:
+    """
+    Yields the lyric records of the per-year JSON files in batches, holding one file in memory at a time.
+
+    Args:
+        lyrics_dir (str): Directory of the lyrics JSON files.
+        batch_size (int, optional): Max. records per batch. Defaults to 1000.
+
+    Yields:
+        list[dict]: Batch of lyric records.
+    """
+    for path in sorted(glob.glob(os.path.join(lyrics_dir, '*.json'))):
+        with open(path, 'r') as file:
+            records = json.load(file)
+        for start in range(0, len(records), batch_size):
+            yield records[start:start + batch_size]
+
+
+def matchLyrics(record: dict, index: dict[tuple, int]):
+    """
+    Catalog row of a lyric record, None if the song isn't in the catalog.
+    """
+    title = normalizeTitle(record.get('title', ''))
+    for artist in splitArtists(record.get('artist', '')):
+        row = index.get((title, artistKey(artist)))
+        if row is not None:
+            return row
+    return None
+
+
+def lyricsNumericFeatures(record: dict) -> list[float]:
+    sentiment = record.get('sentiment') or {}
+    return ([float(record.get(feature) or 0) for feature in LYRICS_NUMERIC_FEATURES] +
+            [float(sentiment.get(feature) or 0) for feature in LYRICS_SENTIMENT_FEATURES])
+
+
+def Lyrics_Features(songs_df: pd.DataFrame, lyrics_dir: str, n_features: int = 2 ** 18, batch_size: int = 1000):
+    """
+    Builds the lyrics features of the catalog songs from the lyrics corpus: the lyrics' hashed TF-IDF vectors
+    followed by the min-max scaled readability, word count & sentiment fields. Records are streamed in batches and
+    only the ones of catalog songs (first record of every song) are kept, so memory is bounded by the catalog size.
+
+    Args:
+        songs_df (pd.DataFrame): Songs catalog with 'Song' and 'Artist Names' columns.
+        lyrics_dir (str): Directory of the lyrics JSON files.
+        n_features (int, optional): Number of hashed term features. Defaults to 2 ** 18.
+        batch_size (int, optional): Records hashed at a time. Defaults to 1000.
+
+    Returns:
+        tuple[scipy.sparse.csr_matrix, int]: (catalog songs x features) matrix, all-zero for songs without lyrics,
+        and the number of songs with lyrics.
+    """
+    from scipy import sparse
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+
+    index = catalogIndex(songs_df)
+    vectorizer = HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None, stop_words='english')
+
+    rows, term_blocks, numeric_rows = [], [], []
+    matched = set()
+    for batch in streamLyrics(lyrics_dir, batch_size):
+        batch_rows, batch_records = [], []
+        for record in batch:
+            row = matchLyrics(record, index)
+            if row is not None and row not in matched:
+                matched.add(row)
+                batch_rows.append(row)
+                batch_records.append(record)
+        if batch_records:
+            rows.extend(batch_rows)
+            term_blocks.append(vectorizer.transform([record.get('lyrics') or '' for record in batch_records]))
+            numeric_rows.extend(lyricsNumericFeatures(record) for record in batch_records)
+
+    n_numeric = len(LYRICS_NUMERIC_FEATURES) + len(LYRICS_SENTIMENT_FEATURES)
+    if not rows:
+        return sparse.csr_matrix((len(songs_df), n_features + n_numeric), dtype=np.float32), 0
+
+    terms = TfidfTransformer(sublinear_tf=True).fit_transform(sparse.vstack(term_blocks).tocsr())
+    numeric = np.array(numeric_rows, dtype=np.float64)
+    span = numeric.max(axis=0) - numeric.min(axis=0)
+    numeric = (numeric - numeric.min(axis=0)) / np.where(span > 0, span, 1)
+
+    features = sparse.hstack([terms, sparse.csr_matrix(numeric)], format='csr', dtype=np.float32)
+    # Rows in catalog order, songs without lyrics keep an empty row
+    placement = sparse.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, np.arange(len(rows)))),
+                                  shape=(len(songs_df), len(rows)))
+    return (placement @ features).tocsr(), len(rows)
@@ -0,0 +1,143 @@
+import zlib
+from ast import literal_eval
+
+import numpy as np
+import pandas as pd
+
+from src.components.song_matching import normalizeText, normalizeTitle
+
+# Audio features compared between candidate duplicates, min-max scaled (liveness & popularity differ between the
+# studio, live & re-released versions of a track)
+DUPLICATE_AUDIO_FEATURES = ['Acousticness', 'Danceability', 'Energy', 'Instrumentalness', 'Loudness', 'Speechiness',
+                            'Tempo', 'Valence']
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def titleShingles(title: str, n: int = 3) -> set:
+    """
+    Character n-grams of the normalized title, version suffixes dropped ("- Remastered 2011", "(Live)" etc.).
+    """
+    title = normalizeTitle(title)
+    if len(title) <= n:
+        return {title}
+    return {title[start:start + n] for start in range(len(title) - n + 1)}
+
+
+def MinHash_Signatures(shingle_sets: list, n_hashes: int = 64, seed: int = 0,
+                       chunk_size: int = 10000) -> np.ndarray:
+    """
+    MinHash signatures of sets of strings: the minimum of `n_hashes` random universal hashes over the (crc32 of the)
+    elements of every set, so that the fraction of equal signature values of two sets estimates their Jaccard
+    similarity. Sets are hashed `chunk_size` at a time, bounding memory to chunk elements x n_hashes.
+
+    Args:
+        shingle_sets (list): Sets of strings, e.g. title shingles.
+        n_hashes (int, optional): Length of the signatures. Defaults to 64.
+        seed (int, optional): Seed of the hash functions. Defaults to 0.
+        chunk_size (int, optional): Sets hashed at once. Defaults to 10000.
+
+    Returns:
+        np.ndarray: (sets x n_hashes) uint64 signatures.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, MERSENNE_PRIME, n_hashes, dtype=np.uint64)
+    b = rng.integers(0, MERSENNE_PRIME, n_hashes, dtype=np.uint64)
+    signatures = np.empty((len(shingle_sets), n_hashes), dtype=np.uint64)
+    for start in range(0, len(shingle_sets), chunk_size):
+        chunk = shingle_sets[start:start + chunk_size]
+        sizes = np.array([max(len(shingles), 1) for shingles in chunk])
+        elements = np.array([zlib.crc32(shingle.encode()) for shingles in chunk for shingle in (shingles or {''})],
+                            dtype=np.uint64)
+        # (a * x + b) mod p, below 2**64 with x < 2**32 and a, b < 2**31
+        hashes = (elements[:, None] * a + b) % np.uint64(MERSENNE_PRIME)
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        signatures[start:start + len(chunk)] = np.minimum.reduceat(hashes, offsets, axis=0)
+    return signatures
+
+
+def lshCandidatePairs(signatures: np.ndarray, bands: int, groups: np.ndarray = None,
+                      window: int = 8) -> np.ndarray:
+    """
+    Candidate pairs of similar signatures by locality-sensitive hashing: signatures are split in `bands` bands and
+    items sharing all the values of a band land in the same bucket. Within every bucket, items (ordered by `groups`,
+    e.g. artist) are paired with the next `window` items, so that every pair of buckets of up to window + 1 items is
+    generated while huge buckets cost O(size x window) instead of O(size ** 2).
+
+    Args:
+        signatures (np.ndarray): (items x hashes) MinHash signatures, hashes divisible by bands.
+        bands (int): Number of bands.
+        groups (np.ndarray, optional): Integer code of every item ordering the buckets. Defaults to none.
+        window (int, optional): Items every item is paired with within its bucket. Defaults to 8.
+
+    Returns:
+        np.ndarray: (pairs x 2) unique candidate pairs, smaller index first.
+    """
+    n_items, n_hashes = signatures.shape
+    if n_hashes % bands:
+        raise ValueError(f'{n_hashes} hashes cannot be split in {bands} bands.')
+    rows = n_hashes // bands
+    groups = np.zeros(n_items, dtype=np.int64) if groups is None else groups
+    pairs = []
+    for band in range(bands):
+        keys = signatures[:, band * rows:(band + 1) * rows]
+        # bucket key of the band: polynomial hash of its values
+        bucket = np.zeros(n_items, dtype=np.uint64)
+        for column in range(rows):
+            bucket = bucket * np.uint64(1000003) + keys[:, column]
+        order = np.lexsort((groups, bucket))
+        sorted_buckets = bucket[order]
+        for offset in range(1, min(window, n_items - 1) + 1):
+            same = np.flatnonzero(sorted_buckets[offset:] == sorted_buckets[:-offset])
+            pairs.append(np.stack([order[same], order[same + offset]], axis=1))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    pairs = np.sort(np.concatenate(pairs), axis=1).astype(np.int64)
+    keys = np.unique(pairs[:, 0] * n_items + pairs[:, 1])
+    return np.stack([keys // n_items, keys % n_items], axis=1)
+
+
+def Near_Duplicate_Clusters(df: pd.DataFrame, n_hashes: int = 64, bands: int = 16, min_title_similarity: float = 0.8,
+                            max_audio_distance: float = 0.1, window: int = 8) -> tuple[np.ndarray, pd.DataFrame]:
+    """
+    Clusters the versions of the same track (remasters, re-releases, live & mono versions) in near-linear time:
+    candidate pairs from LSH over the MinHash signatures of the normalized title shingles are kept when their
+    estimated title similarity is at least `min_title_similarity`, they have the same first-listed artist (a cover
+    featuring the original artist or karaoke versions "in the style of" different artists being distinct
+    recordings) and the root mean square difference of their scaled audio features is at most
+    `max_audio_distance`, and clusters are the connected components of the kept pairs.
+
+    Args:
+        df (pd.DataFrame): Songs data with 'Song', 'Artist Names' and the audio features.
+        n_hashes (int, optional): Length of the MinHash signatures. Defaults to 64.
+        bands (int, optional): LSH bands, more bands finding less similar pairs. Defaults to 16.
+        min_title_similarity (float, optional): Min. estimated Jaccard similarity of the titles. Defaults to 0.8.
+        max_audio_distance (float, optional): Max. RMS difference of the scaled audio features. Defaults to 0.1.
+        window (int, optional): Items paired within an LSH bucket, see lshCandidatePairs. Defaults to 8.
+
+    Returns:
+        tuple[np.ndarray, pd.DataFrame]: Cluster label of every song (songs without duplicates having their own
+        label) and the verified duplicate pairs ('Song A', 'Song B' row indices, 'Title Similarity' & 'Audio
+        Distance').
+    """
+    from scipy import sparse
+    from scipy.sparse.csgraph import connected_components
+
+    artists = [literal_eval(names) if isinstance(names, str) else names for names in df['Artist Names']]
+    primary = pd.factorize(pd.Series([normalizeText(names[0]) if len(names) else '' for names in artists]))[0]
+    signatures = MinHash_Signatures([titleShingles(title) for title in df['Song']], n_hashes)
+    pairs = lshCandidatePairs(signatures, bands, primary, window)
+
+    title_similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    audio = df[DUPLICATE_AUDIO_FEATURES].to_numpy(dtype=np.float64)
+    spread = audio.max(axis=0) - audio.min(axis=0)
+    audio = (audio - audio.min(axis=0)) / np.where(spread > 0, spread, 1.0)
+    audio_distance = np.sqrt(np.square(audio[pairs[:, 0]] - audio[pairs[:, 1]]).mean(axis=1))
+    keep = ((title_similarity >= min_title_similarity) & (audio_distance <= max_audio_distance)
+            & (primary[pairs[:, 0]] == primary[pairs[:, 1]]))
+
+    pairs = pairs[keep]
+    graph = sparse.coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(len(df), len(df)))
+    _, labels = connected_components(graph, directed=False)
+    duplicates = pd.DataFrame({'Song A': pairs[:, 0], 'Song B': pairs[:, 1],
+                               'Title Similarity': title_similarity[keep], 'Audio Distance': audio_distance[keep]})
+    return labels, duplicates
@@ -0,0 +1,74 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+def Neighbour_Graph(features: np.ndarray, n_neighbours: int = 50, block_size: int = 1024,
+                    n_jobs: int = None) -> dict[str, np.ndarray]:
+    """
+    Top `n_neighbours` cosine neighbours of every song, computed block of rows by block of rows (bounding memory to
+    block_size x songs similarities) on a thread pool, BLAS releasing the GIL during the products.
+
+    Args:
+        features (np.ndarray): (songs x features) preprocessed feature matrix.
+        n_neighbours (int, optional): Neighbours kept per song. Defaults to 50.
+        block_size (int, optional): Rows scored per block. Defaults to 1024.
+        n_jobs (int, optional): Threads scoring blocks in parallel. Defaults to the number of CPUs.
+
+    Returns:
+        dict[str, np.ndarray]: CSR arrays of the graph, 'indptr' (songs + 1), 'indices' (neighbour ids, int32) and
+        'scores' (cosine similarities, float32), neighbours sorted by decreasing similarity, along with the 'norms'
+        of the feature vectors.
+    """
+    n_songs = features.shape[0]
+    n_neighbours = min(n_neighbours, n_songs - 1)
+    norms = np.linalg.norm(features, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        unit = (features / norms[:, None]).astype(np.float32)
+    unit[~np.isfinite(unit)] = 0.0
+
+    indices = np.empty((n_songs, n_neighbours), dtype=np.int32)
+    scores = np.empty((n_songs, n_neighbours), dtype=np.float32)
+
+    def scoreBlock(start: int):
+        end = min(start + block_size, n_songs)
+        similarity = unit[start:end] @ unit.T
+        similarity[np.arange(end - start), np.arange(start, end)] = -np.inf
+        top = np.argpartition(-similarity, n_neighbours - 1, axis=1)[:, :n_neighbours]
+        top_scores = np.take_along_axis(similarity, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        indices[start:end] = np.take_along_axis(top, order, axis=1)
+        scores[start:end] = np.take_along_axis(top_scores, order, axis=1)
+
+    n_jobs = n_jobs if n_jobs is not None else os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        list(executor.map(scoreBlock, range(0, n_songs, block_size)))
+
+    return {'indptr': np.arange(0, n_songs * n_neighbours + 1, n_neighbours, dtype=np.int64),
+            'indices': indices.ravel(), 'scores': scores.ravel(), 'norms': norms.astype(np.float32)}
+
+
+def aggregateNeighbours(graph: dict, playlist_idx: np.ndarray, weights: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Sums the weighted similarities of the neighbours of the songs of a playlist, in O(playlist size x neighbours).
+
+    Args:
+        graph (dict): CSR arrays returned by Neighbour_Graph.
+        playlist_idx (np.ndarray): Catalog row indices of the songs of the playlist.
+        weights (np.ndarray): Weight of every song of the playlist.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Candidate songs and their aggregated scores, playlist songs excluded.
+    """
+    indptr = graph['indptr']
+    lists = [graph['indices'][indptr[idx]:indptr[idx + 1]] for idx in playlist_idx]
+    if not lists:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    neighbours = np.concatenate(lists)
+    similarities = np.concatenate([graph['scores'][indptr[idx]:indptr[idx + 1]] * weight
+                                   for idx, weight in zip(playlist_idx, weights)])
+    candidates, positions = np.unique(neighbours, return_inverse=True)
+    scores = np.bincount(positions, weights=similarities, minlength=len(candidates))
+    keep = ~np.isin(candidates, playlist_idx)
+    return candidates[keep].astype(np.int64), scores[keep]
@@ -5,9 +5,8 @@ from typing import Any
 
 import numpy as np
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.preprocessing import MultiLabelBinarizer
+
+# scikit-learn is only needed to fit the features, so it is imported by the functions using it
 
 warnings.filterwarnings("ignore")
 
@@ -77,6 +76,8 @@ def TFIDF_Features(df: pd.DataFrame) -> pd.DataFrame:
         pandas.DataFrame: New DataFrame with TF-IDF features.
     """
 
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
     def custom_tokenizer(text: str) -> list:
         return text.split(', ')
 
@@ -102,6 +103,8 @@ def OHE_List_w_Feats(df: pd.DataFrame, feature_type: str, audio_feats: bool = Tr
         pd.DataFrame: The DataFrame with the specified column one-hot encoded and optionally combined with audio features.
 
     """
+    from sklearn.preprocessing import MultiLabelBinarizer
+
     mlb = MultiLabelBinarizer()
 
     if feature_type == 'Artist':
@@ -149,12 +152,136 @@ def Standardize_Features(df: pd.DataFrame, columns: list) -> pd.DataFrame:
     Returns:
         pandas.DataFrame: New DataFrame with standardized features.
     """
+    from sklearn.preprocessing import MinMaxScaler
+
     num_df = df[columns]
     scaler = MinMaxScaler()
     df_scaled = pd.DataFrame(scaler.fit_transform(num_df), columns=num_df.columns)
     return df_scaled
 
 
+def SVD_Embedding(features: np.ndarray, rank: int, random_state: int = 42) -> dict[str, np.ndarray]:
+    """
+    Fits a truncated SVD of the (weighted) feature matrix. Song embeddings are the projections of their feature
+    vectors on the top `rank` right singular vectors, so that the embedding of a sum of songs is the sum of their
+    embeddings and dot products between songs are approximated by dot products between their embeddings. The exact
+    norms of the feature vectors are kept to normalize the approximate dot products, as the embeddings' own norms
+    lose the truncated part of the vectors.
+
+    Args:
+        features (np.ndarray): (songs x features) preprocessed feature matrix.
+        rank (int): Number of dimensions of the embedding.
+        random_state (int, optional): Seed of the randomized SVD solver. Defaults to 42.
+
+    Returns:
+        dict[str, np.ndarray]: float32 'embeddings' (songs x rank), 'norms' of the feature vectors, 'components'
+        (rank x features) and the 'explained_variance_ratio' of every dimension.
+    """
+    from sklearn.decomposition import TruncatedSVD
+
+    svd = TruncatedSVD(n_components=rank, random_state=random_state)
+    embeddings = svd.fit_transform(features)
+    return {'embeddings': embeddings.astype(np.float32),
+            'norms': np.linalg.norm(features, axis=1).astype(np.float32),
+            'components': svd.components_.astype(np.float32),
+            'explained_variance_ratio': svd.explained_variance_ratio_.astype(np.float32)}
+
+
+def Quantize_Features(features: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Quantizes the (non-negative) feature matrix to 8 bits per value with one scale per column, the column maximum
+    mapping to 255: 0/weight one-hot columns are stored exactly and min-max scaled & TF-IDF columns to within half a
+    step of their range. The exact norms of the feature vectors are kept to normalize the approximate dot products.
+
+    Args:
+        features (np.ndarray): (songs x features) preprocessed feature matrix.
+
+    Returns:
+        dict[str, np.ndarray]: uint8 'codes' (songs x features), float32 'scales' of the columns (value = code x
+        scale) and 'norms' of the feature vectors.
+    """
+    if np.any(features < 0):
+        raise ValueError('Only non-negative features can be quantized.')
+    scales = features.max(axis=0) / 255
+    scales[scales == 0] = 1.0
+    codes = np.rint(features / scales).astype(np.uint8)
+    return {'codes': codes, 'scales': scales.astype(np.float32),
+            'norms': np.linalg.norm(features, axis=1).astype(np.float32)}
+
+
+PROFILE_FEATURES = ['Popularity', 'Acousticness', 'Danceability', 'Energy', 'Instrumentalness', 'Loudness',
+                    'Speechiness', 'Tempo', 'Valence']
+
+
+def Percentile_Ranks(values: np.ndarray) -> np.ndarray:
+    """
+    Percentile rank of every value of every column within its own column, vectorized equivalent of flooring
+    `scipy.stats.percentileofscore(column, value, kind='rank')` for every cell.
+
+    Args:
+        values (np.ndarray): (rows x features) array of feature values.
+
+    Returns:
+        np.ndarray: (rows x features) array of integer percentile ranks between 0 and 100.
+    """
+    n = values.shape[0]
+    ranks = np.empty(values.shape, dtype=np.int64)
+    for col in range(values.shape[1]):
+        sorted_col = np.sort(values[:, col])
+        left = np.searchsorted(sorted_col, values[:, col], side='left')
+        right = np.searchsorted(sorted_col, values[:, col], side='right')
+        ranks[:, col] = np.floor((left + right + (right > left)) * 50.0 / n)
+    return ranks
+
+
+def Percentile_Profiles(df: pd.DataFrame, feature_type: str) -> tuple[list, np.ndarray]:
+    """
+    Mean percentile ranks of the audio features of the songs of every artist or genre, computed in a single sparse
+    product of the (songs x entities) membership matrix with the songs' percentile ranks.
+
+    Args:
+        df (pd.DataFrame): Songs DataFrame with list values in the 'Artist Names' and 'Artist(s) Genres' columns.
+        feature_type (str): The type of the entities to be profiled ('Artist' or 'Genre').
+
+    Returns:
+        tuple[list, np.ndarray]: Entity names and their (entities x PROFILE_FEATURES) rounded mean percentile ranks.
+    """
+    from sklearn.preprocessing import MultiLabelBinarizer
+
+    col = 'Artist Names' if feature_type == 'Artist' else 'Artist(s) Genres'
+    mlb = MultiLabelBinarizer(sparse_output=True)
+    membership = mlb.fit_transform(df[col]).T.tocsr().astype(np.float64)
+    ranks = Percentile_Ranks(df[PROFILE_FEATURES].to_numpy(dtype=np.float64))
+
+    counts = np.asarray(membership.sum(axis=1)).ravel()
+    profiles = (membership @ ranks) / counts[:, None]
+    return list(mlb.classes_), np.round(profiles).astype(np.uint8)
+
+
+def Artist_Centroids(df: pd.DataFrame, features: np.ndarray) -> tuple[list, Any, np.ndarray]:
+    """
+    Unit-normalized centroids of the feature vectors of the songs of every artist, computed in a single sparse
+    product of the (artists x songs) membership matrix, the sparse equivalent of the artist one-hot of
+    OHE_List_w_Feats, with the feature matrix.
+
+    Args:
+        df (pd.DataFrame): Songs DataFrame with list values in the 'Artist Names' column.
+        features (np.ndarray): (songs x features) feature matrix, row aligned with df.
+
+    Returns:
+        tuple[list, scipy.sparse.csr_matrix, np.ndarray]: Artist names, the (artists x songs) membership matrix and
+        the (artists x features) float32 unit centroids.
+    """
+    from sklearn.preprocessing import MultiLabelBinarizer
+
+    mlb = MultiLabelBinarizer(sparse_output=True)
+    membership = mlb.fit_transform(df['Artist Names']).T.tocsr().astype(np.float64)
+    centroids = np.asarray(membership @ features, dtype=np.float64)
+    norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+    np.divide(centroids, norms, out=centroids, where=norms > 0)
+    return list(mlb.classes_), membership, centroids.astype(np.float32)
+
+
 def Hit_Quality_Annual(feature_name: str, ohe_df: pd.DataFrame, feature_type: str) -> dict[int, int]:
     """
     Calculate the annual hit quality for a specific feature based on the provided one-hot encoded DataFrame.
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+# Display fields of a song -> songs data columns
+RECORD_FIELDS = {'song_artist': 'Song-Artist', 'title': 'Song', 'album': 'Album', 'artists': 'Artist Names',
+                 'link': 'Spotify Link', 'image': 'Song Image', 'year': 'Hot100 Ranking Year',
+                 'rank': 'Hot100 Rank', 'popularity': 'Popularity'}
+
+
+class SongRecords:
+    """
+    Display fields of a batch of songs as parallel arrays gathered from a SongRecordStore, e.g. `records.title[i]`,
+    along with their catalog rows and similarity.
+    """
+    __slots__ = ('rows', 'similarity') + tuple(RECORD_FIELDS)
+
+    def __init__(self, rows: np.ndarray, fields: dict, similarity: np.ndarray = None):
+        self.rows = rows
+        self.similarity = similarity
+        for name in RECORD_FIELDS:
+            setattr(self, name, fields[name])
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def head(self, k: int) -> 'SongRecords':
+        fields = {name: getattr(self, name)[:k] for name in RECORD_FIELDS}
+        return SongRecords(self.rows[:k], fields, None if self.similarity is None else self.similarity[:k])
+
+    def toDicts(self, columns: tuple = None) -> list[dict]:
+        """
+        Records keyed by songs data column (all the display fields by default) and 'similarity', with Python values.
+
+        Args:
+            columns (tuple, optional): Songs data columns of the records, unknown ones being ignored.
+
+        Returns:
+            list[dict]: One record per song.
+        """
+        fields = {column: name for name, column in RECORD_FIELDS.items()}
+        columns = RECORD_FIELDS.values() if columns is None else [column for column in columns if column in fields]
+        values = {column: getattr(self, fields[column]).tolist() for column in columns}
+        if self.similarity is not None:
+            values['similarity'] = self.similarity.tolist()
+        return [dict(zip(values, record)) for record in zip(*values.values())]
+
+
+class SongRecordStore:
+    """
+    Display fields of the catalog songs held as parallel NumPy arrays, from which the records of recommended songs
+    are gathered by row without slicing the songs DataFrame.
+    """
+
+    def __init__(self, songs_df: pd.DataFrame):
+        self.n_songs = len(songs_df)
+        self.fields = {name: songs_df[column].to_numpy() for name, column in RECORD_FIELDS.items()}
+        self._songs_df = songs_df
+        self._columns = {}
+
+    def gather(self, rows, similarity: np.ndarray = None) -> SongRecords:
+        """
+        Records of the songs at the given catalog rows, in their order.
+
+        Args:
+            rows (array-like): Catalog rows.
+            similarity (np.ndarray, optional): Similarity of every song. Defaults to none.
+
+        Returns:
+            SongRecords: Display fields of the songs.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        return SongRecords(rows, {name: values[rows] for name, values in self.fields.items()}, similarity)
+
+    def values(self, column: str, rows=None) -> np.ndarray:
+        """
+        Values of any songs data column as an array kept after the first call, e.g. the audio features the mood
+        playlists are ranked by.
+
+        Args:
+            column (str): Songs data column.
+            rows (array-like, optional): Catalog rows to gather. Defaults to every song.
+
+        Returns:
+            np.ndarray: Column values, in the order of the rows.
+        """
+        if column not in self._columns:
+            self._columns[column] = self._songs_df[column].to_numpy()
+        values = self._columns[column]
+        return values if rows is None else values[np.asarray(rows, dtype=np.int64)]
+
+    def lookup(self, song_list: list) -> SongRecords:
+        """
+        Records of the catalog songs of a list of 'Song-Artist' values in catalog order, unknown songs being skipped.
+        """
+        return self.gather(np.flatnonzero(np.isin(self.fields['song_artist'], list(song_list))))
@@ -0,0 +1,112 @@
+from bisect import bisect_left
+
+import numpy as np
+
+from src.components.song_matching import normalizeText
+
+
+def trigrams(text: str) -> set:
+    padded = f'  {text} '
+    return {padded[idx:idx + 3] for idx in range(len(padded) - 2)}
+
+
+class TypeaheadIndex:
+    """
+    Server-side typeahead index over a list of labels (songs, artists, genres). Every query token is matched as a
+    word prefix through a sorted token array (binary search), suggestions are ranked by whether the whole label
+    starts with the query (a range of the sorted labels) and then by weight (e.g. popularity). Queries without
+    prefix matches (typos, infixes) fall back to trigram overlap. Suggestions of the queries of up to three characters,
+    matching the most labels, are precomputed.
+    """
+
+    def __init__(self, labels: list, weights=None, prefix_length: int = 3, top_n: int = 50):
+        self.labels = np.asarray(labels, dtype=object)
+        self._normalized = [normalizeText(label) for label in self.labels]
+        weights = np.zeros(len(self.labels)) if weights is None else np.asarray(weights, dtype=np.float64)
+        span = weights.max() - weights.min() if len(weights) else 0
+        self._weights = (weights - weights.min()) / span if span > 0 else np.zeros(len(self.labels))
+        self._by_weight = np.argsort(-self._weights, kind='stable')
+
+        pairs = sorted((token, label_id) for label_id, label in enumerate(self._normalized)
+                       for token in set(label.split()))
+        self._tokens = [token for token, _ in pairs]
+        self._token_ids = np.array([label_id for _, label_id in pairs], dtype=np.int32)
+        self._label_order = np.array(sorted(range(len(self.labels)), key=self._normalized.__getitem__),
+                                     dtype=np.int32)
+        self._sorted_labels = [self._normalized[label_id] for label_id in self._label_order]
+
+        postings = {}
+        for label_id, label in enumerate(self._normalized):
+            for trigram in trigrams(label):
+                postings.setdefault(trigram, []).append(label_id)
+        self._trigrams = {trigram: np.array(ids, dtype=np.int32) for trigram, ids in postings.items()}
+
+        self.prefix_length, self.top_n = prefix_length, top_n
+        prefixes = {token[:length] for token in set(self._tokens) for length in range(1, prefix_length + 1)}
+        self._top = {prefix: self._prefixTop(prefix, top_n) for prefix in prefixes}
+
+    @classmethod
+    def fromDict(cls, profiles: dict) -> 'TypeaheadIndex':
+        """
+        Builds an index over the keys of a hit profile dictionary (entity -> {year: hit quality}), weighted by the
+        total hit quality of every entity.
+        """
+        return cls(list(profiles), [sum(profile.values()) for profile in profiles.values()])
+
+    def _prefixIds(self, prefix: str) -> np.ndarray:
+        start = bisect_left(self._tokens, prefix)
+        end = bisect_left(self._tokens, prefix + '￿')
+        return np.unique(self._token_ids[start:end])
+
+    def _startsWith(self, ids: np.ndarray, query: str) -> np.ndarray:
+        start = bisect_left(self._sorted_labels, query)
+        end = bisect_left(self._sorted_labels, query + '￿')
+        return np.isin(ids, self._label_order[start:end], assume_unique=True)
+
+    @staticmethod
+    def _rank(ids: np.ndarray, scores: np.ndarray, k: int) -> np.ndarray:
+        if len(ids) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            ids, scores = ids[top], scores[top]
+        return ids[np.argsort(-scores, kind='stable')]
+
+    def _prefixTop(self, query: str, k: int) -> np.ndarray:
+        ids = self._prefixIds(query)
+        return self._rank(ids, self._startsWith(ids, query) + self._weights[ids], k)
+
+    def search(self, query: str, k: int = 10) -> list:
+        """
+        Top-k suggestions for a partial query, the k heaviest labels for an empty one.
+
+        Args:
+            query (str): Partial query typed by the user.
+            k (int, optional): Number of suggestions. Defaults to 10.
+
+        Returns:
+            list: Suggested labels, best first.
+        """
+        query = normalizeText(query or '')
+        if not query:
+            return list(self.labels[self._by_weight[:k]])
+
+        if k <= self.top_n and query in self._top:
+            return list(self.labels[self._top[query][:k]])
+
+        ids = None
+        for token in query.split():
+            token_ids = self._prefixIds(token)
+            ids = token_ids if ids is None else np.intersect1d(ids, token_ids, assume_unique=True)
+            if len(ids) == 0:
+                break
+
+        if ids is not None and len(ids) > 0:
+            return list(self.labels[self._rank(ids, self._startsWith(ids, query) + self._weights[ids], k)])
+
+        query_trigrams = [self._trigrams[trigram] for trigram in trigrams(query) if trigram in self._trigrams]
+        if not query_trigrams:
+            return []
+        # counts over the labels sharing a trigram only, not the whole catalog
+        ids, counts = np.unique(np.concatenate(query_trigrams), return_counts=True)
+        keep = counts >= max(1, len(query_trigrams) // 2)
+        ids, counts = ids[keep], counts[keep]
+        return list(self.labels[self._rank(ids, counts + self._weights[ids], k)])
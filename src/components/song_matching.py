@@ -0,0 +1,125 @@
+import re
+import unicodedata
+from difflib import SequenceMatcher
+
+import numpy as np
+
+# Suffixes Spotify appends to re-issued track titles, e.g. "Prisoner of Love - Remastered - 1992"
+VERSION_PATTERN = re.compile(r'\s+-\s+.*$|\s*[(\[].*?[)\]]')
+ARTIST_SPLIT_PATTERN = re.compile(r'\s+(?:featuring|feat\.?|ft\.?|with|and|x|vs\.?)\s+|\s*[,&/]\s*')
+
+
+def normalizeText(text: str) -> str:
+    """
+    Lower-cases the text, strips accents and punctuation and collapses whitespace.
+
+    Args:
+        text (str): The input text.
+
+    Returns:
+        str: Normalized text.
+    """
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode('ascii').lower()
+    text = re.sub(r'[^a-z0-9 ]+', ' ', text.replace('&', ' and '))
+    return ' '.join(text.split())
+
+
+def normalizeTitle(title: str) -> str:
+    """
+    Normalizes a song title after dropping version suffixes ("- Remastered", "(Live)", "[Mono]" etc.).
+
+    Args:
+        title (str): The input song title.
+
+    Returns:
+        str: Normalized song title.
+    """
+    stripped = VERSION_PATTERN.sub('', str(title).strip('"'))
+    return normalizeText(stripped if stripped.strip() else title)
+
+
+def splitArtists(artist: str) -> list[str]:
+    """
+    Splits a Billboard artist credit ("A featuring B and C") into normalized artist names. The full credit is kept
+    as first entry, as "and" is also part of names like "Simon and Garfunkel".
+
+    Args:
+        artist (str): The artist credit as listed on the chart.
+
+    Returns:
+        list[str]: Normalized full credit followed by its individual artist names.
+    """
+    names = [normalizeText(artist)]
+    for name in ARTIST_SPLIT_PATTERN.split(str(artist)):
+        name = normalizeText(name)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def primaryArtist(artist: str) -> str:
+    """
+    Normalized name of the first credited artist of a Billboard artist credit.
+    """
+    names = splitArtists(artist)
+    return names[1] if len(names) > 1 else names[0]
+
+
+def textSimilarity(a: str, b: str) -> float:
+    """
+    Similarity ratio of two normalized strings, in [0, 1].
+    """
+    if not a or not b:
+        return 0.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def candidateScore(track: str, artist: str, year: int, candidate: dict) -> float:
+    """
+    Scores a Spotify search result against a Billboard chart entry. The score blends title similarity, the best
+    similarity between the credited and the candidate's artists and the proximity of the album release to the
+    chart year.
+
+    Args:
+        track (str): Song title as listed on the chart.
+        artist (str): Artist credit as listed on the chart.
+        year (int): Chart year.
+        candidate (dict): A track object of the Spotify search API.
+
+    Returns:
+        float: Match confidence in [0, 1].
+    """
+    title_sim = textSimilarity(normalizeTitle(track), normalizeTitle(candidate['name']))
+
+    chart_artists = splitArtists(artist)
+    candidate_artists = [normalizeText(a['name']) for a in candidate['artists']]
+    candidate_artists.append(normalizeText(' and '.join(a['name'] for a in candidate['artists'])))
+    artist_sim = max(textSimilarity(a, b) for a in chart_artists for b in candidate_artists)
+
+    try:
+        release_year = int(str(candidate['album']['release_date'])[:4])
+        year_sim = 1 - min(abs(release_year - int(year)), 20) / 20
+    except (KeyError, TypeError, ValueError):
+        year_sim = 0.0
+
+    return 0.55 * title_sim + 0.35 * artist_sim + 0.10 * year_sim
+
+
+def bestCandidate(track: str, artist: str, year: int, candidates: list[dict]) -> tuple[dict, float]:
+    """
+    Picks the best scoring Spotify search result for a Billboard chart entry.
+
+    Args:
+        track (str): Song title as listed on the chart.
+        artist (str): Artist credit as listed on the chart.
+        year (int): Chart year.
+        candidates (list[dict]): Track objects of the Spotify search API.
+
+    Returns:
+        tuple[dict, float]: Best candidate (None if there are none) and its match confidence.
+    """
+    if not candidates:
+        return None, 0.0
+    scores = np.array([candidateScore(track, artist, year, candidate) for candidate in candidates])
+    best = int(np.argmax(scores))
+    return candidates[best], float(scores[best])
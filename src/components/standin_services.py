@@ -0,0 +1,255 @@
+import html
+import random
+import threading
+import time
+import zlib
+from ast import literal_eval
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+from spotipy import SpotifyException
+
+from src.components.data_downloader import ingestedLookups
+from src.components.song_matching import normalizeText
+
+FIELD_FILTERS = ('track:', 'artist:', 'year:')
+
+
+@dataclass
+class StandinConfig:
+    latency_ms: float = 0.0
+    rate_limit: float = 0.0        # calls per second, 0 disables rate limiting
+    error_rate: float = 0.0        # share of calls failing with a 5xx error
+    retry_after: float = 0.05      # seconds a rate limited client waits before retrying
+    max_retries: int = 5
+    seed: int = 42
+
+
+class StandinPolicy:
+    """
+    Applies the configured latency, rate limit and error injection to every call of a stand-in service and keeps
+    per-endpoint call statistics.
+    """
+
+    def __init__(self, config: StandinConfig):
+        self.config = config
+        self.calls = Counter()
+        self.rate_limited = Counter()
+        self.errors = Counter()
+        self._random = random.Random(config.seed)
+        self._lock = threading.Lock()
+        self._tokens = config.rate_limit
+        self._last_refill = time.monotonic()
+
+    def admit(self, endpoint: str) -> int:
+        """
+        Admits a single call and returns the HTTP status the real service would answer with.
+        """
+        with self._lock:
+            self.calls[endpoint] += 1
+            if self.config.rate_limit > 0:
+                now = time.monotonic()
+                self._tokens = min(self.config.rate_limit,
+                                   self._tokens + (now - self._last_refill) * self.config.rate_limit)
+                self._last_refill = now
+                if self._tokens < 1:
+                    self.rate_limited[endpoint] += 1
+                    return 429
+                self._tokens -= 1
+            failed = self._random.random() < self.config.error_rate
+
+        if self.config.latency_ms > 0:
+            time.sleep(self.config.latency_ms / 1000)
+        if failed:
+            with self._lock:
+                self.errors[endpoint] += 1
+            return 503
+        return 200
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+            self.rate_limited.clear()
+            self.errors.clear()
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+
+class StandinSpotify:
+    """
+    In-process stand-in for the `spotipy.Spotify` client, serving the search, track, album, artist and
+    audio_features endpoints used by the ingestion pipeline out of already ingested Spotify data. Rate limited and
+    failed calls are retried the way spotipy does, so they only show up as extra calls in the statistics.
+    """
+
+    def __init__(self, spotify_df: pd.DataFrame, config: StandinConfig = None):
+        self.policy = StandinPolicy(StandinConfig() if config is None else config)
+        self._tracks = {}
+        self._albums = {}
+        self._artists = {}
+        self._audio_features = {}
+        self._index = defaultdict(set)
+
+        artist_genres, _ = ingestedLookups(spotify_df)
+        catalog = spotify_df.drop_duplicates(subset=['Spotify URI'])
+        for row in catalog.to_dict('records'):
+            self._addTrack(row, artist_genres)
+
+    @staticmethod
+    def _id(value: str) -> str:
+        return str(value).rstrip('/').replace('/', ':').split(':')[-1].split('?')[0]
+
+    def _addTrack(self, row: dict, artist_genres: dict):
+        track_id = self._id(row['Spotify URI'])
+        artist_names = literal_eval(row['Artist Names'])
+        song_genres = literal_eval(row['Artist(s) Genres'])
+
+        artists = []
+        for name in artist_names:
+            artist_id = f'artist{zlib.crc32(name.encode())}'
+            self._artists.setdefault(artist_id, {'id': artist_id, 'name': name,
+                                                 'genres': artist_genres.get(name, song_genres)})
+            artists.append({'name': name, 'id': artist_id,
+                            'external_urls': {'spotify': f'https://open.spotify.com/artist/{artist_id}'}})
+
+        first_artist = artist_names[0] if artist_names else ''
+        album_key = f"{row['Album']}|{first_artist}"
+        album_id = f'album{zlib.crc32(album_key.encode())}'
+        self._albums.setdefault(album_id, {'id': album_id, 'name': row['Album'],
+                                           'release_date': row['Album Release Date']})
+        images = [{'url': row['Song Image']}] * 3
+
+        self._tracks[track_id] = {
+            'id': track_id, 'uri': row['Spotify URI'], 'name': row['Song'], 'popularity': int(row['Popularity']),
+            'duration_ms': int(row['Song Length(ms)']), 'artists': artists,
+            'external_urls': {'spotify': row['Spotify Link']},
+            'album': {'name': row['Album'], 'release_date': row['Album Release Date'], 'images': images,
+                      'external_urls': {'spotify': f'https://open.spotify.com/album/{album_id}'}},
+        }
+        self._audio_features[track_id] = {
+            'acousticness': row['Acousticness'], 'danceability': row['Danceability'], 'energy': row['Energy'],
+            'instrumentalness': row['Instrumentalness'], 'liveness': row['Liveness'], 'loudness': row['Loudness'],
+            'speechiness': row['Speechiness'], 'tempo': row['Tempo'], 'valence': row['Valence'],
+            'key': int(row['Key']), 'mode': int(row['Mode']), 'time_signature': int(row['Time Signature']),
+            'uri': row['Spotify URI'],
+        }
+
+        for token in normalizeText(f"{row['Song']} {' '.join(artist_names)}").split():
+            self._index[token].add(track_id)
+
+    def _call(self, endpoint: str, handler, *args):
+        for attempt in range(self.policy.config.max_retries + 1):
+            status = self.policy.admit(endpoint)
+            if status == 200:
+                try:
+                    return handler(*args)
+                except KeyError:
+                    raise SpotifyException(404, -1, f'{endpoint}: non existing id')
+            if attempt == self.policy.config.max_retries:
+                raise SpotifyException(status, -1, f'{endpoint}: stand-in returned {status}')
+            time.sleep(self.policy.config.retry_after if status == 429 else 0)
+
+    def _search(self, q: str, limit: int):
+        year = None
+        tokens = []
+        for part in q.split():
+            if part.startswith('year:'):
+                year = part[len('year:'):]
+                continue
+            for field in FIELD_FILTERS:
+                if part.startswith(field):
+                    part = part[len(field):]
+            tokens.extend(normalizeText(part).split())
+
+        postings = sorted((self._index.get(token, set()) for token in set(tokens)), key=len)
+        matches = set.intersection(*postings) if postings else set()
+        items = [self._tracks[track_id] for track_id in matches]
+        if year is not None:
+            items = [item for item in items if str(item['album']['release_date']).startswith(year)]
+        items.sort(key=lambda item: item['popularity'], reverse=True)
+        return {'tracks': {'items': items[:limit], 'total': len(items), 'limit': limit}}
+
+    def search(self, q: str, limit: int = 10, offset: int = 0, type: str = 'track', market: str = None):
+        return self._call('search', self._search, q, limit)
+
+    def track(self, track_id: str, market: str = None):
+        return self._call('track', lambda: self._tracks[self._id(track_id)])
+
+    def album(self, album_id: str, market: str = None):
+        return self._call('album', lambda: self._albums[self._id(album_id)])
+
+    def artist(self, artist_id: str):
+        return self._call('artist', lambda: self._artists[self._id(artist_id)])
+
+    def audio_features(self, tracks=None):
+        tracks = [tracks] if isinstance(tracks, str) else tracks
+        return self._call('audio_features',
+                          lambda: [self._audio_features.get(self._id(track)) for track in tracks])
+
+
+class StandinWikipedia:
+    """
+    Local HTTP stand-in for the Wikipedia Billboard Year-End Hot 100 pages, rendering the chart tables out of
+    already scraped chart data. Use `base_url` as `base_url` of `Billboards_Hot100_Chart`.
+    """
+
+    def __init__(self, wikipedia_df: pd.DataFrame, config: StandinConfig = None, host: str = '127.0.0.1',
+                 port: int = 0):
+        self.policy = StandinPolicy(StandinConfig() if config is None else config)
+        self._pages = {year: self.renderPage(year, chart_df) for year, chart_df in wikipedia_df.groupby('Year')}
+
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status = standin.policy.admit('wikipedia')
+                year = self.path.rstrip('/').split('_')[-1]
+                page = standin._pages.get(int(year)) if year.isdigit() else None
+                if status == 200 and page is None:
+                    status = 404
+                body = page.encode() if status == 200 else b''
+                self.send_response(status)
+                if status == 429:
+                    self.send_header('Retry-After', str(standin.policy.config.retry_after))
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @staticmethod
+    def renderPage(year: int, chart_df: pd.DataFrame) -> str:
+        rows = ''.join(f'<tr><td>{rank}</td><td>"{html.escape(str(song))}"</td><td>{html.escape(str(artist))}</td>'
+                       f'</tr>\n' for rank, song, artist in zip(chart_df['Rank'], chart_df['Song'],
+                                                                 chart_df['Artist']))
+        return (f'<html><head><title>Billboard Year-End Hot 100 singles of {year}</title></head><body>'
+                f'<table class="wikitable"><tr><th>No.</th><th>Title</th><th>Artist(s)</th></tr>\n{rows}</table>'
+                f'</body></html>')
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/wiki'
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,90 @@
+"""
+Pre-renders the charts of the most popular songs, artists and genres into the charts directory read by the app.
+
+    python -m src.pipeline.chart_prerender
+"""
+import sys
+import json
+import argparse
+import pandas as pd
+from dataclasses import dataclass
+from functools import partial
+
+from src.components.chart_cache import ChartRenderCache
+from src.plotUtils import getFeaturePercentiles, loadPercentileProfiles
+
+from src.exception import CustomException
+from src.logger import logging
+
+
+@dataclass
+class ChartPrerenderConfig:
+    prep_songs_data_path: str = 'artifacts/[Songs]_Preprocessed_Data.csv'
+    percentile_profiles_path: str = 'artifacts/Artists_&_Genres_Percentile_Profiles.npz'
+    hit_profile_path: str = 'artifacts/Artists_&_Genres_Hit_Profile.json'
+    charts_dir: str = 'artifacts/charts'
+    style: str = 'dark'
+    top_songs: int = 200
+    top_artists: int = 100
+    top_genres: int = 50
+
+
+class ChartPrerender:
+    """
+    Optional pipeline step pre-rendering the charts of the most popular songs, artists and genres into the charts
+    directory the app's chart render cache reads from.
+    """
+
+    def __init__(self, config: ChartPrerenderConfig = None):
+        self.config = ChartPrerenderConfig() if config is None else config
+
+    def getCharts(self) -> list[tuple]:
+        songs_data = pd.read_csv(self.config.prep_songs_data_path)
+        percentile_profiles = loadPercentileProfiles(self.config.percentile_profiles_path)
+        with open(self.config.hit_profile_path, 'r') as file:
+            hit_profile = json.load(file)
+
+        charts = []
+        top_songs = songs_data.nlargest(self.config.top_songs, 'Popularity')['Song-Artist']
+        for song in top_songs:
+            charts.append((f'song:{song}', 'pizza', partial(getFeaturePercentiles, songs_data, song, 'song')))
+
+        for feat_type, top_n in (('Artist', self.config.top_artists), ('Genre', self.config.top_genres)):
+            profiles = hit_profile[feat_type]
+            top_entities = sorted(profiles, key=lambda entity: sum(profiles[entity].values()), reverse=True)[:top_n]
+            for entity in top_entities:
+                entity_key = f'{feat_type.lower()}:{entity}'
+                charts.append((entity_key, 'hit_profile', profiles[entity]))
+                charts.append((entity_key, 'pizza', percentile_profiles[feat_type.lower()][entity]))
+        return charts
+
+    def prerender(self):
+        try:
+            logging.info('Chart pre-rendering started.')
+            charts = self.getCharts()
+            cache = ChartRenderCache(charts_dir=self.config.charts_dir)
+            cache.render(charts, self.config.style, persist=True)
+            cache.close()
+            logging.info(f'Pre-rendered {len(charts)} charts, stored in {self.config.charts_dir} directory.')
+            return len(charts)
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    defaults = ChartPrerenderConfig()
+    parser.add_argument('--charts-dir', default=defaults.charts_dir)
+    parser.add_argument('--style', choices=['light', 'dark'], default=defaults.style)
+    parser.add_argument('--top-songs', type=int, default=defaults.top_songs)
+    parser.add_argument('--top-artists', type=int, default=defaults.top_artists)
+    parser.add_argument('--top-genres', type=int, default=defaults.top_genres)
+    args = parser.parse_args()
+
+    config = ChartPrerenderConfig(charts_dir=args.charts_dir, style=args.style, top_songs=args.top_songs,
+                                  top_artists=args.top_artists, top_genres=args.top_genres)
+    ChartPrerender(config).prerender()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,8 @@
 import os
 import sys
-import json
 import configparser
+import numpy as np
+import pandas as pd
 import spotipy
 from spotipy.oauth2 import SpotifyClientCredentials
 
@@ -10,51 +11,156 @@ from src.logger import logging
 
 from dataclasses import dataclass
 
-from src.components.data_downloader import Billboards_Hot100_Chart, addURIColumn
-from src.components.data_downloader import Spotify_Features
+from src.components.data_downloader import Billboards_Hot100_Chart, addURIColumn, WIKIPEDIA_URL
+from src.components.data_downloader import Spotify_Features, ingestedLookups, splitIngested
+from src.components.song_matching import normalizeTitle
 
 @dataclass
 class DataIngestionConfig:
     cred_path: str = 'credentials.ini'
     spotify_data_path: str = 'data/[Spotify]_Billboard_Hot100_Songs_1946-2022.csv'
     wikipedia_data_path: str = 'data/[Wikipedia]_Billboard_Hot100_Songs_1946-2022.csv'
-    
+    review_data_path: str = 'data/[Review]_Low_Confidence_Matches.csv'
+    matching_mode: str = 'cascade'
+    search_limit: int = 10
+    min_match_confidence: float = 0.6
+    wikipedia_base_url: str = WIKIPEDIA_URL
+    start_year: int = 1946
+    end_year: int = 2022
+
 class DataIngestion:
 
-    def __init__(self):
-        config = DataIngestionConfig()
-        parser = configparser.ConfigParser()
-        parser.read(config.cred_path)
-        
-        self.spotify_client_id = parser.get('Spotify', 'client_id')
-		self.spotify_client_secret = parser.get('Spotify', 'client_secret')
-        
-    @staticmethod
+    def __init__(self, config: DataIngestionConfig = None, sp=None):
+        self.config = DataIngestionConfig() if config is None else config
+        self._sp = sp
+        if sp is None:
+            parser = configparser.ConfigParser()
+            parser.read(self.config.cred_path)
+
+            self.spotify_client_id = parser.get('Spotify', 'client_id')
+            self.spotify_client_secret = parser.get('Spotify', 'client_secret')
+
     def getSpotifyInstance(self):
+        if self._sp is not None:
+            return self._sp
         try:
             client_credentials_manager = SpotifyClientCredentials(client_id=self.spotify_client_id,
                                                                   client_secret=self.spotify_client_secret)
             sp = spotipy.Spotify(client_credentials_manager = client_credentials_manager)
             logging.info('Connected to Spotify API.\nInstance created !')
             return sp
-    	except Exception as e:
+        except Exception as e:
             raise CustomException(e, sys)
-        
-    def getData(self):
+
+    def getData(self, start_year: int = None, end_year: int = None, delta: bool = False):
+        """
+        Runs the ingestion pipeline for the given chart years (defaults to the configured range).
+
+        With `delta` set, only the chart years and songs missing from the existing /data CSVs are scraped, resolved
+        and enriched, and the results are merged into those CSVs in place.
+        """
+        start_year = self.config.start_year if start_year is None else start_year
+        end_year = self.config.end_year if end_year is None else end_year
+        if delta:
+            return self.getDeltaData(start_year, end_year)
+
         try:
             logging.info('-----Data Ingestion Pipeline Initiated-----')
-            
-            dfBillboards = Billboards_Hot100_Chart(1946, 2022)
-            dfBillboards.to_csv(config.wikipedia_data_path, index = False)
+
+            dfBillboards = Billboards_Hot100_Chart(start_year, end_year, self.config.wikipedia_base_url)
+            dfBillboards.to_csv(self.config.wikipedia_data_path, index = False)
             logging.info('Scraped data of Billboard Hot 100 Chart from Wikipedia.\nStored in /data directory.')
-            
-            sp = getSpotifyInstance()
-            dfBillboardsWithURI = addURIColumn(dfBillboards, sp)
+
+            sp = self.getSpotifyInstance()
+            dfBillboardsWithURI = self.resolveURIs(dfBillboards, sp)
+            dfBillboardsWithURI = dfBillboardsWithURI[dfBillboardsWithURI['URI'] != 'Unavailable']
+            dfBillboardsWithURI = dfBillboardsWithURI.reset_index(drop=True)
             logging.info('Acquired Spotify URI of scraped songs using API.')
-            
+
             final_data = Spotify_Features(dfBillboardsWithURI, sp)
-            final_data.to_csv(config.spotify_data_path, index = False)
+            final_data.to_csv(self.config.spotify_data_path, index = False)
             logging.info('Downloded required metadata & audio features of all songs.\nStored in /data directory.')
             return final_data
         except Exception as e:
-            raise CustomException(e, sys)
\ No newline at end of file
+            raise CustomException(e, sys)
+
+    def getDeltaData(self, start_year: int, end_year: int):
+        try:
+            logging.info('-----Delta Data Ingestion Pipeline Initiated-----')
+            requested_years = set(range(start_year, end_year + 1))
+
+            wiki_df = self.readIngested(self.config.wikipedia_data_path)
+            spotify_df = self.readIngested(self.config.spotify_data_path)
+
+            chart_years = set(wiki_df['Year']) if wiki_df is not None else set()
+            missing_chart_years = sorted(requested_years - chart_years)
+            if missing_chart_years:
+                new_charts = pd.concat([Billboards_Hot100_Chart(year, year, self.config.wikipedia_base_url)
+                                        for year in missing_chart_years],
+                                       ignore_index=True)
+                wiki_df = pd.concat([wiki_df, new_charts], ignore_index=True) if wiki_df is not None else new_charts
+                wiki_df = wiki_df.sort_values(by=['Year', 'Rank'], kind='stable').reset_index(drop=True)
+                wiki_df.to_csv(self.config.wikipedia_data_path, index = False)
+                logging.info(f'Scraped Billboard Hot 100 Chart of {missing_chart_years} from Wikipedia.\n'
+                             f'Merged into /data directory.')
+
+            # chart entries are matched by (year, rank), so that years enriched partially (e.g. after a failed
+            # fetch) are completed, entries without a Spotify match being retried. Tied entries sharing a rank are
+            # told apart by their normalized title (Spotify titles of the others may differ, e.g. 'Lamp-Lighter')
+            pending = wiki_df['Year'].isin(requested_years)
+            if spotify_df is not None:
+                entries = pd.MultiIndex.from_arrays([wiki_df['Year'], wiki_df['Rank']])
+                enriched = pd.MultiIndex.from_arrays([spotify_df['Hot100 Ranking Year'], spotify_df['Hot100 Rank']])
+                titled_entries = pd.MultiIndex.from_arrays([wiki_df['Year'], wiki_df['Rank'],
+                                                            wiki_df['Song'].map(normalizeTitle)])
+                titled_enriched = pd.MultiIndex.from_arrays([spotify_df['Hot100 Ranking Year'],
+                                                             spotify_df['Hot100 Rank'],
+                                                             spotify_df['Song'].map(normalizeTitle)])
+                ingested = np.where(entries.duplicated(keep=False), titled_entries.isin(titled_enriched),
+                                    entries.isin(enriched))
+                pending &= ~ingested
+            pending_df = wiki_df[pending].reset_index(drop=True)
+            if pending_df.empty:
+                logging.info('Requested chart entries are already ingested, nothing to fetch.')
+                return spotify_df
+
+            sp = self.getSpotifyInstance()
+            pending_df = self.resolveURIs(pending_df, sp)
+            pending_df = pending_df[pending_df['URI'] != 'Unavailable'].reset_index(drop=True)
+            logging.info(f'Acquired Spotify URI of {len(pending_df)} new chart entries using API.')
+
+            if spotify_df is None:
+                reused_df, fetch_df = None, pending_df
+                artist_genres, album_dates = {}, {}
+            else:
+                reused_df, fetch_df = splitIngested(pending_df, spotify_df)
+                artist_genres, album_dates = ingestedLookups(spotify_df)
+                logging.info(f'Reused metadata & audio features of {len(reused_df)} already ingested songs.')
+
+            new_data = [spotify_df, reused_df]
+            if not fetch_df.empty:
+                new_data.append(Spotify_Features(fetch_df, sp, artist_genres, album_dates))
+            final_data = pd.concat([data for data in new_data if data is not None], ignore_index=True)
+            final_data = final_data.sort_values(by=['Hot100 Ranking Year', 'Hot100 Rank'],
+                                                kind='stable').reset_index(drop=True)
+            final_data.to_csv(self.config.spotify_data_path, index = False)
+            logging.info(f'Downloded metadata & audio features of {len(fetch_df)} new songs.\n'
+                         f'Merged into /data directory.')
+            return final_data
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def resolveURIs(self, df: pd.DataFrame, sp):
+        df = addURIColumn(df, sp, mode=self.config.matching_mode, search_limit=self.config.search_limit,
+                          min_confidence=self.config.min_match_confidence,
+                          review_path=self.config.review_data_path)
+        if 'URI Confidence' in df.columns:
+            logging.info(f"{int((df['URI Confidence'] < self.config.min_match_confidence).sum())} low confidence "
+                         f"matches left unavailable until approved in {self.config.review_data_path}.")
+        return df
+
+    @staticmethod
+    def readIngested(data_path: str):
+        if not os.path.exists(data_path):
+            return None
+        return pd.read_csv(data_path)
@@ -1,11 +1,18 @@
 import sys
 import json
+import numpy as np
 import pandas as pd
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 from src.components.preprocessing import formatToList, removeDuplicates, combineArtistGenre, OHE_List_w_Feats
 from src.components.preprocessing import TFIDF_Features, OHE_Column, Standardize_Features, getAnnualHitQualityProfile
+from src.components.preprocessing import PROFILE_FEATURES, Percentile_Profiles
 from src.components.sentiment import Sentiment_Features
+from src.components.feature_blocks import FEATURE_BLOCK_WEIGHTS, blockWeights
+from src.components.hit_quality import HitQualityIndex
+from src.components.featurizer import SongFeaturizer
+from src.components.feature_cube import Feature_Cube
+from src.components.genre_graph import Genre_PMI, smoothGenreColumns
 
 from src.exception import CustomException
 from src.logger import logging
@@ -14,31 +21,44 @@ from src.logger import logging
 @dataclass
 class DataWranglingConfig:
     data_path: str = 'data/[Spotify]_Billboard_Hot100_Songs_1946-2022.csv'
+    percentile_profiles_path: str = 'artifacts/Artists_&_Genres_Percentile_Profiles.npz'
+    hit_quality_index_path: str = 'artifacts/Artists_&_Genres_Hit_Quality_Cumsum.npz'
+    featurizer_path: str = 'artifacts/[Featurizer]_Transformers.npz'
+    feature_cube_path: str = 'artifacts/[Cube]_Year_Genre_Features.npz'
+    # Genre co-occurrence graph and the features with the genre block smoothed along it, read by the
+    # RecommenderEngine with `genre_smoothing` (RecommenderEngineConfig.genre_smoothing_alpha has to match)
+    genre_pmi_path: str = 'artifacts/[Genres]_PMI.npz'
+    smoothed_feats_data_path: str = 'artifacts/[Features]_Genre_Smoothed.csv'
+    genre_smoothing_alpha: float = 0.3
+    # Weights of the feature blocks, RecommenderEngineConfig.features_block_weights has to match them
+    block_weights: dict = field(default_factory=lambda: dict(FEATURE_BLOCK_WEIGHTS))
 
 
 class DataPreprocessing:
     def __init__(self):
         config = DataWranglingConfig()
+        self.config = config
         self._data = pd.read_csv(config.data_path)
         logging.info('Data read successfully from /data directory.')
 
     @staticmethod
-    def data_preprocessing(data_df: pd.DataFrame):
+    def data_preprocessing(data_df: pd.DataFrame, block_weights: dict = None):
         try:
             logging.info('Data Preprocessing started.')
+            genre_w, sentiment_w, key_w, mode_w, time_sig_w, audio_w = blockWeights(block_weights)
             prep_df = formatToList(data_df)
             prep_df = combineArtistGenre(prep_df)
             prep_df = removeDuplicates(prep_df)
-            genre_df = TFIDF_Features(prep_df)
+            genre_df = TFIDF_Features(prep_df) * genre_w
             subject_df, polar_df = Sentiment_Features(prep_df, 'Song')
-            key_ohe = OHE_Column(prep_df, 'Key', 'Key') * 0.5
-            mode_ohe = OHE_Column(prep_df, 'Mode', 'Mode') * 0.5
-            time_sig_ohe = OHE_Column(prep_df, 'Time Signature', 'Time Signature') * 0.5
-            subject_ohe = OHE_Column(subject_df, 'subjectivity', 'Subjectivity') * 0.5
-            polar_ohe = OHE_Column(polar_df, 'polarity', 'Polarity') * 0.5
+            key_ohe = OHE_Column(prep_df, 'Key', 'Key') * key_w
+            mode_ohe = OHE_Column(prep_df, 'Mode', 'Mode') * mode_w
+            time_sig_ohe = OHE_Column(prep_df, 'Time Signature', 'Time Signature') * time_sig_w
+            subject_ohe = OHE_Column(subject_df, 'subjectivity', 'Subjectivity') * sentiment_w
+            polar_ohe = OHE_Column(polar_df, 'polarity', 'Polarity') * sentiment_w
             num_feats = ['Popularity', 'Acousticness', 'Danceability', 'Energy', 'Instrumentalness',
                          'Liveness', 'Loudness', 'Speechiness', 'Tempo', 'Valence']
-            scaled_feats = Standardize_Features(prep_df, num_feats)
+            scaled_feats = Standardize_Features(prep_df, num_feats) * audio_w
             final_df = pd.concat([genre_df, subject_ohe, polar_ohe, key_ohe, mode_ohe,
                                   time_sig_ohe, scaled_feats], axis=1)
             logging.info('Data Preprocessing completed.')
@@ -49,7 +69,7 @@ class DataPreprocessing:
 
     def get_preprocessed_data(self):
         try:
-            songs_data, feats_data = self.data_preprocessing(self._data)
+            songs_data, feats_data = self.data_preprocessing(self._data, self.config.block_weights)
             songs_data.to_csv('artifacts/[Songs]_Preprocessed_Data.csv', index=False)
             feats_data.to_csv('artifacts/[Features]_Preprocessed_Data.csv', index=False)
             
@@ -59,13 +79,73 @@ class DataPreprocessing:
             ohe_artist_genre.to_csv('artifacts/[OHE]_Artist_Genre.csv', index=False)
             songs_data = pd.read_csv('artifacts/[Songs]_Preprocessed_Data.csv')
             songs_data = formatToList(songs_data)
-            artists_profile, genres_profile = getAnnualHitQualityProfile(songs_data)
+            # the profiles pop the artists & genres columns, the save_* steps below need them
+            artists_profile, genres_profile = getAnnualHitQualityProfile(songs_data.copy())
             artists_and_genres = {'Artist': artists_profile, 'Genre': genres_profile}
             with open('artifacts/Artists_&_Genres_Hit_Profile.json', 'w') as file:
                 json.dump(artists_and_genres, file)
                 file.close()
+            self.save_hit_quality_index(artists_and_genres)
+            self.save_percentile_profiles(songs_data)
+            self.save_feature_cube(songs_data)
+            self.save_featurizer(songs_data, feats_data)
+            self.save_genre_smoothing(songs_data, feats_data)
 
             logging.info('Preprocessed Data and Features Data is stored in /artifacts directory.')
             return songs_data, feats_data
         except Exception as e:
             raise CustomException(e, sys)
+
+    def save_percentile_profiles(self, songs_data: pd.DataFrame):
+        try:
+            artist_names, artist_values = Percentile_Profiles(songs_data, 'Artist')
+            genre_names, genre_values = Percentile_Profiles(songs_data, 'Genre')
+            np.savez_compressed(self.config.percentile_profiles_path, features=np.array(PROFILE_FEATURES),
+                                artist_names=np.array(artist_names), artist_values=artist_values,
+                                genre_names=np.array(genre_names), genre_values=genre_values)
+            logging.info(f'Percentile profiles of {len(artist_names)} artists and {len(genre_names)} genres stored '
+                         f'in {self.config.percentile_profiles_path}.')
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def save_hit_quality_index(self, artists_and_genres: dict):
+        try:
+            arrays = {}
+            for feat_type in ('Artist', 'Genre'):
+                index = HitQualityIndex.fromProfiles(artists_and_genres[feat_type])
+                arrays.update(index.arrays(feat_type.lower()))
+            np.savez_compressed(self.config.hit_quality_index_path, **arrays)
+            logging.info(f'Cumulative hit quality matrices stored in {self.config.hit_quality_index_path}.')
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def save_feature_cube(self, songs_data: pd.DataFrame):
+        try:
+            cube = Feature_Cube(songs_data)
+            np.savez_compressed(self.config.feature_cube_path, **cube)
+            logging.info(f"Year x genre x feature cube ({len(cube['years'])} x {len(cube['genres'])} x "
+                         f"{len(cube['features'])}) stored in {self.config.feature_cube_path}.")
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def save_featurizer(self, songs_data: pd.DataFrame, feats_data: pd.DataFrame):
+        try:
+            featurizer = SongFeaturizer.fit(songs_data, self.config.block_weights)
+            if featurizer.columns != list(feats_data.columns):
+                raise ValueError('The featurizer does not reproduce the columns of the features data.')
+            np.savez_compressed(self.config.featurizer_path, **featurizer.arrays())
+            logging.info(f'Fitted feature transformers stored in {self.config.featurizer_path}.')
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def save_genre_smoothing(self, songs_data: pd.DataFrame, feats_data: pd.DataFrame):
+        try:
+            genres, pmi = Genre_PMI(songs_data)
+            np.savez_compressed(self.config.genre_pmi_path, genres=np.array(genres), data=pmi.data,
+                                indices=pmi.indices, indptr=pmi.indptr, shape=np.array(pmi.shape))
+            smoothed = smoothGenreColumns(feats_data, genres, pmi, self.config.genre_smoothing_alpha)
+            smoothed.to_csv(self.config.smoothed_feats_data_path, index=False)
+            logging.info(f'Genre PMI graph ({pmi.nnz} pairs of {len(genres)} genres) stored in '
+                         f'{self.config.genre_pmi_path}, smoothed features in {self.config.smoothed_feats_data_path}.')
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -0,0 +1,38 @@
+import sys
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+
+from src.components.preprocessing import SVD_Embedding
+
+from src.exception import CustomException
+from src.logger import logging
+
+
+@dataclass
+class FeatureEmbeddingConfig:
+    prep_feats_data_path: str = 'artifacts/[Features]_Preprocessed_Data.csv'
+    embedding_path: str = 'artifacts/[Embedding]_Features.npz'
+    rank: int = 64
+
+
+class FeatureEmbedding:
+    """
+    Optional preprocessing step fitting a low-rank SVD embedding of the weighted feature matrix, used by the
+    RecommenderEngine with `scoring='embedding'`.
+    """
+
+    def __init__(self, config: FeatureEmbeddingConfig = None):
+        self.config = FeatureEmbeddingConfig() if config is None else config
+
+    def get_embedding(self):
+        try:
+            logging.info(f'Fitting rank {self.config.rank} feature embedding.')
+            features_data = pd.read_csv(self.config.prep_feats_data_path)
+            embedding = SVD_Embedding(features_data.to_numpy(dtype=np.float64), self.config.rank)
+            np.savez(self.config.embedding_path, columns=np.array(features_data.columns), **embedding)
+            logging.info(f"Embedding explains {embedding['explained_variance_ratio'].sum():.1%} of the variance, "
+                         f'stored in {self.config.embedding_path}.')
+            return embedding
+        except Exception as e:
+            raise CustomException(e, sys)
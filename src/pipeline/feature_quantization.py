@@ -0,0 +1,41 @@
+import sys
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+
+from src.components.preprocessing import Quantize_Features
+
+from src.exception import CustomException
+from src.logger import logging
+
+
+@dataclass
+class FeatureQuantizationConfig:
+    prep_feats_data_path: str = 'artifacts/[Features]_Preprocessed_Data.csv'
+    quantized_path: str = 'artifacts/[Quantized]_Features.npz'
+    rerank_features_path: str = 'artifacts/[Features]_Float32.npy'
+
+
+class FeatureQuantization:
+    """
+    Optional preprocessing step storing the weighted feature matrix as 8-bit codes, scored by the RecommenderEngine
+    with `scoring='quantized'`, along with a float32 copy memory-mapped by the engine to re-rank the best candidates.
+    """
+
+    def __init__(self, config: FeatureQuantizationConfig = None):
+        self.config = FeatureQuantizationConfig() if config is None else config
+
+    def get_quantized_features(self):
+        try:
+            logging.info('Feature quantization started.')
+            features_data = pd.read_csv(self.config.prep_feats_data_path)
+            features = features_data.to_numpy(dtype=np.float64)
+            quantized = Quantize_Features(features)
+            np.savez(self.config.quantized_path, columns=np.array(features_data.columns), **quantized)
+            np.save(self.config.rerank_features_path, features.astype(np.float32))
+            error = np.abs(quantized['codes'] * quantized['scales'].astype(np.float64) - features).max()
+            logging.info(f"Features quantized ({quantized['codes'].nbytes / features.nbytes:.1%} of the float64 "
+                         f'size, max. error {error:.2e}), stored in {self.config.quantized_path}.')
+            return quantized
+        except Exception as e:
+            raise CustomException(e, sys)
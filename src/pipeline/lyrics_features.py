@@ -0,0 +1,42 @@
+import sys
+import pandas as pd
+from dataclasses import dataclass
+
+from src.components.lyrics import Lyrics_Features
+
+from src.exception import CustomException
+from src.logger import logging
+
+
+@dataclass
+class LyricsFeaturesConfig:
+    prep_songs_data_path: str = 'artifacts/[Songs]_Preprocessed_Data.csv'
+    lyrics_dir: str = 'resources/Lyrics'
+    lyrics_features_path: str = 'artifacts/[Lyrics]_Features.npz'
+    n_features: int = 2 ** 18
+    batch_size: int = 1000
+
+
+class LyricsFeatures:
+    """
+    Optional preprocessing step building the lyrics features of the catalog songs (row aligned with the songs data)
+    from the lyrics corpus, read by the RecommenderEngine as an extra sparse block when `use_lyrics` is set.
+    """
+
+    def __init__(self, config: LyricsFeaturesConfig = None):
+        self.config = LyricsFeaturesConfig() if config is None else config
+
+    def get_lyrics_features(self):
+        from scipy import sparse
+
+        try:
+            logging.info('Lyrics features extraction started.')
+            songs_data = pd.read_csv(self.config.prep_songs_data_path)
+            features, n_matched = Lyrics_Features(songs_data, self.config.lyrics_dir, self.config.n_features,
+                                                  self.config.batch_size)
+            sparse.save_npz(self.config.lyrics_features_path, features)
+            logging.info(f'Lyrics of {n_matched} of {len(songs_data)} songs matched, features stored in '
+                         f'{self.config.lyrics_features_path}.')
+            return features
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -0,0 +1,45 @@
+import sys
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+
+from src.components.near_duplicates import Near_Duplicate_Clusters
+
+from src.exception import CustomException
+from src.logger import logging
+
+
+@dataclass
+class NearDuplicatesConfig:
+    prep_songs_data_path: str = 'artifacts/[Songs]_Preprocessed_Data.csv'
+    clusters_path: str = 'artifacts/[Songs]_Near_Duplicate_Clusters.npz'
+    n_hashes: int = 64
+    bands: int = 16
+    min_title_similarity: float = 0.8
+    max_audio_distance: float = 0.1
+
+
+class NearDuplicates:
+    """
+    Preprocessing step clustering the versions of the same track (remasters, re-releases, live & mono versions) the
+    exact 'Song-Artist' deduplication keeps, read by the RecommenderEngine to recommend one version of every track.
+    """
+
+    def __init__(self, config: NearDuplicatesConfig = None):
+        self.config = NearDuplicatesConfig() if config is None else config
+
+    def get_clusters(self):
+        try:
+            logging.info('Near-duplicate detection started.')
+            songs_data = pd.read_csv(self.config.prep_songs_data_path)
+            labels, duplicates = Near_Duplicate_Clusters(songs_data, self.config.n_hashes, self.config.bands,
+                                                         self.config.min_title_similarity,
+                                                         self.config.max_audio_distance)
+            np.savez_compressed(self.config.clusters_path, labels=labels,
+                                pairs=duplicates[['Song A', 'Song B']].to_numpy())
+            sizes = np.bincount(labels)
+            logging.info(f'{sizes[sizes > 1].sum()} songs in {(sizes > 1).sum()} near-duplicate clusters, stored in '
+                         f'{self.config.clusters_path}.')
+            return labels, duplicates
+        except Exception as e:
+            raise CustomException(e, sys)
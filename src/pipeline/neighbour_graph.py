@@ -0,0 +1,42 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+
+from src.components.neighbour_graph import Neighbour_Graph
+
+from src.exception import CustomException
+from src.logger import logging
+
+
+@dataclass
+class NeighbourGraphConfig:
+    prep_feats_data_path: str = 'artifacts/[Features]_Preprocessed_Data.csv'
+    graph_path: str = 'artifacts/[Graph]_Song_Neighbours.npz'
+    n_neighbours: int = 50
+    block_size: int = 1024
+    n_jobs: int = None
+
+
+class NeighbourGraph:
+    """
+    Optional preprocessing step computing the top cosine neighbours of every song, used by the RecommenderEngine
+    with `scoring='graph'`.
+    """
+
+    def __init__(self, config: NeighbourGraphConfig = None):
+        self.config = NeighbourGraphConfig() if config is None else config
+
+    def get_graph(self):
+        try:
+            logging.info(f'Building the {self.config.n_neighbours} nearest neighbours graph of the songs.')
+            features = pd.read_csv(self.config.prep_feats_data_path).to_numpy(dtype=np.float64)
+            start = time.perf_counter()
+            graph = Neighbour_Graph(features, self.config.n_neighbours, self.config.block_size, self.config.n_jobs)
+            build_time = time.perf_counter() - start
+            np.savez(self.config.graph_path, **graph)
+            logging.info(f'Neighbours graph built in {build_time:.2f}s, stored in {self.config.graph_path}.')
+            return graph
+        except Exception as e:
+            raise CustomException(e, sys)
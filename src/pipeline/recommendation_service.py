@@ -0,0 +1,318 @@
+"""
+JSON HTTP service around the RecommenderEngine.
+
+    python -m src.pipeline.recommendation_service --port 8080
+
+Endpoints:
+    POST /recommend        {"songs": ["<Song-Artist>", ...], "k": 20}
+    POST /recommend/batch  {"playlists": [["<Song-Artist>", ...], ...], "k": 20}
+    POST /recommend/tracks {"tracks": [{<raw audio features & genres, or Spotify track record>}, ...], "k": 20}
+    GET  /health
+
+Concurrent requests arriving within a short window are coalesced into one batched scoring call of the engine. Every
+request, including the ones by tracks, is scored on a single worker thread behind a bounded queue.
+"""
+import sys
+import json
+import queue
+import argparse
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.components.featurizer import tracksFrame
+from src.components.record_store import SongRecords
+from src.pipeline.recommender_engine import RecommenderEngine
+
+from src.exception import CustomException
+from src.logger import logging
+
+
+@dataclass
+class RecommendationServiceConfig:
+    host: str = '127.0.0.1'
+    port: int = 8080
+    batch_window_ms: float = 5.0
+    max_batch_size: int = 64
+    max_queue_size: int = 256
+    request_timeout_s: float = 10.0
+    default_k: int = 20
+    max_k: int = 100
+    record_columns: tuple = ('Song-Artist', 'Song', 'Album', 'Artist Names', 'Hot100 Ranking Year',
+                             'Spotify Link', 'Song Image', 'Popularity')
+
+
+class ServiceHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class ScoringError(Exception):
+    """
+    Failure of the engine while scoring queued requests, answered as an internal error unlike invalid requests.
+    """
+
+
+class RequestCoalescer:
+    """
+    Collects recommendation requests in a bounded queue and scores the ones arriving within `window_ms` of each
+    other (up to `max_batch_size`) with a single batched engine call, on a dedicated worker thread. Requests by tracks
+    share the queue and the worker but are scored one by one.
+    """
+
+    def __init__(self, engine: RecommenderEngine, window_ms: float, max_batch_size: int, max_queue_size: int):
+        self.engine = engine
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self.batches = 0
+        self.requests = 0
+
+    def start(self):
+        self._worker.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._worker.join()
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, songs: list, k: int) -> Future:
+        """
+        Queues a playlist for scoring. Raises `queue.Full` when the service is saturated.
+        """
+        future = Future()
+        self._queue.put_nowait(('songs', songs, k, future))
+        return future
+
+    def submitTracks(self, tracks, k: int) -> Future:
+        """
+        Queues a playlist of raw tracks for scoring. Raises `queue.Full` when the service is saturated.
+        """
+        future = Future()
+        self._queue.put_nowait(('tracks', tracks, k, future))
+        return future
+
+    def _collect(self) -> list:
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set():
+            # requests the client gave up on were cancelled, the others can no longer be
+            batch = [request for request in self._collect() if request[-1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            playlists = [(songs, k, future) for kind, songs, k, future in batch if kind == 'songs']
+            if playlists:
+                self._scorePlaylists(playlists)
+            for tracks, k, future in [(tracks, k, future) for kind, tracks, k, future in batch if kind == 'tracks']:
+                self._scoreTracks(tracks, k, future)
+            self.batches += 1
+            self.requests += len(batch)
+
+    def _scorePlaylists(self, batch: list):
+        try:
+            max_k = max(k for _, k, _ in batch)
+            recommendations = self.engine.Recommend_Records_Batch([songs for songs, _, _ in batch], max_k)
+            for (_, k, future), records in zip(batch, recommendations):
+                future.set_result(records.head(k))
+        except Exception as e:
+            self._fail(batch, e)
+
+    def _scoreTracks(self, tracks, k: int, future: Future):
+        try:
+            future.set_result(self.engine.Recommend_From_Tracks(tracks, k))
+        except Exception as e:
+            self._fail([(tracks, k, future)], e)
+
+    @staticmethod
+    def _fail(batch: list, e: Exception):
+        # even a ValueError of the engine is an internal error at this point, the requests were validated
+        logging.exception('Scoring queued requests failed.')
+        error = ScoringError(f'{type(e).__name__}: {e}')
+        for _, _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+
+class RecommendationService:
+
+    def __init__(self, config: RecommendationServiceConfig = None, engine: RecommenderEngine = None):
+        self.config = RecommendationServiceConfig() if config is None else config
+        self.engine = RecommenderEngine() if engine is None else engine
+        self.coalescer = RequestCoalescer(self.engine, self.config.batch_window_ms, self.config.max_batch_size,
+                                          self.config.max_queue_size)
+        self._catalog = set(self.engine.songs_data['Song-Artist'])
+        self._server = ServiceHTTPServer((self.config.host, self.config.port), self.handler())
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def toRecords(self, recommendations_df) -> list[dict]:
+        if isinstance(recommendations_df, SongRecords):
+            return recommendations_df.toDicts(self.config.record_columns)
+        columns = [column for column in self.config.record_columns if column in recommendations_df.columns]
+        records_df = recommendations_df[columns + ['similarity']]
+        return json.loads(records_df.to_json(orient='records'))
+
+    def parsePlaylist(self, songs, k) -> tuple[list, int]:
+        if not isinstance(songs, list) or not songs:
+            raise ValueError('A playlist must be a non-empty list of "Song-Artist" values.')
+        if not any(song in self._catalog for song in songs):
+            raise ValueError('None of the songs of the playlist is in the catalog.')
+        k = self.config.default_k if k is None else int(k)
+        if not 0 < k <= self.config.max_k:
+            raise ValueError(f'k must be between 1 and {self.config.max_k}.')
+        return songs, k
+
+    def awaitResults(self, submissions: list) -> list:
+        """
+        Queues the requests of the given submit calls and waits for their results, cancelling them when the queue is
+        full or the results take too long.
+        """
+        futures = []
+        try:
+            for submit in submissions:
+                futures.append(submit())
+            return [self.toRecords(future.result(timeout=self.config.request_timeout_s)) for future in futures]
+        except (queue.Full, FutureTimeoutError):
+            # not scored anymore if still queued
+            for future in futures:
+                future.cancel()
+            raise
+
+    def recommend(self, playlists: list, k) -> list[list[dict]]:
+        requests = [self.parsePlaylist(songs, k) for songs in playlists]
+        return self.awaitResults([partial(self.coalescer.submit, songs, k) for songs, k in requests])
+
+    def recommendFromTracks(self, tracks, k) -> list[dict]:
+        if not isinstance(tracks, list) or not tracks or not all(isinstance(track, dict) for track in tracks):
+            raise ValueError('"tracks" must be a non-empty list of track records.')
+        k = self.config.default_k if k is None else int(k)
+        if not 0 < k <= self.config.max_k:
+            raise ValueError(f'k must be between 1 and {self.config.max_k}.')
+        # parsed here so that missing fields are reported as invalid requests
+        return self.awaitResults([partial(self.coalescer.submitTracks, tracksFrame(tracks), k)])[0]
+
+    def health(self) -> dict:
+        return {'status': 'ok', 'catalog_size': len(self._catalog), 'queue_depth': self.coalescer.queue_depth,
+                'batches': self.coalescer.batches, 'requests': self.coalescer.requests}
+
+    def handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def reply(self, status: int, body: dict):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                if self.path == '/health':
+                    self.reply(200, service.health())
+                else:
+                    self.reply(404, {'error': f'Unknown endpoint {self.path}'})
+
+            def do_POST(self):
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                    request = json.loads(self.rfile.read(length) or b'{}')
+                    if self.path == '/recommend':
+                        recommendations = service.recommend([request.get('songs')], request.get('k'))[0]
+                        self.reply(200, {'recommendations': recommendations})
+                    elif self.path == '/recommend/batch':
+                        playlists = request.get('playlists')
+                        if not isinstance(playlists, list) or not playlists:
+                            raise ValueError('"playlists" must be a non-empty list of playlists.')
+                        self.reply(200, {'recommendations': service.recommend(playlists, request.get('k'))})
+                    elif self.path == '/recommend/tracks':
+                        recommendations = service.recommendFromTracks(request.get('tracks'), request.get('k'))
+                        self.reply(200, {'recommendations': recommendations})
+                    else:
+                        self.reply(404, {'error': f'Unknown endpoint {self.path}'})
+                except queue.Full:
+                    self.reply(503, {'error': 'Service is saturated, retry later.'})
+                except ScoringError:
+                    self.reply(500, {'error': 'Internal error while computing the recommendations.'})
+                except (ValueError, TypeError, json.JSONDecodeError) as e:
+                    self.reply(400, {'error': str(e)})
+                except FutureTimeoutError:
+                    self.reply(504, {'error': 'Timed out waiting for recommendations.'})
+                except Exception:
+                    logging.exception(f'Request to {self.path} failed.')
+                    self.reply(500, {'error': 'Internal error while computing the recommendations.'})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.coalescer.start()
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        logging.info(f'Recommendation service listening on {self.url}')
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self.coalescer.stop()
+
+    def serve(self):
+        try:
+            self.coalescer.start()
+            logging.info(f'Recommendation service listening on {self.url}')
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        except Exception as e:
+            raise CustomException(e, sys)
+        finally:
+            self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    defaults = RecommendationServiceConfig()
+    parser.add_argument('--host', default=defaults.host)
+    parser.add_argument('--port', type=int, default=defaults.port)
+    parser.add_argument('--batch-window-ms', type=float, default=defaults.batch_window_ms)
+    parser.add_argument('--max-batch-size', type=int, default=defaults.max_batch_size)
+    parser.add_argument('--max-queue-size', type=int, default=defaults.max_queue_size)
+    args = parser.parse_args()
+
+    config = RecommendationServiceConfig(host=args.host, port=args.port, batch_window_ms=args.batch_window_ms,
+                                         max_batch_size=args.max_batch_size, max_queue_size=args.max_queue_size)
+    RecommendationService(config).serve()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,17 @@
-from dataclasses import dataclass
+import threading
+from ast import literal_eval
+from dataclasses import dataclass, field
 
 import numpy as np
 import pandas as pd
-from sklearn.metrics.pairwise import cosine_similarity
 
+from src.components.song_matching import normalizeText, normalizeTitle
+from src.components.neighbour_graph import aggregateNeighbours
+from src.components.filter_index import FilterIndex, SongFilters
+from src.components.record_store import SongRecords, SongRecordStore
+from src.components.preprocessing import Artist_Centroids
+from src.components.genre_graph import loadGenrePMI, smoothGenreColumns
+from src.components.feature_blocks import FEATURE_BLOCKS, FEATURE_BLOCK_WEIGHTS, blockWeights, featureBlockIds
 from src.logger import logging
 
 
@@ -11,21 +19,156 @@ from src.logger import logging
 class RecommenderEngineConfig:
     prep_songs_data_path: str = 'artifacts/[Songs]_Preprocessed_Data.csv'
     prep_feats_data_path: str = 'artifacts/[Features]_Preprocessed_Data.csv'
+    n_recommendations: int = 100
+    lazy_load: bool = False    # defer reading the features until the first recommendation (fast start)
+    # Diversity re-ranking: trade-off between similarity to the playlist (0) and novelty (1), max. songs of one
+    # artist and number of most similar songs re-ranked
+    diversity: float = 0.0
+    max_per_artist: int = None
+    diversity_pool_size: int = 500
+    # Block weights the features artifact was built with by the preprocessing pipeline
+    features_block_weights: dict = field(default_factory=lambda: dict(FEATURE_BLOCK_WEIGHTS))
+    # Optional sparse lyrics block (src/pipeline/lyrics_features.py) and its default weight
+    use_lyrics: bool = False
+    lyrics_features_path: str = 'artifacts/[Lyrics]_Features.npz'
+    lyrics_weight: float = 0.5
+    # 'exact' scores on the preprocessed features, 'embedding' on their low-rank SVD embedding
+    # (src/pipeline/feature_embedding.py), normalized by the exact norms, a few times cheaper in FLOPs & memory,
+    # 'graph' aggregates the precomputed neighbours of the playlist songs (src/pipeline/neighbour_graph.py),
+    # 'quantized' scores on 8-bit codes of the features (src/pipeline/feature_quantization.py) and re-ranks the
+    # `rerank_pool_size` best candidates on the float features, memory-mapped
+    scoring: str = 'exact'
+    embedding_path: str = 'artifacts/[Embedding]_Features.npz'
+    graph_path: str = 'artifacts/[Graph]_Song_Neighbours.npz'
+    quantized_path: str = 'artifacts/[Quantized]_Features.npz'
+    rerank_features_path: str = 'artifacts/[Features]_Float32.npy'
+    rerank_pool_size: int = 500
+    # Transformers fitted by the preprocessing pipeline, featurizing new tracks (Recommend_From_Tracks, Match_Tracks)
+    featurizer_path: str = 'artifacts/[Featurizer]_Transformers.npz'
+    # Recommend one version of every track, versions being grouped by normalized title & artist and by the
+    # near-duplicate clusters (src/pipeline/near_duplicates.py), and none of the tracks of the playlist. Off by
+    # default until the clusters are validated on the whole catalog
+    drop_near_duplicates: bool = False
+    near_duplicates_path: str = 'artifacts/[Songs]_Near_Duplicate_Clusters.npz'
+    # Exact scoring on the features whose genre block was smoothed along the genre co-occurrence graph by the
+    # preprocessing pipeline, crediting related genres at the same scoring cost (alpha has to match the pipeline's)
+    genre_smoothing: bool = False
+    smoothed_feats_data_path: str = 'artifacts/[Features]_Genre_Smoothed.csv'
+    genre_pmi_path: str = 'artifacts/[Genres]_PMI.npz'
+    genre_smoothing_alpha: float = 0.3
 
 
 class RecommenderEngine:
 
-    def __init__(self):
-        config = RecommenderEngineConfig()
-        self._songs_data = pd.read_csv(config.prep_songs_data_path)
-        self._features_data = pd.read_csv(config.prep_feats_data_path)
-        logging.info('Preprocessed Songs & Features data read Successfully.')
+    def __init__(self, config: RecommenderEngineConfig = None):
+        self.config = RecommenderEngineConfig() if config is None else config
+        self._songs_data = pd.read_csv(self.config.prep_songs_data_path)
+        logging.info('Preprocessed Songs data read Successfully.')
+        self._song_positions = {song: pos for pos, song in enumerate(self._songs_data['Song-Artist'])}
+
+        self._loaded = False
+        self._features = None
+        self._graph = None
+        self._codes = None
+        self._components = None
+        self._featurizer = None
+        self._artist_centroids = None
+        self._genre_pmi = None
+        self._artist_codes = None
+        self._filter_index = None
+        self._record_store = None
+        self._exact_features = None
+        self._load_lock = threading.Lock()
+        if not self.config.lazy_load:
+            self.loadFeatures()
+
+    def loadFeatures(self):
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            if self.config.genre_smoothing and self.config.scoring != 'exact':
+                raise ValueError('Genre smoothing is precomputed into the exact features, build the embedding, '
+                                 'graph or quantized artifact from the smoothed features instead.')
+            if self.config.scoring == 'graph':
+                with np.load(self.config.graph_path) as graph:
+                    self._graph = {name: graph[name] for name in graph.files}
+                if len(self._graph['indptr']) != len(self._songs_data) + 1:
+                    raise ValueError(f"The graph has {len(self._graph['indptr']) - 1} songs, the songs data "
+                                     f'{len(self._songs_data)}. Rebuild it with src/pipeline/neighbour_graph.py.')
+                features, feature_norms = None, self._graph['norms']
+                self._block_membership = None
+            elif self.config.scoring == 'embedding':
+                with np.load(self.config.embedding_path) as embedding:
+                    features, feature_norms = embedding['embeddings'], embedding['norms']
+                    self._components = embedding['components']
+                if features.shape[0] != len(self._songs_data):
+                    raise ValueError(f'The embedding has {features.shape[0]} rows, the songs data '
+                                     f'{len(self._songs_data)}. Rebuild it with src/pipeline/feature_embedding.py.')
+                self._block_membership = None
+            elif self.config.scoring == 'quantized':
+                if self.config.use_lyrics:
+                    raise ValueError('Quantized scoring does not support the lyrics block.')
+                with np.load(self.config.quantized_path) as quantized:
+                    self._codes, self._code_scales = quantized['codes'], quantized['scales']
+                    feature_norms = quantized['norms']
+                # float rows are only read for the playlist songs and the re-ranked candidates
+                features = np.load(self.config.rerank_features_path, mmap_mode='r')
+                if self._codes.shape[0] != len(self._songs_data) or features.shape != self._codes.shape:
+                    raise ValueError(f'The quantized features have {self._codes.shape[0]} rows, the songs data '
+                                     f'{len(self._songs_data)}. Rebuild them with src/pipeline/feature_quantization.py.')
+                self._block_membership = None
+            elif self.config.scoring == 'exact':
+                features_data = pd.read_csv(self.config.smoothed_feats_data_path if self.config.genre_smoothing
+                                            else self.config.prep_feats_data_path)
+                features = features_data.to_numpy(dtype=np.float64)
+                # (features x blocks) membership of the columns and (songs x blocks) squared norms of every block
+                self._block_membership = np.eye(len(FEATURE_BLOCKS))[featureBlockIds(features_data.columns)]
+                self._block_sq_norms = np.square(features) @ self._block_membership
+                feature_norms = np.linalg.norm(features, axis=1)
+            else:
+                raise ValueError(f"Unknown scoring mode '{self.config.scoring}', expected 'exact', 'embedding', "
+                                 f"'graph' or 'quantized'.")
+            self._feature_norms = feature_norms
+            self._stored_weights = blockWeights(self.config.features_block_weights)
+            self._lyrics = None
+            if self.config.use_lyrics:
+                self.loadLyrics()
+            self._features = features
+            self._loaded = True
+            logging.info(f'Preprocessed Features data read Successfully ({self.config.scoring} scoring).')
+
+    def loadLyrics(self):
+        from scipy import sparse
+
+        lyrics = sparse.load_npz(self.config.lyrics_features_path).tocsr().astype(np.float64)
+        if lyrics.shape[0] != len(self._songs_data):
+            raise ValueError(f'The lyrics features have {lyrics.shape[0]} rows, the songs data '
+                             f'{len(self._songs_data)}. Rebuild them with src/pipeline/lyrics_features.py.')
+        self._lyrics = lyrics
+        self._lyrics_sq_norms = np.asarray(lyrics.multiply(lyrics).sum(axis=1)).ravel()
+        logging.info('Lyrics features read Successfully.')
+
+    @property
+    def songs_data(self) -> pd.DataFrame:
+        """
+        The songs catalog the engine recommends from, shared read-only with the UI.
+        """
+        return self._songs_data
 
     @staticmethod
     def getIndex(song_list: list, data_df: pd.DataFrame):
         index = data_df[data_df['Song-Artist'].isin(song_list)].index
         return index
 
+    def playlistIndex(self, song_list: list) -> np.ndarray:
+        """
+        Catalog row indices of the songs of a playlist found in the catalog, looked up in a hash index.
+        """
+        return np.array(sorted({self._song_positions[song] for song in song_list if song in self._song_positions}),
+                        dtype=np.int64)
+
     @staticmethod
     def removeIndexfromDF(song_idx: list, data_df: pd.DataFrame):
         new_df = data_df.drop(song_idx, axis=0)
@@ -39,14 +182,568 @@ class RecommenderEngine:
 
     @staticmethod
     def getSimilarityDF(data_df: pd.DataFrame, summary_vector: np.ndarray):
+        from sklearn.metrics.pairwise import cosine_similarity
+
         similarity_array = cosine_similarity(data_df.values, summary_vector)[:, 0]
         similarity_df = pd.DataFrame(similarity_array, columns=['similarity'])
         return similarity_df
 
-    def Recommend_Songs(self, song_list_playlist: list) -> pd.DataFrame:
-        song_list_playlist_idx = self.getIndex(song_list_playlist, self._songs_data)
-        clean_feats_df = self.removeIndexfromDF(song_list_playlist_idx, self._features_data)
-        playlist_summary_arr = self.songSummarizationVector(song_list_playlist_idx, self._features_data)
-        similarity_df = self.getSimilarityDF(clean_feats_df, playlist_summary_arr)
-        recommendations_idx = similarity_df.sort_values(by=['similarity'], ascending=False)[:100].index
-        return self._songs_data.iloc[recommendations_idx]
+    @staticmethod
+    def topIndices(scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        Indices of the k highest scores, best first, selected with a partial sort.
+        """
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind='stable')]
+
+    def songGroups(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Codes of the primary artist and of the track of every catalog song, the latter being shared by songs having
+        the same (normalized title, primary artist) and, with `drop_near_duplicates`, by the songs of a near-duplicate
+        cluster, i.e. by remasters, re-releases & live versions of a track.
+        """
+        if self._artist_codes is None:
+            artists = [normalizeText(literal_eval(names)[0]) if names.startswith('[') else normalizeText(names)
+                       for names in self._songs_data['Artist Names']]
+            titles = [f'{normalizeTitle(song)}|{artist}' for song, artist in zip(self._songs_data['Song'], artists)]
+            title_codes = pd.factorize(pd.Series(titles))[0]
+            if self.config.drop_near_duplicates:
+                title_codes = self.mergeNearDuplicates(title_codes)
+            self._title_codes = title_codes
+            self._artist_codes = pd.factorize(pd.Series(artists))[0]
+        return self._artist_codes, self._title_codes
+
+    def mergeNearDuplicates(self, title_codes: np.ndarray) -> np.ndarray:
+        """
+        Track codes joining the title groups with the near-duplicate clusters: connected components of the graph
+        linking every song to the first song of its title group and of its cluster.
+        """
+        from scipy import sparse
+        from scipy.sparse.csgraph import connected_components
+
+        with np.load(self.config.near_duplicates_path) as clusters:
+            labels = clusters['labels']
+        if len(labels) != len(self._songs_data):
+            raise ValueError(f'The near-duplicate clusters have {len(labels)} songs, the songs data '
+                             f'{len(self._songs_data)}. Rebuild them with src/pipeline/near_duplicates.py.')
+        songs = np.arange(len(title_codes))
+        links = []
+        for codes in (title_codes, labels):
+            _, inverse = np.unique(codes, return_inverse=True)
+            first = np.full(inverse.max() + 1, len(songs))
+            np.minimum.at(first, inverse, songs)
+            links.append(first[inverse])
+        graph = sparse.coo_matrix((np.ones(2 * len(songs)), (np.tile(songs, 2), np.concatenate(links))),
+                                  shape=(len(songs), len(songs)))
+        return connected_components(graph, directed=False)[1]
+
+    def distinctTop(self, scores: np.ndarray, k: int, groups: np.ndarray = None) -> np.ndarray:
+        """
+        Indices of the k highest scores keeping the best scored song of every group (track by default), best first.
+        The partial sort is widened until k distinct groups are found.
+        """
+        groups = self.songGroups()[1] if groups is None else groups
+        n_candidates = k
+        while True:
+            candidates = self.topIndices(scores, n_candidates)
+            _, first = np.unique(groups[candidates], return_index=True)
+            picked = candidates[np.sort(first)]
+            if len(picked) >= k or len(candidates) < n_candidates:
+                return picked[:k]
+            n_candidates *= 2
+
+    def filterIndex(self) -> FilterIndex:
+        """
+        Boolean indexes of the catalog by decade, genre, artist & popularity, built on the first filtered query.
+        """
+        if self._filter_index is None:
+            self._filter_index = FilterIndex(self._songs_data)
+        return self._filter_index
+
+    def diversify(self, scores: np.ndarray, k: int, diversity: float, max_per_artist: int = None) -> np.ndarray:
+        """
+        Maximal marginal relevance re-ranking of the most similar songs. Songs are picked greedily by
+        (1 - diversity) * similarity - diversity * (max. similarity to the songs picked so far), the latter being
+        updated with one matrix-vector product per pick, i.e. O(k x pool). Other versions of a picked track and
+        songs of artists having `max_per_artist` picks are skipped.
+
+        Args:
+            scores (np.ndarray): Similarity of every catalog song to the playlist.
+            k (int): Number of songs to pick.
+            diversity (float): Weight of the novelty, between 0 and 1.
+            max_per_artist (int, optional): Max. songs of one artist. Defaults to no cap.
+
+        Returns:
+            np.ndarray: Indices of the picked songs, in the order they were picked.
+        """
+        pool = self.topIndices(scores, max(self.config.diversity_pool_size, k))
+        artist_codes, title_codes = self.songGroups()
+        pool_artists, pool_titles = artist_codes[pool], title_codes[pool]
+        vectors = self._features[pool]
+        vectors = vectors[:, vectors.any(axis=0)]    # most genre columns are empty within the pool
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vectors = vectors / self._feature_norms[pool, None]
+        vectors[~np.isfinite(vectors)] = 0.0
+
+        relevance = (1 - diversity) * scores[pool]
+        max_similarity = np.zeros(len(pool))
+        available = np.ones(len(pool), dtype=bool)
+        artist_picks = {}
+        picked = []
+        while len(picked) < k and available.any():
+            mmr = np.where(available, relevance - diversity * max_similarity, -np.inf)
+            best = int(np.argmax(mmr))
+            picked.append(best)
+            available &= pool_titles != pool_titles[best]
+            artist = pool_artists[best]
+            artist_picks[artist] = artist_picks.get(artist, 0) + 1
+            if max_per_artist is not None and artist_picks[artist] >= max_per_artist:
+                available &= pool_artists != artist
+            if diversity > 0:
+                np.maximum(max_similarity, vectors @ vectors[best], out=max_similarity)
+        return pool[picked]
+
+    def blockScales(self, block_weights: dict) -> np.ndarray:
+        """
+        Squared ratio of the requested to the stored weight of every block, the factor the block's contribution to
+        dot products and squared norms is multiplied with.
+        """
+        if self._block_membership is None:
+            raise ValueError('Block weights are only supported with exact scoring.')
+        weights = blockWeights({**self.config.features_block_weights, **block_weights})
+        if np.any((self._stored_weights == 0) & (weights != 0)):
+            raise ValueError('Blocks stored with a weight of 0 cannot be reweighted.')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios = np.where(self._stored_weights == 0, 0.0, weights / self._stored_weights)
+        return np.square(ratios)
+
+    def quantizedDots(self, summaries: np.ndarray, block_size: int = 4096) -> np.ndarray:
+        """
+        Approximate dot products of the summary vectors with every catalog song from the 8-bit codes. The column
+        scales are folded into the summary vectors and the codes are widened to float32 one block of rows at a time,
+        numpy having no BLAS kernel for integer products, so that only block_size x features floats are materialized.
+        """
+        queries = (summaries * self._code_scales).astype(np.float32)
+        dots = np.empty((len(summaries), self._codes.shape[0]), dtype=np.float64)
+        for start in range(0, self._codes.shape[0], block_size):
+            block = self._codes[start:start + block_size].astype(np.float32)
+            dots[:, start:start + len(block)] = queries @ block.T
+        return dots
+
+    def rerank(self, scores: np.ndarray, summary: np.ndarray, pool_size: int):
+        """
+        Replaces, in place, the approximate quantized scores of the `pool_size` best candidates with their exact
+        similarity to the summary vector, computed on their float features, and drops the other songs.
+        """
+        pool = self.topIndices(scores, pool_size)
+        summary = np.asarray(summary, dtype=np.float64)
+        vectors = np.asarray(self._features[np.sort(pool)], dtype=np.float64)
+        exact = np.empty(len(pool))
+        exact[np.argsort(pool)] = vectors @ summary
+        with np.errstate(divide='ignore', invalid='ignore'):
+            exact /= self._feature_norms[pool] * np.linalg.norm(summary)
+        exact[~np.isfinite(exact)] = 0.0
+        scores.fill(-np.inf)
+        scores[pool] = exact
+
+    def scorePlaylists(self, playlists_idx: list, block_weights: dict = None) -> np.ndarray:
+        """
+        Cosine similarity of every catalog song to the summary vector of every playlist, computed with a single
+        matrix product for the whole batch. Songs of a playlist are scored -inf for that playlist.
+
+        Block weights are applied without rescaling the feature matrix: the summary vectors are rescaled instead and
+        the songs' norms are recombined from their precomputed per-block squared norms.
+
+        Args:
+            playlists_idx (list): Catalog row indices of the songs of every playlist.
+            block_weights (dict, optional): Weight of some of the feature blocks ('genre', 'sentiment', 'key',
+                                            'mode', 'time_sig', 'audio' and, with `use_lyrics`, 'lyrics').
+                                            Defaults to the pipeline's (and the configured lyrics) weights.
+
+        Returns:
+            np.ndarray: (playlists x songs) similarity matrix.
+        """
+        self.loadFeatures()
+        if self._features is None:
+            raise ValueError('Scoring the whole catalog needs exact, embedding or quantized scoring.')
+        block_weights = dict(block_weights) if block_weights else {}
+        lyrics_weight = block_weights.pop('lyrics', self.config.lyrics_weight if self._lyrics is not None else 0.0)
+        if lyrics_weight and self._lyrics is None:
+            raise ValueError('The lyrics block is only available with RecommenderEngineConfig(use_lyrics=True).')
+
+        summaries = np.vstack([self._features[idx].sum(axis=0) for idx in playlists_idx])
+        if self._codes is not None and block_weights:
+            raise ValueError('Block weights are only supported with exact scoring.')
+        if self._codes is not None:
+            summary_sq_norms = np.square(summaries).sum(axis=1)
+            feature_sq_norms = np.square(self._feature_norms.astype(np.float64))
+            dots = self.quantizedDots(summaries)
+        elif block_weights:
+            scales = self.blockScales(block_weights)
+            summary_sq_norms = (np.square(summaries) @ self._block_membership) @ scales
+            feature_sq_norms = self._block_sq_norms @ scales
+            dots = (summaries * (self._block_membership @ scales)) @ self._features.T
+        else:
+            summary_sq_norms = np.square(summaries).sum(axis=1)
+            feature_sq_norms = np.square(self._feature_norms)
+            dots = summaries @ self._features.T
+
+        if lyrics_weight:
+            from scipy import sparse
+
+            rows = np.repeat(np.arange(len(playlists_idx)), [len(idx) for idx in playlists_idx])
+            playlists = sparse.csr_matrix((np.ones(len(rows)), (rows, np.concatenate(playlists_idx))),
+                                          shape=(len(playlists_idx), self._lyrics.shape[0]))
+            lyrics_summaries = playlists @ self._lyrics
+            scale = lyrics_weight ** 2
+            dots = dots + scale * (lyrics_summaries @ self._lyrics.T).toarray()
+            summary_sq_norms = summary_sq_norms + scale * np.asarray(
+                lyrics_summaries.multiply(lyrics_summaries).sum(axis=1)).ravel()
+            feature_sq_norms = feature_sq_norms + scale * self._lyrics_sq_norms
+
+        summary_norms, feature_norms = np.sqrt(summary_sq_norms), np.sqrt(feature_sq_norms)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = dots / np.outer(summary_norms, feature_norms)
+        scores[~np.isfinite(scores)] = 0.0
+        for row, idx in enumerate(playlists_idx):
+            scores[row, idx] = -np.inf
+        return scores
+
+    def graphRecommend(self, playlist_idx: np.ndarray, k: int,
+                       mask: np.ndarray = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Recommendations of a playlist from the neighbour graph, in O(playlist size x neighbours) whatever the catalog
+        size. Candidates are ranked by the sum of their similarities to the playlist songs having them as neighbour,
+        weighted by the norms of these songs, i.e. the playlist's summary vector dot product restricted to the
+        graph. The similarity returned is that sum divided by the sum of the weights. Without a mask, less than k
+        songs are returned when the playlist songs have less than k distinct neighbours; with a mask letting less
+        than k neighbours through, the songs it allows are scored exactly over the preprocessed features instead.
+
+        Args:
+            playlist_idx (np.ndarray): Catalog row indices of the songs of the playlist.
+            k (int): Number of recommendations.
+            mask (np.ndarray, optional): Catalog songs that may be recommended. Defaults to all of them.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Recommended songs and their similarity, most similar first.
+        """
+        weights = self._feature_norms[playlist_idx].astype(np.float64)
+        candidates, scores = aggregateNeighbours(self._graph, playlist_idx, weights)
+        candidates, scores, top = self.graphTop(candidates, scores, playlist_idx, k, mask)
+        if mask is not None and len(top) < k:
+            # the neighbours of the playlist hold less than k songs passing the filters (e.g. a narrow decade or
+            # genre): the allowed songs are scored exactly instead, summing over all the playlist songs. Unfiltered
+            # queries keep their (possibly shorter) list, bounded by playlist size x neighbours
+            features = self.exactFeatures()
+            candidates = np.flatnonzero(mask)
+            candidates = candidates[~np.isin(candidates, playlist_idx)]
+            candidate_features = features[candidates]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                scores = (candidate_features @ features[playlist_idx].sum(axis=0)) / np.linalg.norm(
+                    candidate_features, axis=1)
+            scores[~np.isfinite(scores)] = 0.0
+            candidates, scores, top = self.graphTop(candidates, scores, playlist_idx, k)
+        return candidates[top], scores[top] / max(weights.sum(), np.finfo(np.float64).tiny)
+
+    def graphTop(self, candidates: np.ndarray, scores: np.ndarray, playlist_idx: np.ndarray, k: int,
+                 mask: np.ndarray = None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Candidates passing the mask (and not versions of the playlist songs), their scores and the positions of the
+        k best.
+        """
+        if mask is not None:
+            keep = mask[candidates]
+            candidates, scores = candidates[keep], scores[keep]
+        if self.config.drop_near_duplicates:
+            _, title_codes = self.songGroups()
+            keep = ~np.isin(title_codes[candidates], title_codes[playlist_idx])
+            candidates, scores = candidates[keep], scores[keep]
+            return candidates, scores, self.distinctTop(scores, k, title_codes[candidates])
+        return candidates, scores, self.topIndices(scores, k)
+
+    def exactFeatures(self) -> np.ndarray:
+        """
+        Preprocessed features of the catalog for the exact fallback of graph scoring, read on its first use.
+        """
+        if self._exact_features is None:
+            self._exact_features = pd.read_csv(self.config.prep_feats_data_path).to_numpy(dtype=np.float64)
+        return self._exact_features
+
+    def featurizer(self) -> 'SongFeaturizer':
+        """
+        Transformers fitted by the preprocessing pipeline, read on the first query by features.
+        """
+        # imported on first use, featurizing pulls in textblob & nltk (sentiment) which the app doesn't need
+        from src.components.featurizer import SongFeaturizer
+
+        if self._featurizer is None:
+            self._featurizer = SongFeaturizer.load(self.config.featurizer_path)
+        return self._featurizer
+
+    def featurizeTracks(self, tracks) -> np.ndarray:
+        """
+        Feature vectors of raw tracks, their genre block smoothed as the catalog's with `genre_smoothing`.
+        """
+        features = self.featurizer().transform(tracks)
+        if self.config.genre_smoothing:
+            if self._genre_pmi is None:
+                self._genre_pmi = loadGenrePMI(self.config.genre_pmi_path)
+            features = smoothGenreColumns(features, *self._genre_pmi, self.config.genre_smoothing_alpha)
+        return features.to_numpy()
+
+    def scoreVectors(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of every catalog song to feature vectors laid out as the features artifact, e.g. featurized
+        new tracks, on the feature blocks only. Vectors are projected on the embedding with embedding scoring and
+        scored on the 8-bit codes, without re-ranking, with quantized scoring.
+
+        Args:
+            vectors (np.ndarray): (queries x features) feature vectors.
+
+        Returns:
+            np.ndarray: (queries x songs) similarity matrix.
+        """
+        self.loadFeatures()
+        if self._features is None:
+            raise ValueError('Scoring the whole catalog needs exact, embedding or quantized scoring.')
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float64))
+        n_features = self._features.shape[1] if self._components is None else self._components.shape[1]
+        if vectors.shape[1] != n_features:
+            raise ValueError(f'The vectors have {vectors.shape[1]} features, the catalog {n_features}. Rerun the '
+                             f'preprocessing pipeline to refit the featurizer.')
+        if self._components is not None:
+            dots = (vectors @ self._components.T).astype(np.float32) @ self._features.T
+        elif self._codes is not None:
+            dots = self.quantizedDots(vectors)
+        else:
+            dots = vectors @ self._features.T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = dots / np.outer(np.linalg.norm(vectors, axis=1), self._feature_norms)
+        scores[~np.isfinite(scores)] = 0.0
+        return scores
+
+    def Recommend_From_Tracks(self, tracks, k: int = None, filters: SongFilters = None) -> pd.DataFrame:
+        """
+        Recommends catalog songs for a playlist of tracks that need not be in the catalog, given by their raw audio
+        features & genres (or as Spotify API records) and featurized with the transformers fitted by the pipeline.
+
+        Args:
+            tracks (pd.DataFrame | list[dict] | dict): Raw tracks of the playlist, see featurizer.tracksFrame.
+            k (int, optional): Number of recommendations. Defaults to the configured number.
+            filters (SongFilters, optional): Restricts the recommendations to the songs matching the filters.
+
+        Returns:
+            pd.DataFrame: Recommended songs, most similar first, with a 'similarity' column.
+        """
+        k = self.config.n_recommendations if k is None else k
+        summary = self.featurizeTracks(tracks).sum(axis=0)
+        scores = self.scoreVectors(summary)[0]
+        if filters is not None:
+            scores[~self.filterIndex().mask(filters)] = -np.inf
+        if self._codes is not None:
+            self.rerank(scores, summary, max(self.config.rerank_pool_size, k))
+        if self.config.drop_near_duplicates:
+            recommendations_idx = self.distinctTop(scores, k)
+        else:
+            recommendations_idx = self.topIndices(scores, k)
+        recommendations_df = self._songs_data.iloc[recommendations_idx].copy()
+        recommendations_df['similarity'] = scores[recommendations_idx]
+        return recommendations_df
+
+    def Match_Tracks(self, tracks, k: int = 1, batch_size: int = 1024) -> pd.DataFrame:
+        """
+        Most similar catalog songs of every track of a (partner) catalog. Tracks are featurized in one vectorized call
+        and scored against the catalog `batch_size` at a time.
+
+        Args:
+            tracks (pd.DataFrame | list[dict] | dict): Raw tracks, see featurizer.tracksFrame.
+            k (int, optional): Catalog songs matched per track. Defaults to 1.
+            batch_size (int, optional): Tracks scored per matrix product. Defaults to 1024.
+
+        Returns:
+            pd.DataFrame: 'Track' (position of the track), 'Rank', the matched catalog 'Song-Artist' and 'similarity',
+            k rows per track.
+        """
+        vectors = self.featurizeTracks(tracks)
+        k = min(k, len(self._songs_data))
+        matches_idx = np.empty((len(vectors), k), dtype=np.int64)
+        similarities = np.empty((len(vectors), k))
+        for start in range(0, len(vectors), batch_size):
+            scores = self.scoreVectors(vectors[start:start + batch_size])
+            if self._codes is not None:
+                for row, summary in enumerate(vectors[start:start + batch_size]):
+                    self.rerank(scores[row], summary, max(self.config.rerank_pool_size, k))
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            matches_idx[start:start + len(scores)] = np.take_along_axis(top, order, axis=1)
+            similarities[start:start + len(scores)] = np.take_along_axis(top_scores, order, axis=1)
+        return pd.DataFrame({'Track': np.repeat(np.arange(len(vectors)), k),
+                             'Rank': np.tile(np.arange(1, k + 1), len(vectors)),
+                             'Song-Artist': self._songs_data['Song-Artist'].to_numpy()[matches_idx.ravel()],
+                             'similarity': similarities.ravel()})
+
+    def artistCentroids(self) -> tuple[dict, np.ndarray, object, np.ndarray]:
+        """
+        Artist positions, names, (artists x songs) membership and unit centroids of the scored feature vectors of
+        their songs, computed on the first artist query.
+        """
+        if self._artist_centroids is None:
+            self.loadFeatures()
+            if self._features is None:
+                raise ValueError('Artist recommendations need exact, embedding or quantized scoring.')
+            artists = [literal_eval(names) if names.startswith('[') else [names]
+                       for names in self._songs_data['Artist Names']]
+            names, membership, centroids = Artist_Centroids(pd.DataFrame({'Artist Names': artists}),
+                                                            np.asarray(self._features))
+            self._artist_centroids = ({name: pos for pos, name in enumerate(names)}, np.array(names, dtype=object),
+                                      membership, centroids)
+        return self._artist_centroids
+
+    def Recommend_Artists(self, artists, k: int = 10, songs_per_artist: int = 3) -> pd.DataFrame:
+        """
+        Artists similar to one or several artists, by cosine similarity of the centroids of their songs, along with
+        the songs of every recommended artist closest to the centroid of the given artists.
+
+        Args:
+            artists (str | list): Name(s) of the artist(s), as in 'Artist Names'.
+            k (int, optional): Number of artists. Defaults to 10.
+            songs_per_artist (int, optional): Songs listed per recommended artist. Defaults to 3.
+
+        Returns:
+            pd.DataFrame: 'Artist', 'similarity' and 'Top Songs' ('Song-Artist' values) of the recommended artists,
+            most similar first.
+        """
+        positions, names, membership, centroids = self.artistCentroids()
+        artists = [artists] if isinstance(artists, str) else list(artists)
+        seeds = [positions[artist] for artist in artists if artist in positions]
+        if not seeds:
+            raise ValueError('None of the artists is in the catalog.')
+        query = centroids[seeds].sum(axis=0)
+        query /= max(np.linalg.norm(query), np.finfo(np.float32).tiny)
+        similarity = centroids @ query
+        similarity[seeds] = -np.inf
+        top = self.topIndices(similarity, k)
+
+        # songs of the recommended artists only, scored against the query centroid
+        songs = membership[top]
+        vectors = np.asarray(self._features[songs.indices], dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            song_scores = vectors @ query / self._feature_norms[songs.indices]
+        song_names = self._songs_data['Song-Artist'].to_numpy()
+        top_songs = []
+        for row in range(len(top)):
+            start, end = songs.indptr[row], songs.indptr[row + 1]
+            best = self.topIndices(np.nan_to_num(song_scores[start:end], nan=0.0), songs_per_artist)
+            top_songs.append(list(song_names[songs.indices[start:end][best]]))
+        return pd.DataFrame({'Artist': names[top], 'similarity': similarity[top], 'Top Songs': top_songs})
+
+    def recommendIndices(self, song_list_playlists: list, k: int = None, block_weights: dict = None,
+                         diversity: float = None, max_per_artist: int = None,
+                         filters: SongFilters = None) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        Catalog rows & similarities of the recommendations of several playlists, scoring the whole batch in one pass
+        over the catalog. See `Recommend_Songs_Batch` for the arguments.
+
+        Returns:
+            list[tuple[np.ndarray, np.ndarray]]: Rows of the recommended songs of every playlist, most similar first,
+            and their similarity.
+        """
+        k = self.config.n_recommendations if k is None else k
+        diversity = self.config.diversity if diversity is None else diversity
+        max_per_artist = self.config.max_per_artist if max_per_artist is None else max_per_artist
+        playlists_idx = [self.playlistIndex(song_list) for song_list in song_list_playlists]
+        self.loadFeatures()
+        if self._graph is not None:
+            if block_weights or diversity > 0 or max_per_artist is not None or self._lyrics is not None:
+                raise ValueError('Graph scoring supports neither block weights, the lyrics block nor re-ranking.')
+            recommendations = []
+            for playlist_idx in playlists_idx:
+                mask = None if filters is None else self.filterIndex().mask(filters, playlist_idx)
+                recommendations.append(self.graphRecommend(playlist_idx, k, mask))
+            return recommendations
+
+        scores = self.scorePlaylists(playlists_idx, block_weights)
+        recommendations = []
+        for row in range(len(playlists_idx)):
+            if filters is not None:
+                scores[row, ~self.filterIndex().mask(filters, playlists_idx[row])] = -np.inf
+            if self.config.drop_near_duplicates:
+                _, title_codes = self.songGroups()
+                scores[row, np.isin(title_codes, title_codes[playlists_idx[row]])] = -np.inf
+            if self._codes is not None:
+                pool_size = max(self.config.rerank_pool_size, k)
+                if diversity > 0 or max_per_artist is not None:
+                    pool_size = max(pool_size, self.config.diversity_pool_size)
+                self.rerank(scores[row], self._features[playlists_idx[row]].sum(axis=0), pool_size)
+            if diversity > 0 or max_per_artist is not None:
+                recommendations_idx = self.diversify(scores[row], k, diversity, max_per_artist)
+            elif self.config.drop_near_duplicates:
+                recommendations_idx = self.distinctTop(scores[row], k)
+            else:
+                recommendations_idx = self.topIndices(scores[row], k)
+            recommendations.append((recommendations_idx, scores[row, recommendations_idx]))
+        return recommendations
+
+    def Recommend_Songs_Batch(self, song_list_playlists: list, k: int = None, block_weights: dict = None,
+                              diversity: float = None, max_per_artist: int = None,
+                              filters: SongFilters = None) -> list[pd.DataFrame]:
+        """
+        Recommends songs for several playlists at once, scoring the whole batch in one pass over the catalog.
+
+        Args:
+            song_list_playlists (list): 'Song-Artist' values of the songs of every playlist.
+            k (int, optional): Number of recommendations per playlist. Defaults to the configured number.
+            block_weights (dict, optional): Weight of some of the feature blocks, see `scorePlaylists`.
+            diversity (float, optional): Novelty weight of the re-ranking, see `diversify`. Defaults to the
+                                         configured one.
+            max_per_artist (int, optional): Max. songs of one artist. Defaults to the configured cap.
+            filters (SongFilters, optional): Restricts the recommendations to the songs matching the filters, applied
+                                             before the top-k selection. Defaults to no filter.
+
+        Returns:
+            list[pd.DataFrame]: Recommended songs of every playlist, most similar first, with a 'similarity' column.
+        """
+        recommendations = []
+        for recommendations_idx, similarities in self.recommendIndices(song_list_playlists, k, block_weights,
+                                                                       diversity, max_per_artist, filters):
+            recommendations_df = self._songs_data.iloc[recommendations_idx].copy()
+            recommendations_df['similarity'] = similarities
+            recommendations.append(recommendations_df)
+        return recommendations
+
+    def recordStore(self) -> SongRecordStore:
+        """
+        Display fields of the catalog as parallel arrays, built on the first records query.
+        """
+        if self._record_store is None:
+            self._record_store = SongRecordStore(self._songs_data)
+        return self._record_store
+
+    def Recommend_Records_Batch(self, song_list_playlists: list, k: int = None, block_weights: dict = None,
+                                diversity: float = None, max_per_artist: int = None,
+                                filters: SongFilters = None) -> list[SongRecords]:
+        """
+        Same recommendations as `Recommend_Songs_Batch`, returned as the display fields of the songs gathered from
+        the record store instead of rows of the songs DataFrame, for serving & rendering.
+
+        Returns:
+            list[SongRecords]: Recommended songs of every playlist, most similar first, with their similarity.
+        """
+        store = self.recordStore()
+        return [store.gather(recommendations_idx, similarities)
+                for recommendations_idx, similarities in self.recommendIndices(song_list_playlists, k, block_weights,
+                                                                               diversity, max_per_artist, filters)]
+
+    def Recommend_Songs(self, song_list_playlist: list, block_weights: dict = None, diversity: float = None,
+                        max_per_artist: int = None, filters: SongFilters = None) -> pd.DataFrame:
+        return self.Recommend_Songs_Batch([song_list_playlist], block_weights=block_weights, diversity=diversity,
+                                          max_per_artist=max_per_artist, filters=filters)[0].drop(columns='similarity')
+
+    def Recommend_Records(self, song_list_playlist: list, block_weights: dict = None, diversity: float = None,
+                          max_per_artist: int = None, filters: SongFilters = None) -> SongRecords:
+        return self.Recommend_Records_Batch([song_list_playlist], block_weights=block_weights, diversity=diversity,
+                                            max_per_artist=max_per_artist, filters=filters)[0]
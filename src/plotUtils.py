@@ -1,21 +1,55 @@
+import os
 import math
+import time
+import urllib.request
 from ast import literal_eval
 
-import scipy
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-from matplotlib.ticker import MaxNLocator
-from mplsoccer import PyPizza, FontManager
 import pandas as pd
 import numpy as np
 
+# matplotlib, mplsoccer & scipy are imported where they're used, so that importing this module stays cheap
+
 spotifyGreen = '#1dda63'
 bg_color_cas = "#9bf0e1"
 grey = "#979797"
 lightgrey = "#bdbdbd"
 
-robotoBold = FontManager('https://tushar-mahalya.github.io/images-repo/Fonts/GothamBold.ttf')
-robotoMed = FontManager('https://tushar-mahalya.github.io/images-repo/Fonts/GothamMedium.ttf')
+fontsURL = 'https://tushar-mahalya.github.io/images-repo/Fonts'
+fontsCacheDir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'resources', 'Fonts')
+fontsRetryDelay = 60
+# Fonts loaded successfully and time of the last failed download of the others
+loadedFonts = {}
+fontFailures = {}
+
+# Colours of the light (notebook) and dark (app) chart styles
+chartStyles = {
+    'light': {'background': bg_color_cas, 'blank': 'w', 'edge': 'k', 'text': 'k', 'axes': 'w'},
+    'dark': {'background': '#000000', 'blank': 'k', 'edge': 'w', 'text': 'w', 'axes': 'k'},
+}
+
+
+def getFont(name: str = 'GothamMedium'):
+    from matplotlib.font_manager import FontProperties
+
+    if name in loadedFonts:
+        return loadedFonts[name]
+    font_path = os.path.join(fontsCacheDir, f'{name}.ttf')
+    if not os.path.exists(font_path):
+        if time.monotonic() - fontFailures.get(name, -math.inf) < fontsRetryDelay:
+            return FontProperties()
+        try:
+            os.makedirs(fontsCacheDir, exist_ok=True)
+            with urllib.request.urlopen(f'{fontsURL}/{name}.ttf', timeout=10) as response:
+                font = response.read()
+            with open(font_path + '.part', 'wb') as file:
+                file.write(font)
+            os.replace(font_path + '.part', font_path)
+        except OSError:
+            # Offline and not cached yet, fall back to matplotlib's default font until the next attempt
+            fontFailures[name] = time.monotonic()
+            return FontProperties()
+    loadedFonts[name] = FontProperties(fname=font_path)
+    return loadedFonts[name]
 
 
 def format_song_name(song: str):
@@ -32,6 +66,8 @@ def format_artist_name(artist_str: str):
 def getFeaturePercentiles(df: pd.DataFrame, feature: str, feat_type: str = 'song'):
     featColumns = ['Popularity', 'Acousticness', 'Danceability', 'Energy', 'Instrumentalness', 'Loudness',
                    'Speechiness', 'Tempo', 'Valence']
+    from scipy import stats
+
     values = []
     if feat_type == 'song':
         songProfile = df[df['Song-Artist'] == feature]
@@ -40,7 +76,7 @@ def getFeaturePercentiles(df: pd.DataFrame, feature: str, feat_type: str = 'song
         songFeats = songProfile.filter(featColumns)
         songFeats = list(songFeats.iloc[0])
         for x in range(len(featColumns)):
-            values.append(math.floor(scipy.stats.percentileofscore(df[featColumns[x]], songFeats[x])))
+            values.append(math.floor(stats.percentileofscore(df[featColumns[x]], songFeats[x])))
 
         return values
     elif feat_type == 'artist':
@@ -51,7 +87,7 @@ def getFeaturePercentiles(df: pd.DataFrame, feature: str, feat_type: str = 'song
             songFeats = list(artistData.loc[idx])
             valuesSong = []
             for x in range(len(featColumns)):
-                valuesSong.append(math.floor(scipy.stats.percentileofscore(df[featColumns[x]], songFeats[x])))
+                valuesSong.append(math.floor(stats.percentileofscore(df[featColumns[x]], songFeats[x])))
             values.append(valuesSong)
 
         return np.round(np.mean(values, axis=0)).astype(int)
@@ -64,13 +100,27 @@ def getFeaturePercentiles(df: pd.DataFrame, feature: str, feat_type: str = 'song
             genreFeats = list(genreData.loc[idx])
             valuesGenre = []
             for x in range(len(featColumns)):
-                valuesGenre.append(math.floor(scipy.stats.percentileofscore(df[featColumns[x]], genreFeats[x])))
+                valuesGenre.append(math.floor(stats.percentileofscore(df[featColumns[x]], genreFeats[x])))
             values.append(valuesGenre)
 
         return np.round(np.mean(values, axis=0)).astype(int)
 
 
-def plotPizza(values):
+def loadPercentileProfiles(path: str = 'artifacts/Artists_&_Genres_Percentile_Profiles.npz') -> dict:
+    """
+    Reads the precomputed mean percentile ranks of every artist & genre into {'artist': {name: values}, 'genre': ...}
+    lookups, the values being in the order getFeaturePercentiles returns them.
+    """
+    with np.load(path) as profiles:
+        return {feat_type: dict(zip(profiles[f'{feat_type}_names'].tolist(),
+                                    profiles[f'{feat_type}_values'].astype(int)))
+                for feat_type in ('artist', 'genre')}
+
+
+def plotPizza(values, style: str = 'light'):
+    from mplsoccer import PyPizza
+
+    colors = chartStyles[style]
     featColumns = ['Popularity', 'Acousticness', 'Danceability', 'Energy', 'Instrumentalness', 'Loudness',
                    'Speechiness', 'Tempo', 'Valence']
     slice_colors = [spotifyGreen] * 9
@@ -79,7 +129,7 @@ def plotPizza(values):
     # Instantiate PyPizza class
     baker = PyPizza(
         params=featColumns,
-        background_color=bg_color_cas,
+        background_color=colors['background'],
         straight_line_color=grey,
         straight_line_lw=2,
         straight_line_ls='-',
@@ -96,16 +146,16 @@ def plotPizza(values):
     fig, ax = baker.make_pizza(
         values,
         figsize=(8, 8),
-        color_blank_space=["w"] * 9,
+        color_blank_space=[colors['blank']] * 9,
         slice_colors=slice_colors,
         value_bck_colors=slice_colors,
         param_location=115,
         blank_alpha=1,
-        kwargs_slices=dict(edgecolor="k", zorder=2, linewidth=2, alpha=.8, linestyle='-'),
-        kwargs_params=dict(color="k", fontsize=22, fontweight='bold',
-                           va="center", fontproperties=robotoMed.prop),
+        kwargs_slices=dict(edgecolor=colors['edge'], zorder=2, linewidth=2, alpha=.8, linestyle='-'),
+        kwargs_params=dict(color=colors['text'], fontsize=22, fontweight='bold',
+                           va="center", fontproperties=getFont('GothamMedium')),
         kwargs_values=dict(color="k", fontsize=18, va='center',
-                           zorder=3, fontproperties=robotoMed.prop,
+                           zorder=3, fontproperties=getFont('GothamMedium'),
                            bbox=dict(edgecolor="k", boxstyle="round,pad=0.2", lw=1.5))
     )
 
@@ -116,15 +166,20 @@ def plotPizza(values):
     return fig
 
 
-def plotHitProfile(feat_dict):
+def plotHitProfile(feat_dict, style: str = 'light'):
+    import matplotlib as mpl
+    import matplotlib.pyplot as plt
+    from matplotlib.ticker import MaxNLocator
+
+    colors = chartStyles[style]
     mpl.rc('axes', edgecolor=grey)
     mpl.rc('axes', linewidth='2')
 
     fig, ax = plt.subplots(figsize=(8, 6))
 
     # Adding bg color and setting the grid
-    fig.set_facecolor(bg_color_cas)
-    ax.set_facecolor('w')
+    fig.set_facecolor(colors['background'])
+    ax.set_facecolor(colors['axes'])
     ax.set_axisbelow(True)
     ax.grid(color=lightgrey, which='major', linestyle='--', alpha=1)
 
@@ -146,40 +201,51 @@ def plotHitProfile(feat_dict):
     ax.set_xticks(x_ticks)
 
     # Setting the x label as year for every subplot
-    ax.set_xlabel('Year', fontsize=16, labelpad=10, fontproperties=robotoMed.prop, color='k')
-    ax.set_ylabel('Hit Quality', fontsize=16, labelpad=10, fontproperties=robotoMed.prop, color='k')
+    ax.set_xlabel('Year', fontsize=16, labelpad=10, fontproperties=getFont('GothamMedium'), color=colors['text'])
+    ax.set_ylabel('Hit Quality', fontsize=16, labelpad=10, fontproperties=getFont('GothamMedium'), color=colors['text'])
     ax.xaxis.set_major_locator(MaxNLocator(integer=True))
 
     # Customizing the x and y tick labels
     for ticklabel in ax.get_yticklabels():
-        ticklabel.set_fontproperties(robotoMed.prop)
+        ticklabel.set_fontproperties(getFont('GothamMedium'))
         ticklabel.set_fontsize(14)
 
     for ticklabel in ax.get_xticklabels():
-        ticklabel.set_fontproperties(robotoMed.prop)
+        ticklabel.set_fontproperties(getFont('GothamMedium'))
         ticklabel.set_fontsize(14)
 
-    ax.tick_params(axis='both', which='major', labelcolor='k', length=0, color='#2b2b2b')
+    ax.tick_params(axis='both', which='major', labelcolor=colors['text'], length=0, color='#2b2b2b')
 
     return fig
 
 
-def getMoodPlaylist(recc_df, chosen_mood):
-    if chosen_mood == "Trending songs":
-        rec_songs_idx = list(recc_df.sort_values(by='Popularity', ascending=False).index)[0:20]
+# Mood -> (audio feature, highest values first) the mood playlists are ranked by
+moodFeatures = {
+    "Trending songs": ('Popularity', True),
+    "Dance party": ('Danceability', True),
+    "Monday Blues": ('Valence', False),
+    "Energizing": ('Energy', True),
+    "Positive vibes": ('Valence', True),
+}
+
 
-    elif chosen_mood == "Dance party":
-        rec_songs_idx = list(recc_df.sort_values(by='Danceability', ascending=False).index)[0:20]
+def getMoodPlaylists(recc_df, playlist_len=20):
+    # recc_df is the recommendations DataFrame or any mapping of its feature columns to arrays
+    mood_rankings = {}
+    for mood, (feature, descending) in moodFeatures.items():
+        values = np.asarray(recc_df[feature], dtype=np.float64)
+        values = -values if descending else values
+        top_n = min(playlist_len, len(values))
+        top_idx = np.argpartition(values, top_n - 1)[:top_n] if top_n > 0 else np.empty(0, dtype=int)
+        mood_rankings[mood] = top_idx[np.argsort(values[top_idx], kind='stable')]
 
-    elif chosen_mood == "Monday Blues":
-        rec_songs_idx = list(recc_df.sort_values(by='Valence', ascending=True).index)[0:20]
+    return mood_rankings
 
-    elif chosen_mood == "Energizing":
-        rec_songs_idx = list(recc_df.sort_values(by='Energy', ascending=False).index)[0:20]
 
-    elif chosen_mood == "Positive vibes":
-        rec_songs_idx = list(recc_df.sort_values(by='Valence', ascending=False).index)[0:20]
+def getMoodPlaylist(recc_df, chosen_mood, mood_rankings=None):
+    if mood_rankings is None:
+        mood_rankings = getMoodPlaylists(recc_df)
 
-    mood_df = recc_df.iloc[rec_songs_idx]
+    mood_df = recc_df.iloc[mood_rankings[chosen_mood]]
 
     return mood_df
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.components.feature_blocks import FEATURE_BLOCK_WEIGHTS, featureBlockIds
+from src.pipeline.recommender_engine import RecommenderEngine, RecommenderEngineConfig
+
+# One or two columns of every feature block, named as the preprocessing pipeline names them
+FEATURE_COLUMNS = ['Genre | pop', 'Genre | rock', 'Subjectivity | Low', 'Polarity | Positive', 'Key | 5',
+                   'Mode | 1', 'Time Signature | 4', 'Energy', 'Valence']
+
+
+@pytest.fixture
+def engine(tmp_path):
+    rng = np.random.default_rng(0)
+    n_songs = 40
+    features = rng.random((n_songs, len(FEATURE_COLUMNS)))
+    # rows scaled by the pipeline's block weights, as the features artifact is
+    stored_weights = np.array(list(FEATURE_BLOCK_WEIGHTS.values()))[featureBlockIds(FEATURE_COLUMNS)]
+    features_df = pd.DataFrame(features * stored_weights, columns=FEATURE_COLUMNS)
+    songs_df = pd.DataFrame({'Song-Artist': [f'Song {i} - Artist {i}' for i in range(n_songs)]})
+
+    songs_path, feats_path = tmp_path / 'songs.csv', tmp_path / 'features.csv'
+    songs_df.to_csv(songs_path, index=False)
+    features_df.to_csv(feats_path, index=False)
+    return RecommenderEngine(RecommenderEngineConfig(prep_songs_data_path=str(songs_path),
+                                                     prep_feats_data_path=str(feats_path)))
+
+
+def cosineScores(features: np.ndarray, playlists_idx: list) -> np.ndarray:
+    summaries = np.vstack([features[idx].sum(axis=0) for idx in playlists_idx])
+    scores = (summaries @ features.T) / np.outer(np.linalg.norm(summaries, axis=1), np.linalg.norm(features, axis=1))
+    for row, idx in enumerate(playlists_idx):
+        scores[row, idx] = -np.inf
+    return scores
+
+
+@pytest.mark.parametrize('block_weights', [
+    {'genre': 2.0},
+    {'audio': 0.25, 'key': 1.5},
+    {'genre': 0.0, 'sentiment': 1.0, 'mode': 0.1, 'time_sig': 2.0},
+])
+def test_block_weighted_scores_match_cosine_on_reweighted_features(engine, block_weights):
+    playlists_idx = [np.array([0, 3, 7]), np.array([12, 25]), np.array([39])]
+
+    # explicitly rescale every column of the stored features by the ratio of its requested to its stored weight
+    weights = {**FEATURE_BLOCK_WEIGHTS, **block_weights}
+    ratios = np.array([weights[block] / FEATURE_BLOCK_WEIGHTS[block] for block in FEATURE_BLOCK_WEIGHTS])
+    features = pd.read_csv(engine.config.prep_feats_data_path).to_numpy()
+    reweighted = features * ratios[featureBlockIds(FEATURE_COLUMNS)]
+
+    np.testing.assert_allclose(engine.scorePlaylists(playlists_idx, block_weights),
+                               cosineScores(reweighted, playlists_idx), rtol=1e-10, atol=1e-12)
+
+
+def test_default_block_weights_score_plain_cosine(engine):
+    playlists_idx = [np.array([1, 2, 30])]
+    features = pd.read_csv(engine.config.prep_feats_data_path).to_numpy()
+
+    np.testing.assert_allclose(engine.scorePlaylists(playlists_idx), cosineScores(features, playlists_idx),
+                               rtol=1e-10, atol=1e-12)